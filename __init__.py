@@ -5,11 +5,14 @@ Ported from the Go library: https://github.com/charmbracelet/bubbletea
 """
 
 from .model import Model
+from .component import Component, ComponentModel, Stack
 from .tea import Program
+from .headless import HeadlessProgram, VirtualClock
 from .messages import (
     Msg,
     KeyMsg,
     MouseMsg,
+    PasteMsg,
     WindowSizeMsg,
     FocusMsg,
     BlurMsg,
@@ -17,7 +20,29 @@ from .messages import (
 )
 from .keys import Key, KeyType
 from .mouse import MouseButton, MouseAction, MouseEvent
-from .commands import Cmd, quit_cmd, batch, sequence, set_window_title, clear_screen
+from .commands import (
+    Cmd,
+    quit_cmd,
+    batch,
+    sequence,
+    BatchMsg,
+    SequenceMsg,
+    blocking,
+    cancellable,
+    CancellableCmd,
+    tick,
+    every,
+    TickCmd,
+    set_window_title,
+    clear_screen,
+    WindowTitleMsg,
+    ClearScreenMsg,
+)
+from .cancel import CancelToken, CommandCancelled, current_token
+from .lanes import LANE_INPUT, LANE_RESIZE, LANE_CONTROL, LANE_BACKGROUND
+from .stats import ProgramStats, StatsExporter
+from .recorder import SessionRecorder, Replayer, RecordedEvent, load_recording
+from .server import ProgramServer, Session
 from .screen import (
     enter_alt_screen,
     exit_alt_screen,
@@ -32,10 +57,17 @@ __all__ = [
     # Core
     "Model",
     "Program",
+    "HeadlessProgram",
+    "VirtualClock",
+    # Components
+    "Component",
+    "ComponentModel",
+    "Stack",
     # Messages
     "Msg",
     "KeyMsg",
     "MouseMsg",
+    "PasteMsg",
     "WindowSizeMsg",
     "FocusMsg",
     "BlurMsg",
@@ -52,8 +84,38 @@ __all__ = [
     "quit_cmd",
     "batch",
     "sequence",
+    "BatchMsg",
+    "SequenceMsg",
+    "blocking",
+    "cancellable",
+    "CancellableCmd",
+    "tick",
+    "every",
+    "TickCmd",
     "set_window_title",
     "clear_screen",
+    "WindowTitleMsg",
+    "ClearScreenMsg",
+    # Cancellation
+    "CancelToken",
+    "CommandCancelled",
+    "current_token",
+    # Message lanes
+    "LANE_INPUT",
+    "LANE_RESIZE",
+    "LANE_CONTROL",
+    "LANE_BACKGROUND",
+    # Instrumentation
+    "ProgramStats",
+    "StatsExporter",
+    # Recording
+    "SessionRecorder",
+    "Replayer",
+    "RecordedEvent",
+    "load_recording",
+    # Hosting
+    "ProgramServer",
+    "Session",
     # Screen
     "enter_alt_screen",
     "exit_alt_screen",
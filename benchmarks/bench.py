@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Render/update benchmarks for Bubble Tea.
+
+Drives a real Program headlessly: a scripted stream of KeyMsg, MouseMsg and
+WindowSizeMsg messages is fed to the program, which renders into an
+in-memory buffer, once with the NullRenderer and once with the standard
+Renderer. For each scenario it reports update and view latency, frames
+rendered, bytes written per frame and messages processed per second.
+
+Usage:
+    python benchmarks/bench.py                    # all scenarios, table output
+    python benchmarks/bench.py --json results.json
+    python benchmarks/bench.py --scenario log_stream --messages 50000
+    python benchmarks/bench.py --rate 5000        # paced, like a live producer
+
+By default the whole script is queued before the program starts, which
+measures raw loop throughput. With --rate, a producer thread sends the
+messages at that rate instead, so frame pacing and per-frame output match
+a live program.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add the directory containing the package to the path for development
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import bubbletea as tea
+
+
+# Messages -------------------------------------------------------------------
+
+@dataclass
+class TickMsg(tea.Msg):
+    """Advances the spinner."""
+    frame: int
+
+
+@dataclass
+class LogLineMsg(tea.Msg):
+    """A line from a log stream."""
+    line: str
+
+
+# Scenario models -------------------------------------------------------------
+
+class ListModel(tea.Model):
+    """A long list navigated with the arrow keys and hovered with the mouse."""
+
+    def __init__(self, items: int = 10_000, height: int = 200):
+        self.items = [f"Item {i:05d} " + "lorem ipsum " * 4 for i in range(items)]
+        self.height = height
+        self.cursor = 0
+        self.hover = -1
+
+    def init(self) -> Optional[tea.Cmd]:
+        return None
+
+    def update(self, msg: tea.Msg) -> Tuple[tea.Model, Optional[tea.Cmd]]:
+        if isinstance(msg, tea.KeyMsg):
+            if msg.key == "down":
+                self.cursor = min(self.cursor + 1, len(self.items) - 1)
+            elif msg.key == "up":
+                self.cursor = max(self.cursor - 1, 0)
+        elif isinstance(msg, tea.MouseMsg):
+            self.hover = msg.y
+        elif isinstance(msg, tea.WindowSizeMsg):
+            self.height = max(1, msg.height - 2)
+        return self, None
+
+    def view(self) -> str:
+        top = max(0, self.cursor - self.height + 1)
+        lines = []
+        for i in range(top, min(top + self.height, len(self.items))):
+            marker = ">" if i == self.cursor else ("*" if i - top == self.hover else " ")
+            lines.append(f"{marker} {self.items[i]}")
+        lines.append(f"{self.cursor + 1}/{len(self.items)}")
+        return "\n".join(lines)
+
+
+SPINNER = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
+
+
+class SpinnerTableModel(tea.Model):
+    """A spinner above a table whose selected row moves."""
+
+    def __init__(self, rows: int = 40, cols: int = 6):
+        rng = random.Random(1)
+        self.rows = [[f"{rng.randint(0, 99999):>8}" for _ in range(cols)] for _ in range(rows)]
+        self.frame = 0
+        self.selected = 0
+        self.width = 80
+
+    def init(self) -> Optional[tea.Cmd]:
+        return None
+
+    def update(self, msg: tea.Msg) -> Tuple[tea.Model, Optional[tea.Cmd]]:
+        if isinstance(msg, TickMsg):
+            self.frame = msg.frame
+        elif isinstance(msg, tea.KeyMsg):
+            if msg.key == "down":
+                self.selected = (self.selected + 1) % len(self.rows)
+            elif msg.key == "up":
+                self.selected = (self.selected - 1) % len(self.rows)
+        elif isinstance(msg, tea.WindowSizeMsg):
+            self.width = msg.width
+        return self, None
+
+    def view(self) -> str:
+        lines = [f"{SPINNER[self.frame % len(SPINNER)]} Loading..."]
+        lines.append("-" * min(self.width, 60))
+        for i, row in enumerate(self.rows):
+            cells = " | ".join(row)
+            lines.append(f"\x1b[7m{cells}\x1b[0m" if i == self.selected else cells)
+        return "\n".join(lines)
+
+
+class LogStreamModel(tea.Model):
+    """A tail of a fast log stream."""
+
+    def __init__(self, height: int = 50):
+        self.lines: List[str] = []
+        self.height = height
+        self.total = 0
+
+    def init(self) -> Optional[tea.Cmd]:
+        return None
+
+    def update(self, msg: tea.Msg) -> Tuple[tea.Model, Optional[tea.Cmd]]:
+        if isinstance(msg, LogLineMsg):
+            self.lines.append(msg.line)
+            if len(self.lines) > self.height:
+                del self.lines[: len(self.lines) - self.height]
+            self.total += 1
+        elif isinstance(msg, tea.WindowSizeMsg):
+            self.height = max(1, msg.height - 1)
+        return self, None
+
+    def view(self) -> str:
+        return "\n".join(self.lines) + f"\n-- {self.total} lines --"
+
+
+# Scripts --------------------------------------------------------------------
+
+def list_script(n: int, rng: random.Random) -> List[tea.Msg]:
+    msgs: List[tea.Msg] = []
+    for i in range(n):
+        r = rng.random()
+        if r < 0.6:
+            msgs.append(tea.KeyMsg(key="down" if rng.random() < 0.7 else "up"))
+        elif r < 0.999:
+            msgs.append(tea.MouseMsg(x=rng.randrange(80), y=rng.randrange(200),
+                                     button=0, action="motion"))
+        else:
+            msgs.append(tea.WindowSizeMsg(width=120, height=rng.randrange(100, 220)))
+    return msgs
+
+
+def spinner_table_script(n: int, rng: random.Random) -> List[tea.Msg]:
+    msgs: List[tea.Msg] = []
+    for i in range(n):
+        r = rng.random()
+        if r < 0.8:
+            msgs.append(TickMsg(frame=i))
+        elif r < 0.999:
+            msgs.append(tea.KeyMsg(key="down" if rng.random() < 0.5 else "up"))
+        else:
+            msgs.append(tea.WindowSizeMsg(width=rng.randrange(60, 200), height=50))
+    return msgs
+
+
+def log_stream_script(n: int, rng: random.Random) -> List[tea.Msg]:
+    levels = ["DEBUG", "INFO", "WARN", "ERROR"]
+    return [
+        LogLineMsg(line=f"2024-01-01T00:00:{i % 60:02d} {rng.choice(levels):5} "
+                        f"request {i} took {rng.randrange(1, 500)}ms")
+        for i in range(n)
+    ]
+
+
+Script = Callable[[int, random.Random], List[tea.Msg]]
+
+SCENARIOS: Dict[str, Tuple[Callable[[], tea.Model], Script]] = {
+    "large_list": (ListModel, list_script),
+    "spinner_table": (SpinnerTableModel, spinner_table_script),
+    "log_stream": (LogStreamModel, log_stream_script),
+}
+
+
+# Measurement ----------------------------------------------------------------
+
+class TimedModel(tea.Model):
+    """Wraps a model and records how long each update and view takes."""
+
+    def __init__(self, inner: tea.Model):
+        self.inner = inner
+        self.update_times: List[float] = []
+        self.view_times: List[float] = []
+
+    def init(self) -> Optional[tea.Cmd]:
+        return self.inner.init()
+
+    def update(self, msg: tea.Msg) -> Tuple[tea.Model, Optional[tea.Cmd]]:
+        start = time.perf_counter()
+        self.inner, cmd = self.inner.update(msg)
+        self.update_times.append(time.perf_counter() - start)
+        return self, cmd
+
+    def view(self) -> str:
+        start = time.perf_counter()
+        view = self.inner.view()
+        self.view_times.append(time.perf_counter() - start)
+        return view
+
+
+class CountingOutput(io.StringIO):
+    """An in-memory terminal that counts the bytes written to it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.bytes_written = 0
+
+    def write(self, s: str) -> int:
+        self.bytes_written += len(s.encode("utf-8"))
+        return super().write(s)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in microseconds."""
+    if not samples:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+
+    return {
+        "mean": round(sum(ordered) / len(ordered) * 1e6, 2),
+        "p50": round(pick(0.50), 2),
+        "p95": round(pick(0.95), 2),
+        "p99": round(pick(0.99), 2),
+        "max": round(ordered[-1] * 1e6, 2),
+    }
+
+
+def feed(program: tea.Program, script: List[tea.Msg], rate: float) -> None:
+    """Send the script to the program at ``rate`` messages per second."""
+    start = time.perf_counter()
+    for i, msg in enumerate(script):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        program.send(msg)
+    program.send(tea.QuitMsg())
+
+
+def run_scenario(
+    name: str, renderer: str, messages: int, fps: int, seed: int, rate: float = 0
+) -> Dict:
+    """Run one scenario through a headless Program and collect its metrics."""
+    make_model, make_script = SCENARIOS[name]
+    script = make_script(messages, random.Random(seed))
+    model = TimedModel(make_model())
+    output = CountingOutput()
+
+    # The input is a pipe nobody writes to, so the reader just idles
+    read_fd, write_fd = os.pipe()
+    try:
+        with os.fdopen(read_fd) as input_tty:
+            program = tea.Program(
+                model,
+                input_tty=input_tty,
+                output=output,
+                fps=fps,
+                without_renderer=(renderer == "null"),
+                cell_renderer=(renderer == "cell"),
+                alt_screen=(renderer == "cell"),
+            )
+            producer = None
+            if rate > 0:
+                producer = threading.Thread(target=feed, args=(program, script, rate))
+            else:
+                for msg in script:
+                    program.send(msg)
+                program.send(tea.QuitMsg())
+
+            start = time.perf_counter()
+            if producer is not None:
+                producer.start()
+            program.run()
+            elapsed = time.perf_counter() - start
+            if producer is not None:
+                producer.join()
+    finally:
+        os.close(write_fd)
+
+    frames = len(model.view_times)
+    return {
+        "scenario": name,
+        "renderer": renderer,
+        "rate": rate,
+        "messages": len(script),
+        "elapsed_s": round(elapsed, 6),
+        "msgs_per_sec": round(len(script) / elapsed, 1) if elapsed else 0.0,
+        "frames": frames,
+        "bytes_written": output.bytes_written,
+        "bytes_per_frame": round(output.bytes_written / frames, 1) if frames else 0.0,
+        "update_us": percentiles(model.update_times),
+        "view_us": percentiles(model.view_times),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--renderer", choices=["null", "standard", "cell"], action="append",
+                        help="renderer to use (repeatable, default: both)")
+    parser.add_argument("--messages", type=int, default=20_000,
+                        help="messages per scenario (default: 20000)")
+    parser.add_argument("--fps", type=int, default=60, help="renderer frame rate")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="send messages at this rate per second (default: all at once)")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the message scripts")
+    parser.add_argument("--json", metavar="PATH",
+                        help="write machine-readable results to PATH ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = [
+        run_scenario(name, renderer, args.messages, args.fps, args.seed, args.rate)
+        for name in (args.scenario or sorted(SCENARIOS))
+        for renderer in (args.renderer or ["null", "standard"])
+    ]
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "bubbletea": tea.__version__,
+        "messages": args.messages,
+        "fps": args.fps,
+        "rate": args.rate,
+        "seed": args.seed,
+        "results": results,
+    }
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    header = f"{'scenario':<14} {'renderer':<9} {'msgs/s':>10} {'frames':>7} " \
+             f"{'B/frame':>9} {'upd p50':>8} {'upd p99':>8} {'view p50':>9} {'view p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<14} {r['renderer']:<9} {r['msgs_per_sec']:>10.0f} "
+              f"{r['frames']:>7} {r['bytes_per_frame']:>9.0f} "
+              f"{r['update_us']['p50']:>8.1f} {r['update_us']['p99']:>8.1f} "
+              f"{r['view_us']['p50']:>9.1f} {r['view_us']['p99']:>9.1f}")
+    print("\nlatencies in microseconds")
+
+
+if __name__ == "__main__":
+    main()
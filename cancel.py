@@ -0,0 +1,107 @@
+"""Cooperative cancellation for Bubble Tea commands."""
+
+from contextvars import ContextVar
+from threading import Event, Lock
+from typing import Callable, List, Optional
+
+
+class CommandCancelled(Exception):
+    """Raised by ``CancelToken.raise_if_cancelled()`` once cancelled."""
+
+
+class CancelToken:
+    """
+    Tells a running command that its result is no longer wanted.
+
+    A program cancels the token of every command it started when it quits,
+    and a command wrapped with ``cancellable()`` can be cancelled on its
+    own. Commands find their token with ``current_token()`` and either
+    poll it, wait on it instead of sleeping, or register a callback that
+    interrupts blocking work (closing a socket, killing a subprocess).
+    Whatever a command returns after its token was cancelled is dropped.
+    """
+
+    def __init__(self) -> None:
+        self._event = Event()
+        self._lock = Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token has been cancelled."""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the token and run its callbacks, once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` on cancellation, or right away if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """Unregister a callback added with ``add_callback()``."""
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until cancelled or ``timeout`` seconds pass.
+
+        Use it in place of ``time.sleep`` so a command stops sleeping as
+        soon as it is cancelled.
+
+        Returns:
+            True if the token was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise CommandCancelled if the token has been cancelled."""
+        if self._event.is_set():
+            raise CommandCancelled()
+
+
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar(
+    "bubbletea_cancel_token", default=None
+)
+
+class _NeverCancelled(CancelToken):
+    """The token outside of a command, shared by all callers, so it ignores ``cancel()``."""
+
+    def cancel(self) -> None:
+        pass
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        # It would never be called
+        pass
+
+
+# Handed out outside of a command
+_NEVER = _NeverCancelled()
+
+
+def current_token() -> CancelToken:
+    """
+    Return the cancellation token of the command being run.
+
+    Outside of a command run by a program this is a token that is never
+    cancelled, so commands can use it unconditionally.
+    """
+    return _current_token.get() or _NEVER
@@ -0,0 +1,76 @@
+"""Mouse motion coalescing for Bubble Tea."""
+
+from threading import Lock
+from typing import Optional
+
+from .messages import Msg, MouseMsg
+
+
+class PendingMotion(Msg):
+    """
+    A queued slot holding the latest of a run of mouse motion events.
+
+    The slot is enqueued once; motion that arrives before the event loop
+    takes it replaces the held message instead of adding to the queue.
+    """
+
+    __slots__ = ("msg", "taken")
+
+    def __init__(self, msg: MouseMsg):
+        self.msg = msg
+        self.taken = False
+
+
+class MotionCoalescer:
+    """
+    Collapses consecutive mouse motion events to the latest position.
+
+    Sits between the input reader and the message queue. Motion events with
+    the same button and modifiers as the motion still waiting in the queue
+    update it in place; anything else (presses, releases, wheel events,
+    keys) closes the current run, so the relative order of events is kept.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._open: Optional[PendingMotion] = None
+        self.merged = 0  # Motion events folded into a later one
+
+    def push(self, msg: Msg) -> Optional[Msg]:
+        """
+        Pass an input message through the coalescer.
+
+        Returns:
+            The message to enqueue, or None if it was merged into a motion
+            event that is already queued
+        """
+        if not isinstance(msg, MouseMsg) or msg.action != "motion":
+            with self._lock:
+                self._open = None
+            return msg
+
+        with self._lock:
+            slot = self._open
+            if (
+                slot is not None
+                and not slot.taken
+                and slot.msg.button == msg.button
+                and slot.msg.alt == msg.alt
+                and slot.msg.ctrl == msg.ctrl
+                and slot.msg.shift == msg.shift
+            ):
+                slot.msg = msg
+                self.merged += 1
+                return None
+
+            slot = PendingMotion(msg)
+            self._open = slot
+            return slot
+
+    def take(self, slot: PendingMotion) -> MouseMsg:
+        """Claim a queued slot for processing and return its latest event."""
+        with self._lock:
+            slot.taken = True
+            if self._open is slot:
+                self._open = None
+            return slot.msg
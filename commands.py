@@ -1,8 +1,9 @@
 """Commands for Bubble Tea."""
 
-from typing import Callable, Optional, List, Any, Union
+from typing import Callable, Optional, List, Any, Sequence, Tuple, Union
 from dataclasses import dataclass
 from .messages import Msg, QuitMsg, CustomMsg
+from .cancel import CancelToken, _current_token
 
 
 # A Cmd is a callable that returns an optional Msg
@@ -19,6 +20,69 @@ def quit_cmd() -> Msg:
     return QuitMsg()
 
 
+@dataclass(frozen=True, slots=True)
+class BatchMsg(Msg):
+    """Asks the program to run commands concurrently (see ``batch``)."""
+    cmds: Tuple[Cmd, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class SequenceMsg(Msg):
+    """Asks the program to run commands in order (see ``sequence``)."""
+    cmds: Tuple[Cmd, ...]
+
+
+class BatchCmd:
+    """
+    Commands to run concurrently, as returned by ``batch()``.
+    
+    Nested batches are flattened when the batch is built, so the program
+    fans the commands out to its workers without looking inside them
+    again. Calling the command directly returns a BatchMsg, which the
+    program runs the same way.
+    """
+    
+    __slots__ = ("cmds",)
+    
+    def __init__(self, cmds: Sequence[Cmd]):
+        flat: List[Cmd] = []
+        for cmd in cmds:
+            if type(cmd) is BatchCmd:
+                flat.extend(cmd.cmds)
+            else:
+                flat.append(cmd)
+        self.cmds: Tuple[Cmd, ...] = tuple(flat)
+    
+    def __call__(self) -> Msg:
+        return BatchMsg(self.cmds)
+
+
+class SequenceCmd:
+    """
+    Commands to run one after another, as returned by ``sequence()``.
+    
+    Each command starts after the previous one finished and its message
+    was delivered; a batch within a sequence completes as a whole before
+    the next step. Nested sequences are flattened when the sequence is
+    built. Calling the command directly returns a SequenceMsg, which the
+    program runs the same way.
+    """
+    
+    __slots__ = ("cmds",)
+    
+    def __init__(self, cmds: Sequence[Cmd]):
+        flat: List[Cmd] = []
+        for cmd in cmds:
+            if type(cmd) is SequenceCmd:
+                flat.extend(cmd.cmds)
+            else:
+                flat.append(cmd)
+        self.cmds: Tuple[Cmd, ...] = tuple(flat)
+    
+    def __call__(self) -> Msg:
+        return SequenceMsg(self.cmds)
+
+
 def batch(*cmds: Optional[Cmd]) -> Optional[Cmd]:
     """
     Combine multiple commands into one.
@@ -38,23 +102,16 @@ def batch(*cmds: Optional[Cmd]) -> Optional[Cmd]:
     if len(valid_cmds) == 1:
         return valid_cmds[0]
     
-    def batched() -> Optional[Msg]:
-        # Return first message, others will be handled by program
-        for cmd in valid_cmds:
-            result = cmd()
-            if result is not None:
-                return result
-        return None
-    
-    # Store all commands for the program to execute
-    batched._batch_cmds = valid_cmds  # type: ignore
-    return batched
+    return BatchCmd(valid_cmds)
 
 
 def sequence(*cmds: Optional[Cmd]) -> Optional[Cmd]:
     """
     Run commands in sequence, one after another.
     
+    The commands run off the event loop, and the message of each one is
+    delivered before the next one starts.
+    
     Args:
         *cmds: Commands to run sequentially
         
@@ -66,15 +123,101 @@ def sequence(*cmds: Optional[Cmd]) -> Optional[Cmd]:
     if not valid_cmds:
         return None
     
-    def sequenced() -> Optional[Msg]:
-        for cmd in valid_cmds:
-            result = cmd()
-            if result is not None:
-                return result
-        return None
+    if len(valid_cmds) == 1:
+        return valid_cmds[0]
+    
+    return SequenceCmd(valid_cmds)
+
+
+def blocking(cmd: Cmd) -> Cmd:
+    """
+    Mark a command as performing blocking I/O.
+    
+    Blocking commands run on the program's dedicated I/O worker pool when
+    one is configured (see ``Program(io_workers=...)``), so slow network or
+    disk access cannot starve other commands.
+    
+    Args:
+        cmd: The command to mark
+        
+    Returns:
+        A command that runs ``cmd`` on the I/O pool
+    """
+    def blocking_cmd() -> Optional[Msg]:
+        return cmd()
+    
+    blocking_cmd._blocking = True  # type: ignore
+    return blocking_cmd
+
+
+class CancellableCmd:
+    """
+    A command that can be cancelled through the handle returned by
+    ``cancellable()``.
+    
+    The command runs with its own CancelToken, available to it through
+    ``current_token()``. Calling ``cancel()`` cancels the token: a command
+    that hasn't started yet never runs, a running one can notice and stop
+    early, and its result is dropped either way. The token is also
+    cancelled when the program quits.
+    """
+    
+    def __init__(self, cmd: Cmd):
+        self.cmd = cmd
+        self.token = CancelToken()
+        self._blocking = getattr(cmd, "_blocking", False)
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether the command has been cancelled."""
+        return self.token.cancelled
+    
+    def cancel(self) -> None:
+        """Cancel the command."""
+        self.token.cancel()
+    
+    def __call__(self) -> Optional[Msg]:
+        if self.token.cancelled:
+            return None
+        reset = _current_token.set(self.token)
+        try:
+            result = self.cmd()
+        finally:
+            _current_token.reset(reset)
+        if self.token.cancelled:
+            return None
+        return result
+
+
+def cancellable(cmd: Cmd) -> CancellableCmd:
+    """
+    Make a command cancellable.
     
-    sequenced._sequence_cmds = valid_cmds  # type: ignore
-    return sequenced
+    Usage:
+        self.fetch = cancellable(fetch_cmd)
+        return self, self.fetch
+        ...
+        self.fetch.cancel()
+    
+    Args:
+        cmd: The command to wrap
+        
+    Returns:
+        A command that is also a handle to cancel it
+    """
+    return CancellableCmd(cmd)
+
+
+@dataclass(frozen=True, slots=True)
+class WindowTitleMsg(Msg):
+    """Asks the program to set the terminal window title."""
+    title: str
+
+
+@dataclass(frozen=True, slots=True)
+class ClearScreenMsg(Msg):
+    """Asks the program to clear the screen and redraw the view."""
+    pass
 
 
 def set_window_title(title: str) -> Cmd:
@@ -87,10 +230,6 @@ def set_window_title(title: str) -> Cmd:
     Returns:
         A command that sets the window title
     """
-    @dataclass
-    class WindowTitleMsg(Msg):
-        title: str
-    
     def cmd() -> Msg:
         return WindowTitleMsg(title=title)
     
@@ -104,17 +243,74 @@ def clear_screen() -> Cmd:
     Returns:
         A command that clears the terminal screen
     """
-    @dataclass
-    class ClearScreenMsg(Msg):
-        pass
-    
     def cmd() -> Msg:
         return ClearScreenMsg()
     
     return cmd
 
 
-def tick(duration_seconds: float, fn: Callable[[], Msg]) -> Cmd:
+class TickCmd:
+    """
+    A command that sends a message after a delay, optionally repeating.
+    
+    When run by a Program the command is not executed on a worker: the
+    program's timer scheduler fires it from the event loop, so any number
+    of timers costs no threads. Called directly, outside a program, it
+    falls back to sleeping for one interval.
+    
+    Keep a reference to cancel the timer; a cancelled timer never fires
+    again, even if it was already due.
+    """
+    
+    # Only reached when called directly; sleeping ties up a worker
+    _blocking = True
+    
+    def __init__(
+        self,
+        duration: float,
+        fn: Callable[[], Msg],
+        *,
+        repeat: bool = False,
+        align: bool = False,
+    ):
+        """
+        Args:
+            duration: Delay, or interval when repeating, in seconds
+            fn: Function that returns the message to send
+            repeat: Keep firing every ``duration`` seconds until cancelled
+            align: Fire on wall-clock multiples of ``duration`` (e.g. on
+                the second for 1.0) rather than ``duration`` from now
+        """
+        if duration < 0:
+            raise ValueError("duration must not be negative")
+        if repeat and duration <= 0:
+            raise ValueError("a repeating interval must be positive")
+        self.duration = duration
+        self.fn = fn
+        self.repeat = repeat
+        self.align = align
+        self.cancelled = False
+    
+    def delay(self, wall_now: float) -> float:
+        """Return the time until the next firing, given the wall-clock time."""
+        if self.align and self.duration > 0:
+            return self.duration - wall_now % self.duration
+        return self.duration
+    
+    def cancel(self) -> None:
+        """Stop the timer."""
+        self.cancelled = True
+    
+    def __call__(self) -> Optional[Msg]:
+        import time
+        
+        time.sleep(self.delay(time.time()))
+        if self.cancelled:
+            return None
+        return self.fn()
+
+
+def tick(duration_seconds: float, fn: Callable[[], Msg]) -> TickCmd:
     """
     Command to send a message after a delay.
     
@@ -123,27 +319,25 @@ def tick(duration_seconds: float, fn: Callable[[], Msg]) -> Cmd:
         fn: Function that returns the message to send
         
     Returns:
-        A command that sends a message after the delay
+        A cancellable command that sends a message after the delay
     """
-    import time
-    
-    def cmd() -> Optional[Msg]:
-        time.sleep(duration_seconds)
-        return fn()
-    
-    return cmd
+    return TickCmd(duration_seconds, fn)
 
 
-def every(interval_seconds: float, fn: Callable[[], Msg]) -> Cmd:
+def every(interval_seconds: float, fn: Callable[[], Msg]) -> TickCmd:
     """
     Command to repeatedly send a message at an interval.
     
-    Note: This is meant to be called once and will keep running.
+    Like the Go version, ticks are aligned to the system clock: with an
+    interval of one second the message is sent at the start of each
+    second. The command keeps firing until it is cancelled or the program
+    exits, so return it once and keep it to call ``cancel()``.
     
     Args:
         interval_seconds: Interval in seconds
         fn: Function that returns the message to send
+        
+    Returns:
+        A cancellable command that sends a message every interval
     """
-    # This is a placeholder - actual implementation would need
-    # to be integrated with the event loop
-    return tick(interval_seconds, fn)
+    return TickCmd(interval_seconds, fn, repeat=True, align=True)
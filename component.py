@@ -0,0 +1,140 @@
+"""Cached view composition for Bubble Tea."""
+
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Sequence
+
+from .model import Model
+
+
+# Cache key that never matches, so the first view is always rendered
+_STALE = object()
+
+
+class Component(ABC):
+    """
+    A part of a view that remembers what it rendered.
+
+    Subclasses implement ``render()``. ``view()`` only calls it when the
+    component has changed since the last call, and otherwise returns the
+    same string (and ``lines()`` the same list) as before. A component
+    counts as changed when:
+
+    - ``invalidate()`` was called, bumping its version, or
+    - the value returned by ``state()`` is different, or
+    - any of its ``children()`` changed.
+
+    Because unchanged parts of the view are the same string objects frame
+    to frame, the renderer compares them by identity and skips them
+    without looking at their contents.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._key: Any = _STALE
+        self._view: Optional[str] = None
+        self._lines: Optional[List[str]] = None
+
+    @abstractmethod
+    def render(self) -> str:
+        """Render the component; called only when it has changed."""
+
+    def state(self) -> Any:
+        """
+        Return a value that changes whenever the rendered output would.
+
+        Override this to cache by state instead of calling ``invalidate()``,
+        e.g. ``return (self.cursor, self.selected)``. The default is None,
+        leaving changes to ``invalidate()``.
+        """
+        return None
+
+    def children(self) -> Sequence["Component"]:
+        """Return the components this one is rendered from."""
+        return ()
+
+    def invalidate(self) -> None:
+        """Mark the component as changed."""
+        self.version += 1
+
+    def cache_key(self) -> Any:
+        """Return the key the cached view is valid for."""
+        children = self.children()
+        if not children:
+            return (self.version, self.state())
+        return (
+            self.version,
+            self.state(),
+            tuple((child, child.cache_key()) for child in children),
+        )
+
+    def view(self) -> str:
+        """Return the rendered component, rendering it only if it changed."""
+        key = self.cache_key()
+        if key != self._key or self._view is None:
+            self._view = self.render()
+            self._lines = None
+            self._key = key
+        return self._view
+
+    def lines(self) -> List[str]:
+        """Return the rendered component split into lines."""
+        view = self.view()
+        if self._lines is None:
+            self._lines = view.split("\n")
+        return self._lines
+
+
+class Stack(Component):
+    """
+    Components stacked vertically.
+
+    The line list is built from the children's cached line lists, so only
+    children that changed are rendered again and the lines of the others
+    are reused as they are.
+    """
+
+    def __init__(self, *items: Component):
+        super().__init__()
+        self.items: List[Component] = list(items)
+
+    def children(self) -> Sequence[Component]:
+        return self.items
+
+    def render(self) -> str:
+        return "\n".join(self.lines())
+
+    def view(self) -> str:
+        lines = self.lines()
+        if self._view is None:
+            self._view = "\n".join(lines)
+        return self._view
+
+    def lines(self) -> List[str]:
+        key = self.cache_key()
+        if key != self._key or self._lines is None:
+            lines: List[str] = []
+            for item in self.items:
+                lines.extend(item.lines())
+            self._lines = lines
+            self._view = None
+            self._key = key
+        return self._lines
+
+
+class ComponentModel(Model):
+    """
+    A Model whose view is a tree of components.
+
+    Set ``root`` to the top-level component. The program asks it for its
+    lines rather than a single string, so unchanged lines reach the
+    renderer as the same objects as in the previous frame.
+    """
+
+    root: Component
+
+    def view(self) -> str:
+        return self.root.view()
+
+    def view_lines(self) -> List[str]:
+        """Return the view as a list of lines."""
+        return self.root.lines()
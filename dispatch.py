@@ -0,0 +1,204 @@
+"""Message dispatch shared by Program and HeadlessProgram."""
+
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .commands import Cmd, BatchCmd, SequenceCmd, BatchMsg, SequenceMsg, WindowTitleMsg
+from .component import ComponentModel
+from .messages import Msg, QuitMsg, WindowSizeMsg
+from .model import Model
+from .renderer import View
+from .stats import ProgramStats
+
+# Handles a program-level message: returns None to pass it on to the
+# model, True if it was handled, False to quit
+Handler = Callable[[Msg], Optional[bool]]
+
+# Most messages taken from the queue in one event loop iteration
+MAX_DRAIN = 1024
+
+
+class Dispatcher(ABC):
+    """
+    Passes messages to the program or the model.
+
+    Program-level messages (quitting, batches, sequences, resizes, screen
+    control) are handled through a registry of handlers keyed by message
+    type; everything else goes to the model's ``update``, or in runs to
+    its ``update_batch`` if it has one.
+
+    Subclasses decide how commands run (``_execute_cmd``), what screen
+    changes do (``_screen_effects``) and what a resize or title change
+    does besides reaching the model.
+    """
+
+    def __init__(self, model: Model, stats: Optional[ProgramStats] = None):
+        self.model = model
+        self.stats = stats
+
+        # Set when the model may have changed since the last render
+        self._dirty = False
+
+        # Program-level message handlers by type; _dispatch also caches
+        # the handler (or None) resolved for each concrete type seen
+        self._handlers: Dict[type, Handler] = self._default_handlers()
+        self._dispatch: Dict[type, Optional[Handler]] = dict(self._handlers)
+
+    def register_handler(self, msg_type: type, handler: Handler) -> None:
+        """
+        Handle messages of ``msg_type`` (and its subclasses) in the program.
+
+        The handler is called with the message before the model sees it,
+        and returns None to pass the message on to the model, True if it
+        took care of the message, or False to quit. Registering a type
+        again replaces its handler, including the built-in ones.
+
+        Args:
+            msg_type: The message class to handle
+            handler: Called with each message of that type
+        """
+        self._handlers[msg_type] = handler
+        self._dispatch = dict(self._handlers)
+
+    def _default_handlers(self) -> Dict[type, Handler]:
+        """Return the handlers for the program's own messages."""
+        handlers: Dict[type, Handler] = {
+            QuitMsg: lambda msg: False,
+            BatchMsg: self._handle_batch,
+            SequenceMsg: self._handle_sequence,
+            WindowSizeMsg: self._handle_window_size,
+            WindowTitleMsg: self._handle_window_title,
+        }
+        for msg_type, effect in self._screen_effects().items():
+            handlers[msg_type] = self._screen_effect(effect)
+        return handlers
+
+    @abstractmethod
+    def _screen_effects(self) -> Dict[type, Callable[[], None]]:
+        """Return what each screen control message does, by type."""
+        pass
+
+    def _screen_effect(self, effect: Callable[[], None]) -> Handler:
+        """Return a handler that applies a screen change before the next frame."""
+        def handler(msg: Msg) -> bool:
+            effect()
+            self._dirty = True
+            return True
+        return handler
+
+    def _handle_batch(self, msg: BatchMsg) -> bool:
+        self._execute_cmd(BatchCmd(msg.cmds))
+        return True
+
+    def _handle_sequence(self, msg: SequenceMsg) -> bool:
+        self._execute_cmd(SequenceCmd(msg.cmds))
+        return True
+
+    def _handle_window_size(self, msg: WindowSizeMsg) -> None:
+        # The model gets the message too
+        return None
+
+    def _handle_window_title(self, msg: WindowTitleMsg) -> bool:
+        self._dirty = True
+        return True
+
+    def _handle_special(self, msg: Msg) -> Optional[bool]:
+        """
+        Handle messages meant for the program rather than the model.
+
+        Returns:
+            None if the message is for the model, otherwise False if the
+            program should quit and True if not
+        """
+        msg_type = type(msg)
+        try:
+            handler = self._dispatch[msg_type]
+        except KeyError:
+            # Resolve subclasses once through the registered base classes
+            handler = None
+            for base in msg_type.__mro__[1:]:
+                if base in self._handlers:
+                    handler = self._handlers[base]
+                    break
+            self._dispatch[msg_type] = handler
+        if handler is None:
+            return None
+        return handler(msg)
+
+    def _deliver(self, msgs: Iterable[Msg]) -> bool:
+        """
+        Pass messages to the program or the model, in order.
+
+        If the model implements ``update_batch``, runs of consecutive
+        messages for the model are passed to it in one call; otherwise each
+        goes to ``update``.
+
+        Returns:
+            False if the program should quit, True otherwise
+        """
+        update_batch = getattr(type(self.model), "update_batch", Model.update_batch)
+        batching = update_batch is not Model.update_batch
+        pending: List[Msg] = []
+        for msg in msgs:
+            handled = self._handle_special(msg)
+            if handled is None:
+                if batching:
+                    pending.append(msg)
+                else:
+                    self._update(msg)
+                continue
+
+            # Keep the order of messages around special ones
+            if pending:
+                self._update_batch(pending)
+                pending = []
+            if not handled:
+                return False
+
+        if pending:
+            self._update_batch(pending)
+        return True
+
+    def _update(self, msg: Msg) -> None:
+        """Pass a message to the model and run the command it returns."""
+        stats = self.stats
+        if stats is None:
+            self.model, cmd = self.model.update(msg)
+        else:
+            start = time.perf_counter()
+            self.model, cmd = self.model.update(msg)
+            stats.update.record(time.perf_counter() - start)
+
+        if cmd is not None:
+            self._execute_cmd(cmd)
+        self._dirty = True
+
+    def _update_batch(self, msgs: List[Msg]) -> None:
+        """Pass messages to the model's update_batch."""
+        if len(msgs) == 1:
+            self._update(msgs[0])
+            return
+
+        stats = self.stats
+        if stats is None:
+            self.model, cmd = self.model.update_batch(msgs)
+        else:
+            start = time.perf_counter()
+            self.model, cmd = self.model.update_batch(msgs)
+            stats.update.record(time.perf_counter() - start)
+
+        if cmd is not None:
+            self._execute_cmd(cmd)
+        self._dirty = True
+
+    def _view(self) -> View:
+        """Return the model's view, as lines if it is made of components."""
+        if isinstance(self.model, ComponentModel):
+            return self.model.view_lines()
+        return self.model.view()
+
+    @abstractmethod
+    def _execute_cmd(self, cmd: Cmd) -> None:
+        """Run a command, delivering its message later."""
+        pass
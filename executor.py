@@ -0,0 +1,388 @@
+"""Command execution for Bubble Tea."""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, wait as wait_futures
+from dataclasses import dataclass
+from queue import Empty, SimpleQueue
+from threading import Condition, Lock, Semaphore, Thread
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set
+
+
+@dataclass
+class ExecutorStats:
+    """Snapshot of the command executor's load."""
+    queued: int  # Commands waiting for a worker
+    in_flight: int  # Commands currently running
+    io_queued: int = 0  # Blocking I/O commands waiting for a worker
+    io_in_flight: int = 0  # Blocking I/O commands currently running
+
+
+class FairQueue:
+    """
+    A work queue that takes turns between the owners of its items.
+
+    Items are queued per owner and ``get()`` serves the owners round robin,
+    so an owner with a long backlog delays the others by one item per turn
+    rather than by its whole backlog. ``None`` (which stops a worker) is
+    only handed out once no work is left. The interface matches the parts
+    of SimpleQueue a WorkerPool uses.
+    """
+
+    def __init__(self) -> None:
+        self._cond = Condition(Lock())
+        self._queues: Dict[Hashable, Deque[Any]] = {}
+        self._turns: Deque[Hashable] = deque()  # Owners with queued items
+        self._stops = 0
+
+    def put(self, item: Any, owner: Hashable = None) -> None:
+        with self._cond:
+            if item is None:
+                self._stops += 1
+            else:
+                queue = self._queues.get(owner)
+                if queue is None:
+                    queue = self._queues[owner] = deque()
+                    self._turns.append(owner)
+                queue.append(item)
+            self._cond.notify()
+
+    def get(self) -> Any:
+        with self._cond:
+            while True:
+                if self._turns:
+                    return self._take()
+                if self._stops:
+                    self._stops -= 1
+                    return None
+                self._cond.wait()
+
+    def get_nowait(self) -> Any:
+        with self._cond:
+            if not self._turns:
+                raise Empty
+            return self._take()
+
+    def remove(self, owner: Hashable) -> List[Any]:
+        """Remove and return the items queued for ``owner``."""
+        with self._cond:
+            queue = self._queues.pop(owner, None)
+            if queue is None:
+                return []
+            self._turns.remove(owner)
+            return list(queue)
+
+    def depth(self, owner: Hashable) -> int:
+        """Return the number of items queued for ``owner``."""
+        queue = self._queues.get(owner)
+        return len(queue) if queue is not None else 0
+
+    def _take(self) -> Any:
+        owner = self._turns.popleft()
+        queue = self._queues[owner]
+        item = queue.popleft()
+        if queue:
+            self._turns.append(owner)
+        else:
+            del self._queues[owner]
+        return item
+
+
+class WorkerPool(Executor):
+    """
+    A bounded pool of daemon worker threads.
+
+    Behaves like ``concurrent.futures.ThreadPoolExecutor``: workers are
+    started lazily, only when no idle worker is available, up to
+    ``max_workers``. Unlike it, workers are daemon threads so a command that
+    never returns cannot keep the interpreter alive after the program quits.
+
+    A ``fair`` pool queues work per owner (see ``submit_for()``) and takes
+    turns between owners, for pools shared by several programs.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, name: str = "bubbletea-cmd", fair: bool = False
+    ):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
+        self.max_workers = max_workers
+        self._name = name
+        self._work: Any = FairQueue() if fair else SimpleQueue()
+        self.fair = fair
+        self._threads: List[Thread] = []
+        self._idle = Semaphore(0)
+        self._lock = Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._shutdown = False
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted calls waiting for a worker."""
+        return self._queued
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return self._in_flight
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        """Schedule ``fn(*args, **kwargs)`` and return a Future for its result."""
+        return self.submit_for(None, fn, *args, **kwargs)
+
+    def submit_for(
+        self, owner: Hashable, fn: Callable[..., Any], /, *args: Any, **kwargs: Any
+    ) -> Future:
+        """
+        Schedule ``fn(*args, **kwargs)`` on behalf of ``owner``.
+
+        In a fair pool, owners take turns; otherwise the owner is ignored.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new commands after shutdown")
+            self._queued += 1
+            if self.fair:
+                self._work.put((future, fn, args, kwargs), owner)
+            else:
+                self._work.put((future, fn, args, kwargs))
+            self._adjust_thread_count()
+        return future
+
+    def queue_depth_for(self, owner: Hashable) -> int:
+        """Number of calls queued for ``owner``; only tracked by fair pools."""
+        return self._work.depth(owner) if self.fair else 0
+
+    def cancel_for(self, owner: Hashable) -> None:
+        """Cancel the calls queued for ``owner`` in a fair pool."""
+        if not self.fair:
+            return
+        with self._lock:
+            items = self._work.remove(owner)
+            self._queued -= len(items)
+        for future, _, _, _ in items:
+            future.cancel()
+
+    def shutdown(
+        self, wait: bool = True, *, cancel_futures: bool = False, timeout: Optional[float] = None
+    ) -> None:
+        """
+        Stop accepting work and let the workers exit.
+
+        Args:
+            wait: Wait for the workers to finish their current calls
+            cancel_futures: Cancel calls that haven't started yet
+            timeout: Stop waiting after this many seconds; workers still
+                busy are abandoned, which is safe as they are daemons
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._work.get_nowait()
+                    except Empty:
+                        break
+                    if item is not None:
+                        self._queued -= 1
+                        item[0].cancel()
+            for _ in self._threads:
+                self._work.put(None)
+            threads = list(self._threads)
+
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for thread in threads:
+                if deadline is None:
+                    thread.join()
+                else:
+                    thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _adjust_thread_count(self) -> None:
+        # Reuse an idle worker if there is one
+        if self._idle.acquire(blocking=False):
+            return
+
+        if len(self._threads) < self.max_workers:
+            thread = Thread(
+                target=self._worker,
+                name=f"{self._name}-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self) -> None:
+        while True:
+            item = self._work.get()
+            if item is None:
+                return
+
+            future, fn, args, kwargs = item
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+
+            with self._lock:
+                self._in_flight -= 1
+            self._idle.release()
+
+
+class CommandExecutor:
+    """
+    Runs a program's commands on bounded worker pools.
+
+    Commands run on a general pool of at most ``max_workers`` threads.
+    If ``io_workers`` is given, commands marked with ``blocking()`` run on
+    a separate pool of that size so slow I/O cannot starve quick commands;
+    otherwise they share the general pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        io_workers: Optional[int] = None,
+        *,
+        fair: bool = False,
+    ):
+        """
+        Args:
+            max_workers: Size of the general pool
+            io_workers: Size of a separate pool for blocking commands
+            fair: Take turns between the programs sharing the executor
+                (see ``share()``), rather than running commands strictly
+                in the order they were submitted
+        """
+        self.pool = WorkerPool(max_workers, name="bubbletea-cmd", fair=fair)
+        self.io_pool: Optional[WorkerPool] = None
+        if io_workers is not None:
+            self.io_pool = WorkerPool(io_workers, name="bubbletea-io", fair=fair)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of commands waiting for a worker, across all pools."""
+        depth = self.pool.queue_depth
+        if self.io_pool is not None:
+            depth += self.io_pool.queue_depth
+        return depth
+
+    @property
+    def in_flight(self) -> int:
+        """Number of commands currently running, across all pools."""
+        count = self.pool.in_flight
+        if self.io_pool is not None:
+            count += self.io_pool.in_flight
+        return count
+
+    def stats(self) -> ExecutorStats:
+        """Return a snapshot of queue depth and in-flight counts per pool."""
+        stats = ExecutorStats(queued=self.pool.queue_depth, in_flight=self.pool.in_flight)
+        if self.io_pool is not None:
+            stats.io_queued = self.io_pool.queue_depth
+            stats.io_in_flight = self.io_pool.in_flight
+        return stats
+
+    def submit(self, fn: Callable[..., Any], *args: Any, blocking: bool = False) -> Future:
+        """Run ``fn(*args)`` on the I/O pool if ``blocking``, else the general pool."""
+        if blocking and self.io_pool is not None:
+            return self.io_pool.submit(fn, *args)
+        return self.pool.submit(fn, *args)
+
+    def share(self, owner: Hashable) -> "ExecutorShare":
+        """Return a view of this executor for one of the programs sharing it."""
+        return ExecutorShare(self, owner)
+
+    def shutdown(
+        self, wait: bool = False, *, cancel_futures: bool = True, timeout: Optional[float] = None
+    ) -> None:
+        """
+        Shut down all pools, by default dropping commands that haven't started.
+
+        With ``wait``, blocks until running commands finish, or at most
+        ``timeout`` seconds in total.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.pool.shutdown(wait, cancel_futures=cancel_futures, timeout=timeout)
+        if self.io_pool is not None:
+            if deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+            self.io_pool.shutdown(wait, cancel_futures=cancel_futures, timeout=timeout)
+
+
+class ExecutorShare:
+    """
+    One program's share of a CommandExecutor used by several programs.
+
+    It has the interface a Program expects of its executor, but submits on
+    behalf of its owner, so a fair executor takes turns between programs,
+    and shutting it down only drops and waits for the owner's commands,
+    leaving the executor running for the others.
+    """
+
+    def __init__(self, executor: CommandExecutor, owner: Hashable):
+        self.executor = executor
+        self.owner = owner
+        self._lock = Lock()
+        self._futures: Set[Future] = set()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of the owner's commands waiting for a worker."""
+        executor = self.executor
+        depth = executor.pool.queue_depth_for(self.owner)
+        if executor.io_pool is not None:
+            depth += executor.io_pool.queue_depth_for(self.owner)
+        return depth
+
+    @property
+    def in_flight(self) -> int:
+        """Number of the owner's commands currently running."""
+        return max(0, len(self._futures) - self.queue_depth)
+
+    def stats(self) -> ExecutorStats:
+        """Return a snapshot of the whole executor's load."""
+        return self.executor.stats()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, blocking: bool = False) -> Future:
+        """Run ``fn(*args)`` for the owner, as ``CommandExecutor.submit()`` does."""
+        executor = self.executor
+        pool = executor.io_pool if blocking and executor.io_pool is not None else executor.pool
+        future = pool.submit_for(self.owner, fn, *args)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def shutdown(
+        self, wait: bool = False, *, cancel_futures: bool = True, timeout: Optional[float] = None
+    ) -> None:
+        """
+        Drop the owner's queued commands and optionally wait for its
+        running ones, for at most ``timeout`` seconds.
+        """
+        if cancel_futures:
+            self.executor.pool.cancel_for(self.owner)
+            if self.executor.io_pool is not None:
+                self.executor.io_pool.cancel_for(self.owner)
+        if wait:
+            with self._lock:
+                futures = list(self._futures)
+            wait_futures(futures, timeout)
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
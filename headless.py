@@ -0,0 +1,410 @@
+"""Headless, deterministic driver for Bubble Tea models."""
+
+import asyncio
+import inspect
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, TextIO, Union
+
+from .cancel import CancelToken, _current_token
+from .commands import (
+    Cmd, TickCmd, CancellableCmd, BatchCmd, SequenceCmd, WindowTitleMsg, ClearScreenMsg,
+)
+from .dispatch import Dispatcher, MAX_DRAIN
+from .messages import Msg, WindowSizeMsg, key_msg
+from .model import Model
+from .renderer import Renderer
+from .screen import (
+    EnterAltScreenMsg, ExitAltScreenMsg,
+    EnableMouseCellMotionMsg, EnableMouseAllMotionMsg, DisableMouseMsg,
+    ShowCursorMsg, HideCursorMsg,
+)
+from .stats import ProgramStats
+from .timers import TimerScheduler
+from .tokenizer import InputTokenizer
+
+
+class VirtualClock:
+    """
+    A clock that only moves when it is told to.
+
+    ``monotonic()`` and ``time()`` stand in for ``time.monotonic`` and
+    ``time.time``; both advance together.
+    """
+
+    def __init__(self, start: float = 0.0, epoch: float = 0.0):
+        """
+        Args:
+            start: Initial reading of the monotonic clock
+            epoch: Wall-clock time at ``start``, which aligned timers
+                (``every()``) are aligned to
+        """
+        self.now = start
+        self._offset = epoch - start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now + self._offset
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward."""
+        if seconds < 0:
+            raise ValueError("cannot move the clock backwards")
+        self.now += seconds
+
+
+class HeadlessProgram(Dispatcher):
+    """
+    Runs a model without a terminal, threads or real time.
+
+    Messages go through the same Dispatcher as in a Program, so handlers,
+    batches, sequences and ``update_batch`` behave the same; only where
+    commands run, what the clock reads and where frames go differ. The
+    driver calls ``init``, ``update`` and ``view`` on the calling
+    thread. Commands run synchronously as soon as they are returned, and
+    their messages are queued. Ticks are timers on a virtual clock that
+    jumps straight to the next deadline once the queue is empty, so
+    ``tick(60, ...)`` fires immediately in real time, in the same order it
+    would in a real program.
+
+    Input is scripted with ``send()``, ``press()``, ``feed()`` (raw
+    terminal bytes, parsed like real input) and ``resize()``, or with
+    ``at()`` to deliver it at a virtual time. The view is rendered after
+    every ``batch_size`` messages and at the end of each run. The last
+    ``max_frames`` views are kept in ``frames``, and ``stats`` records
+    update, view and command timings when given.
+
+    Unlike a Program, exceptions raised by commands are not swallowed, so
+    a failing command fails the test that ran it.
+
+    Example:
+        driver = HeadlessProgram(MyModel())
+        driver.press("down", "down", "enter")
+        driver.run()
+        assert "Selected" in driver.frame
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        *,
+        width: int = 80,
+        height: int = 24,
+        clock: Optional[VirtualClock] = None,
+        stats: Optional[ProgramStats] = None,
+        output: Optional[TextIO] = None,
+        max_frames: int = 1,
+        batch_size: int = MAX_DRAIN,
+    ):
+        """
+        Args:
+            model: The initial model
+            width: Terminal width reported by the renderer
+            height: Terminal height reported by the renderer
+            clock: Virtual clock to run timers on
+            stats: Record update, view, render and command timings here
+            output: Also render frames through a Renderer into this file,
+                to measure or check the bytes a terminal would receive
+            max_frames: Number of most recent views to keep in ``frames``
+            batch_size: Messages handled between renders
+        """
+        self.width = width
+        self.height = height
+        self.clock = clock or VirtualClock()
+        self.batch_size = batch_size
+        self.timers = TimerScheduler(
+            clock=self.clock.monotonic, wall_clock=self.clock.time, catch_errors=False
+        )
+
+        self.frames: Deque[str] = deque(maxlen=max_frames)
+        self.frame_count = 0
+        self.messages = 0  # Messages passed to the model
+        self.elapsed = 0.0  # Real seconds spent running
+        self.quit = False
+
+        # Terminal state requested through commands
+        self.title = ""
+        self.alt_screen = False
+        self.mouse = False
+        self.cursor_hidden = False
+
+        self._queue: Deque[Msg] = deque()
+        self._tokenizer = InputTokenizer()
+        self._cancel = CancelToken()
+        self._started = False
+
+        self._renderer: Optional[Renderer] = None
+        if output is not None:
+            self._renderer = Renderer(output)
+            self._renderer.resize(width, height)
+
+        super().__init__(model, stats)
+
+    @property
+    def frame(self) -> str:
+        """The most recently rendered view."""
+        return self.frames[-1] if self.frames else ""
+
+    @property
+    def throughput(self) -> float:
+        """Messages handled per real second so far."""
+        return self.messages / self.elapsed if self.elapsed else 0.0
+
+    # Scripted input
+
+    def send(self, *msgs: Msg) -> None:
+        """Queue messages for the model."""
+        self._queue.extend(msgs)
+
+    def send_many(self, msgs: Iterable[Msg]) -> None:
+        """Queue any number of messages for the model."""
+        self._queue.extend(msgs)
+
+    def press(self, *keys: str) -> None:
+        """Queue key presses by name, e.g. ``press("a", "ctrl+c", "enter")``."""
+        self._queue.extend(key_msg(key) for key in keys)
+
+    def feed(self, data: Union[bytes, str]) -> None:
+        """Queue the messages for raw terminal input, parsed like real input."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._queue.extend(self._tokenizer.feed(data))
+        self._queue.extend(self._tokenizer.flush())
+
+    def resize(self, width: int, height: int) -> None:
+        """Queue a window resize."""
+        self._queue.append(WindowSizeMsg(width, height))
+
+    def at(self, when: float, *msgs: Msg) -> TickCmd:
+        """
+        Deliver messages at a virtual time.
+
+        Args:
+            when: Virtual time (as read from ``clock.monotonic()``)
+            msgs: Messages to deliver
+
+        Returns:
+            The timer, which can be cancelled
+        """
+        def deliver() -> None:
+            self._queue.extend(msgs)
+
+        timer = TickCmd(max(0.0, when - self.clock.now), deliver)  # type: ignore
+        self.timers.schedule(timer)
+        return timer
+
+    # Running
+
+    def run(self, duration: Optional[float] = None) -> Model:
+        """
+        Run until the model quits or there is nothing left to do.
+
+        There is nothing left to do once no messages are queued and no
+        timers are pending. A repeating timer is always pending, so with
+        ``every()`` pass a duration or have the model quit.
+
+        Args:
+            duration: Stop after this many seconds of virtual time; timers
+                due later stay pending for the next run
+
+        Returns:
+            The model
+        """
+        until = None if duration is None else self.clock.now + duration
+        start = time.perf_counter()
+        try:
+            if not self._started:
+                self._start()
+            while not self.quit:
+                if self._queue:
+                    self._drain()
+                    continue
+                deadline = self.timers.next_deadline()
+                if deadline is None or (until is not None and deadline > until):
+                    break
+                if deadline > self.clock.now:
+                    self.clock.now = deadline
+                self._queue.extend(self.timers.pop_due())
+            if until is not None and not self.quit and until > self.clock.now:
+                self.clock.now = until
+            if self._dirty:
+                self._render()
+        finally:
+            self.elapsed += time.perf_counter() - start
+        return self.model
+
+    def advance(self, seconds: float) -> Model:
+        """Run for ``seconds`` of virtual time."""
+        return self.run(seconds)
+
+    def close(self) -> None:
+        """Cancel running commands and drop pending timers."""
+        self._cancel.cancel()
+        self.timers.clear()
+        self._queue.clear()
+
+    def _start(self) -> None:
+        self._started = True
+        cmd = self.model.init()
+        if cmd is not None:
+            self._execute_cmd(cmd)
+        self._render()
+
+    def _drain(self) -> None:
+        """Handle up to ``batch_size`` queued messages, then render."""
+        queue = self._queue
+        msgs = [queue.popleft() for _ in range(min(len(queue), self.batch_size))]
+        if not self._deliver(msgs):
+            self.quit = True
+            self.close()
+        if self._dirty:
+            self._render()
+
+    def _update(self, msg: Msg) -> None:
+        self.messages += 1
+        super()._update(msg)
+
+    def _update_batch(self, msgs: List[Msg]) -> None:
+        if len(msgs) > 1:
+            self.messages += len(msgs)
+        super()._update_batch(msgs)
+
+    def _render(self) -> None:
+        stats = self.stats
+        start = time.perf_counter()
+        view = self._view()
+        rendered = time.perf_counter()
+        if stats is not None:
+            stats.view.record(rendered - start)
+        if self._renderer is not None:
+            written = self._renderer.render(view)
+            if stats is not None:
+                stats.render.record(time.perf_counter() - rendered)
+                if written:
+                    stats.frame_bytes.record(written)
+                    stats.bytes_written += written
+        self.frames.append(view if isinstance(view, str) else "\n".join(view))
+        self.frame_count += 1
+        self._dirty = False
+
+    # Program-level messages
+
+    def _screen_effects(self) -> Dict[type, Callable[[], None]]:
+        """Screen changes only update the terminal state the driver reports."""
+        return {
+            EnterAltScreenMsg: lambda: setattr(self, "alt_screen", True),
+            ExitAltScreenMsg: lambda: setattr(self, "alt_screen", False),
+            EnableMouseCellMotionMsg: lambda: setattr(self, "mouse", True),
+            EnableMouseAllMotionMsg: lambda: setattr(self, "mouse", True),
+            DisableMouseMsg: lambda: setattr(self, "mouse", False),
+            ShowCursorMsg: lambda: setattr(self, "cursor_hidden", False),
+            HideCursorMsg: lambda: setattr(self, "cursor_hidden", True),
+            ClearScreenMsg: lambda: None,
+        }
+
+    def _handle_window_size(self, msg: WindowSizeMsg) -> None:
+        # The model gets the message too
+        self.width, self.height = msg.width, msg.height
+        if self._renderer is not None:
+            self._renderer.resize(msg.width, msg.height)
+        return None
+
+    def _handle_window_title(self, msg: WindowTitleMsg) -> bool:
+        self.title = msg.title
+        return super()._handle_window_title(msg)
+
+    # Commands
+
+    def _execute_cmd(self, cmd: Cmd) -> None:
+        """Run a command now, queueing its message."""
+        kind = type(cmd)
+        if kind is BatchCmd:
+            for c in cmd.cmds:  # type: ignore
+                self._execute_cmd(c)
+        elif kind is SequenceCmd:
+            self._run_sequence(deque(cmd.cmds))  # type: ignore
+        elif kind is TickCmd:
+            self.timers.schedule(cmd)  # type: ignore
+        else:
+            msg = self._run_cmd(cmd)
+            if msg is not None:
+                self._queue.append(msg)
+
+    def _run_sequence(
+        self, steps: Deque[Cmd], on_done: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Run the steps of a sequence in order, as Program does on a worker.
+
+        A tick pauses the sequence: the remaining steps run when it fires.
+        A batch runs its commands together, and the sequence goes on once
+        all of them, ticks included, have finished.
+
+        Args:
+            steps: The steps left to run
+            on_done: Called once the last step has finished
+        """
+        while steps and not self._cancel.cancelled:
+            step = steps.popleft()
+            kind = type(step)
+            if kind is SequenceCmd:
+                steps.extendleft(reversed(step.cmds))  # type: ignore
+            elif kind is BatchCmd:
+                cmds = step.cmds  # type: ignore
+                remaining = [len(cmds)]
+
+                def finished() -> None:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        self._run_sequence(steps, on_done)
+
+                for cmd in cmds:
+                    self._run_sequence(deque((cmd,)), finished)
+                return
+            elif kind is TickCmd:
+                tick: TickCmd = step  # type: ignore
+
+                def resume() -> None:
+                    if not tick.cancelled:
+                        msg = tick.fn()
+                        if msg is not None:
+                            self._queue.append(msg)
+                    self._run_sequence(steps, on_done)
+
+                self.timers.schedule(TickCmd(tick.duration, resume, align=tick.align))  # type: ignore
+                return
+            else:
+                self._execute_cmd(step)
+        if on_done is not None and not self._cancel.cancelled:
+            on_done()
+
+    def _run_cmd(self, cmd: Cmd) -> Optional[Msg]:
+        """Call a command under its cancellation token and return its message."""
+        if isinstance(cmd, CancellableCmd):
+            if cmd.cancelled:
+                return None
+            token = cmd.token
+        else:
+            # Its own token, so callbacks it registers go away with it
+            token = CancelToken()
+        if self._cancel.cancelled:
+            return None
+
+        self._cancel.add_callback(token.cancel)
+        reset = _current_token.set(token)
+        try:
+            stats = self.stats
+            start = time.perf_counter()
+            result: Any = cmd()
+            if inspect.iscoroutine(result):
+                result = asyncio.run(result)
+            if stats is not None:
+                stats.command.record(time.perf_counter() - start)
+        finally:
+            _current_token.reset(reset)
+            self._cancel.remove_callback(token.cancel)
+        if token.cancelled:
+            return None
+        return result
@@ -1,7 +1,7 @@
 """Key handling for Bubble Tea."""
 
 from enum import Enum, auto
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 
 class KeyType(Enum):
@@ -73,44 +73,187 @@ class KeyType(Enum):
     RUNE = auto()  # Regular character
 
 
-# Mapping of escape sequences to key names
+# Mapping of escape sequences to key names, ported from the Go sequences
+# table. Lookups go through a byte-level trie built from this table (see
+# lookup_sequence), so its size doesn't affect parsing speed.
 ESCAPE_SEQUENCES = {
     # Arrow keys
     "\x1b[A": "up",
-    "\x1b[B": "down", 
+    "\x1b[B": "down",
     "\x1b[C": "right",
     "\x1b[D": "left",
+    "\x1b[1;2A": "shift+up",
+    "\x1b[1;2B": "shift+down",
+    "\x1b[1;2C": "shift+right",
+    "\x1b[1;2D": "shift+left",
+    "\x1b[OA": "shift+up",      # DECCKM
+    "\x1b[OB": "shift+down",    # DECCKM
+    "\x1b[OC": "shift+right",   # DECCKM
+    "\x1b[OD": "shift+left",    # DECCKM
+    "\x1b[a": "shift+up",       # urxvt
+    "\x1b[b": "shift+down",     # urxvt
+    "\x1b[c": "shift+right",    # urxvt
+    "\x1b[d": "shift+left",     # urxvt
+    "\x1b[1;3A": "alt+up",
+    "\x1b[1;3B": "alt+down",
+    "\x1b[1;3C": "alt+right",
+    "\x1b[1;3D": "alt+left",
+
+    "\x1b[1;4A": "alt+shift+up",
+    "\x1b[1;4B": "alt+shift+down",
+    "\x1b[1;4C": "alt+shift+right",
+    "\x1b[1;4D": "alt+shift+left",
+
+    "\x1b[1;5A": "ctrl+up",
+    "\x1b[1;5B": "ctrl+down",
+    "\x1b[1;5C": "ctrl+right",
+    "\x1b[1;5D": "ctrl+left",
+    "\x1b[Oa": "alt+ctrl+up",   # urxvt
+    "\x1b[Ob": "alt+ctrl+down",  # urxvt
+    "\x1b[Oc": "alt+ctrl+right",  # urxvt
+    "\x1b[Od": "alt+ctrl+left",  # urxvt
+    "\x1b[1;6A": "ctrl+shift+up",
+    "\x1b[1;6B": "ctrl+shift+down",
+    "\x1b[1;6C": "ctrl+shift+right",
+    "\x1b[1;6D": "ctrl+shift+left",
+    "\x1b[1;7A": "alt+ctrl+up",
+    "\x1b[1;7B": "alt+ctrl+down",
+    "\x1b[1;7C": "alt+ctrl+right",
+    "\x1b[1;7D": "alt+ctrl+left",
+    "\x1b[1;8A": "alt+ctrl+shift+up",
+    "\x1b[1;8B": "alt+ctrl+shift+down",
+    "\x1b[1;8C": "alt+ctrl+shift+right",
+    "\x1b[1;8D": "alt+ctrl+shift+left",
+
+    # Miscellaneous keys
+    "\x1b[Z": "shift+tab",
+
+    "\x1b[2~": "insert",
+    "\x1b[3;2~": "alt+insert",
+
+    "\x1b[3~": "delete",
+    "\x1b[3;3~": "alt+delete",
+
+    "\x1b[5~": "pgup",
+    "\x1b[5;3~": "alt+pgup",
+    "\x1b[5;5~": "ctrl+pgup",
+    "\x1b[5^": "ctrl+pgup",     # urxvt
+    "\x1b[5;7~": "alt+ctrl+pgup",
+
+    "\x1b[6~": "pgdown",
+    "\x1b[6;3~": "alt+pgdown",
+    "\x1b[6;5~": "ctrl+pgdown",
+    "\x1b[6^": "ctrl+pgdown",   # urxvt
+    "\x1b[6;7~": "alt+ctrl+pgdown",
+
+    "\x1b[1~": "home",
+    "\x1b[H": "home",           # xterm, lxterm
+    "\x1b[1;3H": "alt+home",    # xterm, lxterm
+    "\x1b[1;5H": "ctrl+home",   # xterm, lxterm
+    "\x1b[1;7H": "alt+ctrl+home",  # xterm, lxterm
+    "\x1b[1;2H": "shift+home",  # xterm, lxterm
+    "\x1b[1;4H": "alt+shift+home",  # xterm, lxterm
+    "\x1b[1;6H": "ctrl+shift+home",  # xterm, lxterm
+    "\x1b[1;8H": "alt+ctrl+shift+home",  # xterm, lxterm
+
+    "\x1b[4~": "end",
+    "\x1b[F": "end",            # xterm, lxterm
+    "\x1b[1;3F": "alt+end",     # xterm, lxterm
+    "\x1b[1;5F": "ctrl+end",    # xterm, lxterm
+    "\x1b[1;7F": "alt+ctrl+end",  # xterm, lxterm
+    "\x1b[1;2F": "shift+end",   # xterm, lxterm
+    "\x1b[1;4F": "alt+shift+end",  # xterm, lxterm
+    "\x1b[1;6F": "ctrl+shift+end",  # xterm, lxterm
+    "\x1b[1;8F": "alt+ctrl+shift+end",  # xterm, lxterm
+
+    "\x1b[7~": "home",          # urxvt
+    "\x1b[7^": "ctrl+home",     # urxvt
+    "\x1b[7$": "shift+home",    # urxvt
+    "\x1b[7@": "ctrl+shift+home",  # urxvt
+
+    "\x1b[8~": "end",           # urxvt
+    "\x1b[8^": "ctrl+end",      # urxvt
+    "\x1b[8$": "shift+end",     # urxvt
+    "\x1b[8@": "ctrl+shift+end",  # urxvt
+
+    # Function keys, Linux console
+    "\x1b[[A": "f1",            # linux console
+    "\x1b[[B": "f2",            # linux console
+    "\x1b[[C": "f3",            # linux console
+    "\x1b[[D": "f4",            # linux console
+    "\x1b[[E": "f5",            # linux console
+
+    # Function keys, X11
+    "\x1bOP": "f1",             # vt100, xterm
+    "\x1bOQ": "f2",             # vt100, xterm
+    "\x1bOR": "f3",             # vt100, xterm
+    "\x1bOS": "f4",             # vt100, xterm
+
+    "\x1b[1;3P": "alt+f1",      # vt100, xterm
+    "\x1b[1;3Q": "alt+f2",      # vt100, xterm
+    "\x1b[1;3R": "alt+f3",      # vt100, xterm
+    "\x1b[1;3S": "alt+f4",      # vt100, xterm
+
+    "\x1b[11~": "f1",           # urxvt
+    "\x1b[12~": "f2",           # urxvt
+    "\x1b[13~": "f3",           # urxvt
+    "\x1b[14~": "f4",           # urxvt
+
+    "\x1b[15~": "f5",           # vt100, xterm, also urxvt
+
+    "\x1b[15;3~": "alt+f5",     # vt100, xterm, also urxvt
+
+    "\x1b[17~": "f6",           # vt100, xterm, also urxvt
+    "\x1b[18~": "f7",           # vt100, xterm, also urxvt
+    "\x1b[19~": "f8",           # vt100, xterm, also urxvt
+    "\x1b[20~": "f9",           # vt100, xterm, also urxvt
+    "\x1b[21~": "f10",          # vt100, xterm, also urxvt
+
+    "\x1b[17;3~": "alt+f6",     # vt100, xterm
+    "\x1b[18;3~": "alt+f7",     # vt100, xterm
+    "\x1b[19;3~": "alt+f8",     # vt100, xterm
+    "\x1b[20;3~": "alt+f9",     # vt100, xterm
+    "\x1b[21;3~": "alt+f10",    # vt100, xterm
+
+    "\x1b[23~": "f11",          # vt100, xterm, also urxvt
+    "\x1b[24~": "f12",          # vt100, xterm, also urxvt
+
+    "\x1b[23;3~": "alt+f11",    # vt100, xterm
+    "\x1b[24;3~": "alt+f12",    # vt100, xterm
+
+    "\x1b[1;2P": "f13",
+    "\x1b[1;2Q": "f14",
+
+    "\x1b[25~": "f13",          # vt100, xterm, also urxvt
+    "\x1b[26~": "f14",          # vt100, xterm, also urxvt
+
+    "\x1b[25;3~": "alt+f13",    # vt100, xterm
+    "\x1b[26;3~": "alt+f14",    # vt100, xterm
+
+    "\x1b[1;2R": "f15",
+    "\x1b[1;2S": "f16",
+
+    "\x1b[28~": "f15",          # vt100, xterm, also urxvt
+    "\x1b[29~": "f16",          # vt100, xterm, also urxvt
+
+    "\x1b[28;3~": "alt+f15",    # vt100, xterm
+    "\x1b[29;3~": "alt+f16",    # vt100, xterm
+
+    "\x1b[15;2~": "f17",
+    "\x1b[17;2~": "f18",
+    "\x1b[18;2~": "f19",
+    "\x1b[19;2~": "f20",
+
+    "\x1b[31~": "f17",
+    "\x1b[32~": "f18",
+    "\x1b[33~": "f19",
+    "\x1b[34~": "f20",
+
+    # Application cursor mode, also Powershell
     "\x1bOA": "up",
     "\x1bOB": "down",
     "\x1bOC": "right",
     "\x1bOD": "left",
-    
-    # Navigation
-    "\x1b[H": "home",
-    "\x1b[F": "end",
-    "\x1b[1~": "home",
-    "\x1b[4~": "end",
-    "\x1b[5~": "pgup",
-    "\x1b[6~": "pgdown",
-    "\x1b[2~": "insert",
-    "\x1b[3~": "delete",
-    
-    # Function keys
-    "\x1bOP": "f1",
-    "\x1bOQ": "f2",
-    "\x1bOR": "f3",
-    "\x1bOS": "f4",
-    "\x1b[15~": "f5",
-    "\x1b[17~": "f6",
-    "\x1b[18~": "f7",
-    "\x1b[19~": "f8",
-    "\x1b[20~": "f9",
-    "\x1b[21~": "f10",
-    "\x1b[23~": "f11",
-    "\x1b[24~": "f12",
-    
-    # Special
-    "\x1b[Z": "shift+tab",
 }
 
 # Control character mappings
@@ -151,6 +294,137 @@ CTRL_KEYS = {
 }
 
 
+# Marks the key name stored in a trie node
+_LEAF = -1
+
+
+def _build_sequence_trie() -> Dict[int, Any]:
+    """
+    Build a byte-level trie of all known escape sequences.
+    
+    Like the Go extended sequence table, every sequence also gets an
+    alt-prefixed variant (an extra leading ESC), and ESC followed by a
+    control character other than ESC maps to alt + that control key.
+    """
+    sequences: Dict[bytes, str] = {}
+    for seq, name in ESCAPE_SEQUENCES.items():
+        sequences[seq.encode()] = name
+    for seq, name in list(sequences.items()):
+        if not name.startswith("alt+"):
+            sequences.setdefault(b"\x1b" + seq, f"alt+{name}")
+    for code, name in CTRL_KEYS.items():
+        # ESC ESC is the escape key followed by whatever comes next, which
+        # may be a sequence of its own
+        if code != 0 and code != 0x1B:
+            sequences.setdefault(bytes([0x1B, code]), f"alt+{name}")
+    
+    trie: Dict[int, Any] = {}
+    for seq, name in sequences.items():
+        node = trie
+        for byte in seq:
+            node = node.setdefault(byte, {})
+        node[_LEAF] = name
+    return trie
+
+
+_SEQUENCE_TRIE = _build_sequence_trie()
+
+
+def _match_sequence(data: bytes, start: int, end: int) -> Tuple[Optional[str], int, bool]:
+    """
+    Find the longest known escape sequence at ``data[start:end]``.
+    
+    Returns:
+        The key name (or None), the number of bytes it spans, and whether
+        the input ran out while a longer sequence was still possible
+    """
+    node = _SEQUENCE_TRIE
+    key: Optional[str] = None
+    consumed = 0
+    i = start
+    while i < end:
+        node = node.get(data[i])
+        if node is None:
+            return key, consumed, False
+        i += 1
+        name = node.get(_LEAF)
+        if name is not None:
+            key = name
+            consumed = i - start
+    # Input exhausted; a longer match is possible if this node has children
+    return key, consumed, len(node) > (1 if _LEAF in node else 0)
+
+
+def lookup_sequence(data: bytes, start: int = 0) -> Tuple[Optional[str], int]:
+    """
+    Look up the escape sequence at the start of ``data``.
+    
+    The lookup walks a precompiled trie, so it costs O(length of the
+    sequence) regardless of how many sequences are known.
+    
+    Returns:
+        The key name and the number of bytes consumed, or (None, 0) if no
+        known sequence matches
+    """
+    key, consumed, _ = _match_sequence(data, start, len(data))
+    return key, consumed
+
+
+# Kitty keyboard protocol codes for keys that aren't printable
+_KITTY_KEYS = {
+    9: "tab",
+    13: "enter",
+    27: "escape",
+    32: " ",
+    127: "backspace",
+}
+
+
+def parse_kitty_key(data: bytes) -> Optional[str]:
+    """
+    Parse a kitty keyboard protocol key: ESC [ code[:alternates] [; mods[:event]] u
+    
+    Returns the key name with modifiers (e.g. "ctrl+a", "alt+shift+enter"),
+    or None for key release events and sequences that aren't kitty keys.
+    """
+    if not data.startswith(b"\x1b[") or not data.endswith(b"u"):
+        return None
+    
+    try:
+        fields = data[2:-1].decode("ascii").split(";")
+        code = int(fields[0].split(":")[0])
+        mods = 1
+        event = 1
+        if len(fields) > 1 and fields[1]:
+            mod_field = fields[1].split(":")
+            mods = int(mod_field[0])
+            if len(mod_field) > 1:
+                event = int(mod_field[1])
+    except (UnicodeDecodeError, ValueError):
+        return None
+    
+    # Only report presses and repeats
+    if event == 3:
+        return None
+    
+    if code in _KITTY_KEYS:
+        name = _KITTY_KEYS[code]
+    elif 0 <= code <= 0x10FFFF and chr(code).isprintable():
+        name = chr(code)
+    else:
+        return None
+    
+    mods -= 1
+    prefix = ""
+    if mods & 2:
+        prefix += "alt+"
+    if mods & 4:
+        prefix += "ctrl+"
+    if mods & 1:
+        prefix += "shift+"
+    return prefix + name
+
+
 class Key:
     """Represents a key press."""
     
@@ -175,25 +449,31 @@ def parse_key(data: bytes) -> Optional[str]:
     if not data:
         return None
     
-    text = data.decode('utf-8', errors='ignore')
-    
     # Check for escape sequences first
-    if text.startswith('\x1b'):
-        # Check for alt+key (escape followed by single char)
-        if len(text) == 2 and text[1].isprintable():
-            return f"alt+{text[1]}"
+    if data[0] == 0x1B:
+        # Just escape
+        if len(data) == 1:
+            return "escape"
         
         # Check known escape sequences
-        for seq, name in ESCAPE_SEQUENCES.items():
-            if text.startswith(seq):
-                return name
+        key, _ = lookup_sequence(data)
+        if key is not None:
+            return key
         
-        # Just escape
-        if len(text) == 1:
-            return "escape"
+        # Kitty keyboard protocol
+        key = parse_kitty_key(data)
+        if key is not None:
+            return key
+        
+        # Check for alt+key (escape followed by single char)
+        text = data.decode('utf-8', errors='ignore')
+        if len(text) == 2 and text[1].isprintable():
+            return f"alt+{text[1]}"
         
         return None
     
+    text = data.decode('utf-8', errors='ignore')
+    
     # Check for control characters
     if len(text) == 1:
         code = ord(text)
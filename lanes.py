@@ -0,0 +1,227 @@
+"""Prioritized message queue for Bubble Tea."""
+
+import threading
+from collections import deque
+from itertools import count
+from queue import Empty
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .coalescer import PendingMotion
+from .commands import BatchMsg, SequenceMsg, WindowTitleMsg, ClearScreenMsg
+from .messages import (
+    Msg, KeyMsg, MouseMsg, PasteMsg, WindowSizeMsg, QuitMsg, FocusMsg, BlurMsg,
+)
+from .screen import (
+    EnterAltScreenMsg, ExitAltScreenMsg,
+    EnableMouseCellMotionMsg, EnableMouseAllMotionMsg, DisableMouseMsg,
+    ShowCursorMsg, HideCursorMsg,
+)
+
+
+# Lanes, highest priority first
+LANE_INPUT = 0  # Keys, mouse, focus
+LANE_RESIZE = 1  # Window size changes
+LANE_CONTROL = 2  # Quitting, screen control, batches and sequences
+LANE_BACKGROUND = 3  # Everything else: command results, send()
+LANES = 4
+
+# Lanes whose messages come from commands, taken in the order they were
+# queued across both; the control lane only differs in not being bounded
+_ORDERED = (LANE_CONTROL, LANE_BACKGROUND)
+
+# What to do when the background lane is full
+BLOCK = "block"  # Make the producer wait for room
+DROP_OLDEST = "drop_oldest"  # Discard the oldest background message
+
+_DEFAULT_LANES: Dict[type, int] = {
+    KeyMsg: LANE_INPUT,
+    MouseMsg: LANE_INPUT,
+    PasteMsg: LANE_INPUT,
+    PendingMotion: LANE_INPUT,
+    FocusMsg: LANE_INPUT,
+    BlurMsg: LANE_INPUT,
+    WindowSizeMsg: LANE_RESIZE,
+    QuitMsg: LANE_CONTROL,
+    BatchMsg: LANE_CONTROL,
+    SequenceMsg: LANE_CONTROL,
+    WindowTitleMsg: LANE_CONTROL,
+    ClearScreenMsg: LANE_CONTROL,
+    EnterAltScreenMsg: LANE_CONTROL,
+    ExitAltScreenMsg: LANE_CONTROL,
+    EnableMouseCellMotionMsg: LANE_CONTROL,
+    EnableMouseAllMotionMsg: LANE_CONTROL,
+    DisableMouseMsg: LANE_CONTROL,
+    ShowCursorMsg: LANE_CONTROL,
+    HideCursorMsg: LANE_CONTROL,
+}
+
+
+class Mailbox:
+    """
+    The event loop's message queue, split into priority lanes.
+
+    Input and resizes are taken ahead of everything else, so a keypress
+    or ctrl+c is handled next even when thousands of command results are
+    waiting. Control and background messages, which commands produce, are
+    taken in the order they were queued, across both lanes: a command's
+    result is always handled before a quit that a sequence runs after it.
+    Within a lane messages stay in order. Messages are assigned a lane by
+    type (see ``set_lane``), anything unknown goes to the background lane.
+
+    The background lane can be bounded. When it is full, producers either
+    block until the event loop catches up (``BLOCK``) or the oldest
+    background message is dropped (``DROP_OLDEST``). Control messages are
+    never bounded or dropped. The thread that consumes the mailbox is
+    never blocked; it drops the oldest message instead, as waiting on
+    itself would deadlock.
+    """
+
+    def __init__(self, background_limit: Optional[int] = None, overflow: str = BLOCK):
+        """
+        Args:
+            background_limit: Maximum number of queued background
+                messages, or None for no limit
+            overflow: BLOCK or DROP_OLDEST, what to do when the background
+                lane is full
+        """
+        if overflow not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"unknown overflow policy: {overflow!r}")
+        if background_limit is not None and background_limit <= 0:
+            raise ValueError("background_limit must be greater than 0")
+
+        self.background_limit = background_limit
+        self.overflow = overflow
+        self.dropped = 0  # Background messages discarded because the lane was full
+        # The ordered lanes hold (sequence number, message) pairs
+        self._lanes: List[Deque[Any]] = [deque() for _ in range(LANES)]
+        self._seq = count()
+        self._routes = dict(_DEFAULT_LANES)
+        self._cache = dict(_DEFAULT_LANES)  # Lanes resolved per concrete type
+        self._size = 0
+        self._closed = False
+        self._consumer: Optional[int] = None
+
+        # Threads waiting on each condition, so notify is skipped when
+        # nobody waits
+        self._getters = 0
+        self._putters = 0
+        lock = threading.Lock()
+        self._not_empty = threading.Condition(lock)
+        self._not_full = threading.Condition(lock)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def set_lane(self, msg_type: type, lane: int) -> None:
+        """Route messages of ``msg_type`` (and its subclasses) to ``lane``."""
+        if not 0 <= lane < LANES:
+            raise ValueError(f"no such lane: {lane}")
+        self._routes[msg_type] = lane
+        self._cache = dict(self._routes)
+
+    def lane(self, msg: Msg) -> int:
+        """Return the lane a message goes to."""
+        msg_type = type(msg)
+        lane = self._cache.get(msg_type)
+        if lane is None:
+            lane = LANE_BACKGROUND
+            for base in msg_type.__mro__[1:]:
+                if base in self._routes:
+                    lane = self._routes[base]
+                    break
+            self._cache[msg_type] = lane
+        return lane
+
+    def set_consumer(self) -> None:
+        """Record the calling thread as the one that takes messages."""
+        self._consumer = threading.get_ident()
+
+    def put(self, msg: Msg, lane: Optional[int] = None) -> None:
+        """Queue a message, in its own lane unless one is given."""
+        if lane is None:
+            lane = self.lane(msg)
+        with self._not_empty:
+            self._append(msg, lane)
+            if self._getters:
+                self._not_empty.notify()
+
+    def put_many(self, msgs: Sequence[Tuple[Msg, int]]) -> None:
+        """
+        Queue several messages at once, each with its lane.
+
+        Apart from waiting for room in a bounded background lane, no other
+        thread's messages end up in between them.
+        """
+        with self._not_empty:
+            for msg, lane in msgs:
+                self._append(msg, lane)
+            if self._getters:
+                self._not_empty.notify()
+
+    def _append(self, msg: Msg, lane: int) -> None:
+        if self._closed:
+            return
+        if lane == LANE_BACKGROUND and self.background_limit is not None:
+            queue = self._lanes[LANE_BACKGROUND]
+            if len(queue) >= self.background_limit:
+                if self.overflow == BLOCK and threading.get_ident() != self._consumer:
+                    self._putters += 1
+                    try:
+                        while len(queue) >= self.background_limit and not self._closed:
+                            self._not_full.wait()
+                    finally:
+                        self._putters -= 1
+                    if self._closed:
+                        return
+                else:
+                    queue.popleft()
+                    self._size -= 1
+                    self.dropped += 1
+        if lane in _ORDERED:
+            self._lanes[lane].append((next(self._seq), msg))
+        else:
+            self._lanes[lane].append(msg)
+        self._size += 1
+
+    def get_many(self, limit: int, timeout: Optional[float] = None) -> List[Msg]:
+        """
+        Take up to ``limit`` messages in priority order, waiting up to
+        ``timeout`` seconds for the first one.
+
+        Raises:
+            Empty: If no message arrived in time
+        """
+        with self._not_empty:
+            if not self._size:
+                if timeout is not None and timeout <= 0:
+                    raise Empty
+                self._getters += 1
+                try:
+                    if not self._not_empty.wait_for(lambda: self._size, timeout):
+                        raise Empty
+                finally:
+                    self._getters -= 1
+
+            msgs: List[Msg] = []
+            for queue in self._lanes[:LANE_CONTROL]:
+                while queue and len(msgs) < limit:
+                    msgs.append(queue.popleft())
+            control = self._lanes[LANE_CONTROL]
+            background = self._lanes[LANE_BACKGROUND]
+            while len(msgs) < limit and (control or background):
+                if control and (not background or control[0][0] < background[0][0]):
+                    msgs.append(control.popleft()[1])
+                else:
+                    msgs.append(background.popleft()[1])
+            self._size -= len(msgs)
+            if self._putters:
+                self._not_full.notify_all()
+            return msgs
+
+    def close(self) -> None:
+        """Stop accepting messages and release blocked producers."""
+        with self._not_empty:
+            self._closed = True
+            self._not_full.notify_all()
+            self._not_empty.notify_all()
+
@@ -1,15 +1,20 @@
 """Message types for Bubble Tea."""
 
 from dataclasses import dataclass
-from typing import Any, Union
+from typing import Any, Dict, Union
 
 
 class Msg:
-    """Base class for all messages."""
-    pass
+    """
+    Base class for all messages.
+    
+    The built-in messages are immutable and slotted, so the input path can
+    hand out the same object for a key every time it is pressed.
+    """
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class KeyMsg(Msg):
     """Message sent when a key is pressed."""
     key: str  # The key string (e.g., "a", "enter", "ctrl+c")
@@ -21,7 +26,7 @@ class KeyMsg(Msg):
         return self.key
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MouseMsg(Msg):
     """Message sent on mouse events."""
     x: int
@@ -33,32 +38,61 @@ class MouseMsg(Msg):
     shift: bool = False
 
 
-@dataclass  
+@dataclass(frozen=True, slots=True)
+class PasteMsg(Msg):
+    """
+    Message sent with text pasted while bracketed paste is enabled.
+    
+    A paste arrives as one message. Very large pastes are streamed as
+    several messages in order, with ``final`` set on the last one.
+    """
+    text: str
+    final: bool = True
+    truncated: bool = False  # Text beyond the size cap was dropped
+
+
+@dataclass(frozen=True, slots=True)
 class WindowSizeMsg(Msg):
     """Message sent when the terminal window is resized."""
     width: int
     height: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FocusMsg(Msg):
     """Message sent when the terminal gains focus."""
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BlurMsg(Msg):
     """Message sent when the terminal loses focus."""
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class QuitMsg(Msg):
     """Internal message to signal program quit."""
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CustomMsg(Msg):
     """Wrapper for custom user-defined messages."""
     value: Any
+
+
+# Interned KeyMsg instances by key, so typing the same keys does not
+# allocate; bounded so arbitrary text can't grow it without limit
+KEY_CACHE_SIZE = 1024
+_KEYS: Dict[str, KeyMsg] = {}
+
+
+def key_msg(key: str) -> KeyMsg:
+    """Return the KeyMsg for ``key``, reusing a cached instance if there is one."""
+    msg = _KEYS.get(key)
+    if msg is None:
+        msg = KeyMsg(key=key)
+        if len(_KEYS) < KEY_CACHE_SIZE:
+            _KEYS[key] = msg
+    return msg
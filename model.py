@@ -1,7 +1,7 @@
 """Model protocol for Bubble Tea applications."""
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Tuple, Optional, Any
+from typing import TYPE_CHECKING, List, Tuple, Optional, Any
 
 if TYPE_CHECKING:
     from .commands import Cmd
@@ -52,3 +52,29 @@ class Model(ABC):
             A string representation of the current UI state
         """
         pass
+
+    def update_batch(self, msgs: List["Msg"]) -> Tuple["Model", Optional["Cmd"]]:
+        """
+        Update the model with several messages at once.
+        
+        Optional. When a model overrides this, the program hands it runs of
+        messages that arrived together (for instance thousands of log lines
+        sent with ``Program.send_many``) in one call, so it can apply them
+        in bulk. The default calls ``update`` for each message in turn and
+        batches the resulting commands.
+        
+        Args:
+            msgs: The messages to process, in order
+            
+        Returns:
+            A tuple of (updated_model, optional_command)
+        """
+        from .commands import batch
+        
+        model: Model = self
+        cmds = []
+        for msg in msgs:
+            model, cmd = model.update(msg)
+            if cmd is not None:
+                cmds.append(cmd)
+        return model, batch(*cmds)
@@ -1,9 +1,12 @@
 """Mouse handling for Bubble Tea."""
 
+import re
 from enum import Enum, auto
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
+from .messages import MouseMsg
+
 
 class MouseButton(Enum):
     """Mouse button types."""
@@ -26,7 +29,7 @@ class MouseAction(Enum):
     MOTION = auto()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MouseEvent:
     """Represents a mouse event."""
     x: int
@@ -125,3 +128,61 @@ def parse_mouse_event(data: bytes) -> Optional[MouseEvent]:
         pass
     
     return None
+
+
+# A complete SGR mouse sequence: ESC [ < button ; column ; row, then M for
+# a press or motion and m for a release
+SGR_MOUSE_RE = re.compile(rb"\x1b\[<(\d+);(\d+);(\d+)([Mm])")
+
+# MouseMsg button values by the low two bits of an SGR button code, for
+# regular and wheel events
+_BUTTON_VALUES = (
+    MouseButton.LEFT.value,
+    MouseButton.MIDDLE.value,
+    MouseButton.RIGHT.value,
+    MouseButton.NONE.value,
+)
+_WHEEL_VALUES = (
+    MouseButton.WHEEL_UP.value,
+    MouseButton.WHEEL_DOWN.value,
+    MouseButton.WHEEL_LEFT.value,
+    MouseButton.WHEEL_RIGHT.value,
+)
+
+
+def parse_mouse_msg(data: bytes, start: int = 0, end: Optional[int] = None) -> Optional[MouseMsg]:
+    """
+    Parse a complete SGR mouse sequence straight into a MouseMsg.
+    
+    This is the input path's version of ``parse_mouse_event()``: it reads
+    the numbers from the bytes in place, without decoding them or building
+    a MouseEvent first.
+    
+    Args:
+        data: Bytes holding the sequence
+        start: Where the sequence starts
+        end: Where the sequence ends (defaults to the end of data)
+    
+    Returns:
+        The message, or None if the bytes are not a mouse sequence
+    """
+    match = SGR_MOUSE_RE.fullmatch(data, start, len(data) if end is None else end)
+    if match is None:
+        return None
+    cb_text, x_text, y_text, final = match.groups()
+    cb = int(cb_text)
+    
+    if cb & 64:
+        button = _WHEEL_VALUES[cb & 3]
+        action = "press"
+    else:
+        button = _BUTTON_VALUES[cb & 3]
+        if cb & 32:
+            action = "motion"
+        elif final == b"m":
+            action = "release"
+        else:
+            action = "press"
+    return MouseMsg(
+        int(x_text) - 1, int(y_text) - 1, button, action, bool(cb & 8), bool(cb & 16), bool(cb & 4)
+    )
@@ -0,0 +1,345 @@
+"""Session recording and replay for Bubble Tea programs."""
+
+import base64
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from threading import Event, Lock, Thread
+from typing import Any, Iterable, List, Optional, TextIO, Tuple, Union
+
+from .headless import HeadlessProgram
+from .messages import Msg, WindowSizeMsg
+from .model import Model
+from .tokenizer import ESC_TIMEOUT, InputTokenizer
+
+FORMAT_VERSION = 1
+
+# Events buffered in memory before new ones are dropped, in bytes
+MAX_BUFFER = 4 << 20
+
+# Event kinds, as written to the file
+INPUT = "in"
+OUTPUT = "out"
+SIZE = "size"
+MESSAGE = "msg"
+
+
+class SessionRecorder:
+    """
+    Records a program's input, messages and output with timestamps.
+
+    Pass an instance as ``Program(recorder=...)``. The program hands it the
+    raw bytes it reads from the terminal, the bytes of every frame it
+    writes, and every WindowSizeMsg it delivers; with ``messages=True``
+    also a description of every message the model receives.
+
+    Each event becomes a JSON line of its time in seconds since
+    ``start()`` and its data, with bytes in base64. Lines are collected in
+    memory and written by a background thread, so recording never waits
+    on the disk. If more than ``max_buffer`` bytes are waiting, further
+    events are dropped and counted in ``dropped`` rather than slowing the
+    program down.
+
+    Example:
+        with SessionRecorder("session.jsonl") as recorder:
+            Program(MyModel(), recorder=recorder).run()
+    """
+
+    def __init__(
+        self,
+        output: Union[str, TextIO],
+        *,
+        messages: bool = False,
+        max_buffer: int = MAX_BUFFER,
+        interval: float = 0.25,
+        clock: Any = time.monotonic,
+    ):
+        """
+        Args:
+            output: File path or text file to write the recording to
+            messages: Also record every message passed to the model
+            max_buffer: Bytes of events to hold before dropping new ones
+            interval: Seconds between writes to the file
+            clock: Monotonic clock event times are taken from
+        """
+        self.messages = messages
+        self.max_buffer = max_buffer
+        self.interval = interval
+        self.clock = clock
+        self.dropped = 0  # Events lost to a full buffer
+
+        self._output = output
+        self._file: Optional[TextIO] = None
+        self._started = clock()
+        self._lines: List[str] = []
+        self._size = 0
+        self._lock = Lock()
+        self._stop = Event()
+        self._wake = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> "SessionRecorder":
+        """Open the output and start writing in a background thread."""
+        if isinstance(self._output, str):
+            self._file = open(self._output, "w", encoding="utf-8")
+        else:
+            self._file = self._output
+        self._started = self.clock()
+        header = {"version": FORMAT_VERSION, "started": time.time()}
+        self._file.write(json.dumps(header) + "\n")
+
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="bubbletea-recorder", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Write everything recorded and close the output."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.dropped:
+            self._append({"t": self._now(), "dropped": self.dropped})
+        self._write()
+        if isinstance(self._output, str) and self._file is not None:
+            self._file.close()
+        self._file = None
+
+    def input(self, data: bytes) -> None:
+        """Record raw bytes read from the terminal."""
+        self._append({"t": self._now(), INPUT: base64.b64encode(data).decode("ascii")})
+
+    def output(self, data: bytes) -> None:
+        """Record bytes written to the terminal."""
+        self._append({"t": self._now(), OUTPUT: base64.b64encode(data).decode("ascii")})
+
+    def size(self, width: int, height: int) -> None:
+        """Record the size of the terminal."""
+        self._append({"t": self._now(), SIZE: [width, height]})
+
+    def message(self, msg: Msg) -> None:
+        """Record a message passed to the model."""
+        self._append({"t": self._now(), MESSAGE: repr(msg)})
+
+    def _now(self) -> float:
+        return round(self.clock() - self._started, 6)
+
+    def _append(self, event: dict) -> None:
+        line = json.dumps(event, separators=(",", ":"))
+        with self._lock:
+            if self._size + len(line) > self.max_buffer:
+                self.dropped += 1
+                return
+            self._lines.append(line)
+            self._size += len(line)
+            if self._size > self.max_buffer // 2:
+                # Write early rather than wait for the interval
+                self._wake.set()
+
+    def _write(self) -> None:
+        with self._lock:
+            lines, self._lines = self._lines, []
+            self._size = 0
+        if lines and self._file is not None:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._write()
+
+    def __enter__(self) -> "SessionRecorder":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+@dataclass(frozen=True)
+class RecordedEvent:
+    """An event read back from a recording."""
+
+    time: float  # Seconds since the recording started
+    kind: str  # INPUT, OUTPUT, SIZE or MESSAGE
+    data: Any  # Bytes for input and output, (width, height), or a message repr
+
+
+def load_recording(source: Union[str, TextIO]) -> List[RecordedEvent]:
+    """
+    Read the events of a recording written by SessionRecorder.
+
+    Args:
+        source: File path or text file
+
+    Returns:
+        The events in the order they were recorded
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            return load_recording(f)
+
+    events: List[RecordedEvent] = []
+    for line in source:
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        if "version" in event:
+            if event["version"] > FORMAT_VERSION:
+                raise ValueError(f"unsupported recording version {event['version']}")
+            continue
+        t = event["t"]
+        if INPUT in event:
+            events.append(RecordedEvent(t, INPUT, base64.b64decode(event[INPUT])))
+        elif OUTPUT in event:
+            events.append(RecordedEvent(t, OUTPUT, base64.b64decode(event[OUTPUT])))
+        elif SIZE in event:
+            events.append(RecordedEvent(t, SIZE, tuple(event[SIZE])))
+        elif MESSAGE in event:
+            events.append(RecordedEvent(t, MESSAGE, event[MESSAGE]))
+    return events
+
+
+class Replayer:
+    """
+    Plays a recording back.
+
+    ``run_fast()`` feeds the recorded input to a model through a
+    HeadlessProgram, on a virtual clock that keeps the recorded timing
+    between events (and the model's own timers) without waiting for it.
+    ``run_realtime()`` feeds it to a real Program at the recorded pace,
+    optionally sped up. ``play()`` writes the recorded output to a
+    terminal, showing what the user saw.
+    """
+
+    def __init__(self, recording: Union[str, TextIO, Iterable[RecordedEvent]]):
+        """
+        Args:
+            recording: File path or text file to load, or loaded events
+        """
+        if isinstance(recording, str) or hasattr(recording, "read"):
+            self.events = load_recording(recording)  # type: ignore
+        else:
+            self.events = list(recording)  # type: ignore
+
+    @property
+    def duration(self) -> float:
+        """Time from the start of the recording to its last event."""
+        return self.events[-1].time if self.events else 0.0
+
+    def messages(self) -> List[Tuple[float, List[Msg]]]:
+        """
+        Return the input as messages with the times they arrived.
+
+        Raw input is parsed as the program parsed it; a sequence cut off
+        at the end of a read is completed by the next read, unless that
+        came more than ``ESC_TIMEOUT`` later.
+        """
+        tokenizer = InputTokenizer()
+        result: List[Tuple[float, List[Msg]]] = []
+        last = 0.0
+        for event in self.events:
+            msgs: List[Msg] = []
+            if tokenizer.pending and event.time - last > ESC_TIMEOUT:
+                msgs.extend(tokenizer.flush())
+            if event.kind == INPUT:
+                msgs.extend(tokenizer.feed(event.data))
+                last = event.time
+            elif event.kind == SIZE:
+                msgs.append(WindowSizeMsg(*event.data))
+            if msgs:
+                result.append((event.time, msgs))
+        if tokenizer.pending:
+            result.append((last + ESC_TIMEOUT, tokenizer.flush()))
+        return result
+
+    def run_fast(self, model: Model, **kwargs: Any) -> HeadlessProgram:
+        """
+        Replay the input into a model as fast as possible.
+
+        Args:
+            model: The model to drive
+            **kwargs: Passed on to HeadlessProgram, e.g. ``stats``
+
+        Returns:
+            The driver, with the final model, frames and timings
+        """
+        driver = HeadlessProgram(model, **kwargs)
+        for t, msgs in self.messages():
+            driver.at(t, *msgs)
+        driver.run(self.duration)
+        return driver
+
+    def run_realtime(
+        self, model: Model, *, speed: float = 1.0, quit_at_end: bool = True, **kwargs: Any
+    ) -> Model:
+        """
+        Replay the input into a Program at the recorded pace.
+
+        Args:
+            model: The model to run
+            speed: Playback speed; 2.0 plays twice as fast
+            quit_at_end: Quit the program once the recording ends
+            **kwargs: Passed on to Program, e.g. ``output`` or ``stats``
+
+        Returns:
+            The final model
+        """
+        from .tea import Program
+
+        read_fd, write_fd = os.pipe()
+        input_tty = os.fdopen(read_fd)
+        try:
+            program = Program(model, input_tty=input_tty, **kwargs)
+        except BaseException:
+            input_tty.close()
+            os.close(write_fd)
+            raise
+
+        def feed() -> None:
+            started = time.monotonic()
+            try:
+                for event in self.events:
+                    delay = started + event.time / speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    if event.kind == INPUT:
+                        try:
+                            os.write(write_fd, event.data)
+                        except OSError:
+                            # The program has exited and closed its input
+                            return
+                    elif event.kind == SIZE:
+                        program.send(WindowSizeMsg(*event.data))
+                if quit_at_end:
+                    program.quit()
+            finally:
+                os.close(write_fd)
+
+        feeder = Thread(target=feed, name="bubbletea-replay", daemon=True)
+        with input_tty:
+            feeder.start()
+            return program.run()
+
+    def play(self, output: TextIO = sys.stdout, *, speed: float = 1.0) -> None:
+        """
+        Write the recorded output at the recorded pace.
+
+        Args:
+            output: Terminal to write to
+            speed: Playback speed; 2.0 plays twice as fast
+        """
+        started = time.monotonic()
+        for event in self.events:
+            if event.kind != OUTPUT:
+                continue
+            delay = started + event.time / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            output.write(event.data.decode("utf-8", errors="replace"))
+            output.flush()
@@ -1,122 +1,882 @@
 """Terminal renderer for Bubble Tea."""
 
-import sys
+import asyncio
+import io
 import os
-from typing import Optional, TextIO
+import select
+import sys
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence, TextIO, Tuple, Union
+
+from .screen import (
+    ALT_SCREEN_OFF,
+    ALT_SCREEN_ON,
+    BRACKETED_PASTE_OFF,
+    BRACKETED_PASTE_ON,
+    CLEAR_LINE,
+    CLEAR_LINE_RIGHT,
+    CLEAR_SCREEN,
+    CLEAR_SCREEN_BELOW,
+    CURSOR_HIDE,
+    CURSOR_HOME,
+    CURSOR_SHOW,
+    MOUSE_ALL_MOTION,
+    MOUSE_ALL_MOTION_OFF,
+    MOUSE_CELL_MOTION,
+    MOUSE_CELL_MOTION_OFF,
+    MOUSE_DISABLE,
+    MOUSE_SGR,
+    MOUSE_SGR_OFF,
+    SYNC_OUTPUT_OFF,
+    SYNC_OUTPUT_ON,
+    cursor_up,
+    cursor_down,
+    move_cursor,
+)
+from .width import ZWJ, char_width, string_width, truncate
+
+# A view: either a single string or its lines
+View = Union[str, Sequence[str]]
+
+# Maximum rate at which the view is rendered
+DEFAULT_FPS = 60
+MAX_FPS = 120
 
 
 class Renderer:
-    """Handles rendering output to the terminal."""
+    """
+    Handles rendering output to the terminal.
+
+    The previous frame is kept as a list of lines so that each render only
+    rewrites the lines that actually changed, like the Go standard renderer.
+    
+    Output is buffered: each frame, together with any mode changes (cursor,
+    mouse, alternate screen) made since the last one, goes to the terminal
+    in a single write, straight to the file descriptor when the output has
+    one. With ``synchronized_output`` frames are bracketed in DEC mode 2026
+    so terminals that support it draw each frame atomically.
+    """
     
     def __init__(
         self,
         output: TextIO = sys.stdout,
         fps: int = 60,
+        synchronized_output: bool = False,
     ):
         self.output = output
+        self.synchronized_output = synchronized_output
+        
+        # Output waiting for the next write
+        self._buf = bytearray()
+        try:
+            self._fd: Optional[int] = output.fileno()
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            self._fd = None
+        
+        if fps < 1:
+            fps = DEFAULT_FPS
+        elif fps > MAX_FPS:
+            fps = MAX_FPS
         self.fps = fps
-        self._last_render = ""
+        self.frame_interval = 1.0 / fps
+        self._last_render: View = ""
+        self._last_lines: List[str] = []
         self._cursor_hidden = False
         self._alt_screen = False
         self._lines_rendered = 0
+        self._alt_lines_rendered = 0
+        
+        # Terminal dimensions, 0 if unknown
+        self.width = 0
+        self.height = 0
+        
+        # Called with the output of each flush before it is written, e.g.
+        # by a session recorder
+        self.tap: Optional[Callable[[bytes], None]] = None
+        
+        # With attach_loop(), output the terminal can't take right away
+        # waits in the backlog until the event loop finds it writable
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._backlog = bytearray()
+        self._drained: Optional["asyncio.Future[None]"] = None
+        # Seconds a blocking flush, or a program exiting on the event loop,
+        # waits for a non-blocking output to take what is left before
+        # dropping the rest; None waits forever
+        self.write_timeout: Optional[float] = None
+        # Bytes the backlog may grow to before the output is given up on
+        self.max_backlog: Optional[int] = None
+        self._broken = False  # The other end of the output went away
     
-    def render(self, view: str) -> None:
+    def render(self, view: View) -> int:
         """
         Render the view to the terminal.
         
-        Uses differential rendering to minimize output.
+        Uses line-level differential rendering: lines identical to the
+        previous frame are skipped, changed lines are rewritten in place and
+        lines left over from a taller previous frame are cleared.
+        
+        The view may also be given as a list of lines. Lines that are the
+        same objects as in the previous frame, as produced by cached
+        components, are skipped without comparing their contents.
+        
+        Returns:
+            The number of bytes written
         """
         if view == self._last_render:
-            return
+            return self.flush()
         
-        # Clear previous render
-        if self._lines_rendered > 0:
-            # Move cursor up and clear lines
-            for _ in range(self._lines_rendered):
-                self.output.write("\x1b[A")  # Move up
-                self.output.write("\x1b[2K")  # Clear line
-        else:
-            # First render, just clear current line
-            self.output.write("\r\x1b[2K")
+        new_lines = self._fit(view)
+        last_lines = self._last_lines
+        lines_rendered = self._visible_lines()
+        buf: List[str] = []
+        
+        # Move to the beginning of the section we rendered last time
+        if self._alt_screen:
+            buf.append(CURSOR_HOME)
+        elif lines_rendered > 1:
+            buf.append(cursor_up(lines_rendered - 1))
+        
+        last = len(new_lines) - 1
+        skipped = 0
+        for i, line in enumerate(new_lines):
+            if i < len(last_lines) and last_lines[i] == line:
+                # Unchanged line, just move the cursor down
+                if i < last:
+                    skipped += 1
+                continue
+            
+            if skipped:
+                # Skip a run of unchanged lines in one move
+                buf.append("\n" * skipped if skipped < 4 else cursor_down(skipped))
+                skipped = 0
+            
+            if i == 0 and not self._last_render:
+                # First render, reset the cursor to the start of the line
+                buf.append("\r")
+            
+            # Erase whatever was left over from the previous content
+            buf.append(line)
+            buf.append(CLEAR_LINE_RIGHT)
+            if i < last:
+                buf.append("\r\n")
         
-        # Write new content
-        self.output.write(view)
-        self.output.flush()
+        if skipped:
+            # Unchanged lines at the bottom; the cursor must still end up on
+            # the last line for the next frame's move up to be right
+            buf.append("\n" * skipped if skipped < 4 else cursor_down(skipped))
         
-        # Track lines for next clear
-        self._lines_rendered = view.count('\n')
+        # Clear lines left over from a taller previous frame
+        if lines_rendered > len(new_lines):
+            buf.append(cursor_down(1))
+            buf.append("\r")
+            buf.append(CLEAR_SCREEN_BELOW)
+            buf.append(cursor_up(1))
+        
+        # Leave the cursor at the start of the last line
+        if self._alt_screen:
+            buf.append(move_cursor(len(new_lines), 1))
+        else:
+            buf.append("\r")
+        
+        if self._alt_screen:
+            self._alt_lines_rendered = len(new_lines)
+        else:
+            self._lines_rendered = len(new_lines)
         self._last_render = view
+        self._last_lines = new_lines
+        return self._write_frame(buf)
+    
+    def _write_frame(self, buf: List[str]) -> int:
+        """
+        Write a frame along with any pending output, in one write.
+        
+        Returns:
+            The number of bytes written
+        """
+        if self.synchronized_output:
+            buf.insert(0, SYNC_OUTPUT_ON)
+            buf.append(SYNC_OUTPUT_OFF)
+        self._buf += "".join(buf).encode("utf-8")
+        return self.flush()
+    
+    def _queue(self, seq: str) -> None:
+        """Add output to be written with the next frame or flush."""
+        self._buf += seq.encode("utf-8")
+    
+    def flush(self) -> int:
+        """
+        Write all pending output to the terminal.
+        
+        Returns:
+            The number of bytes written
+        """
+        data = self._buf
+        if not data:
+            return 0
+        size = len(data)
+        if self.tap is not None:
+            self.tap(bytes(data))
+        
+        if self._fd is None:
+            self.output.write(data.decode("utf-8"))
+            self.output.flush()
+        elif self._broken:
+            pass
+        elif self._loop is not None:
+            self._write_later(data)
+        else:
+            # Anything written through the file object has to go out first
+            self.output.flush()
+            view = memoryview(data)
+            written = 0
+            try:
+                while written < size:
+                    try:
+                        written += os.write(self._fd, view[written:])
+                    except BlockingIOError:
+                        _, writable, _ = select.select([], [self._fd], [], self.write_timeout)
+                        if not writable:
+                            # The reader has stopped reading; give up
+                            break
+            except ConnectionError:
+                self._broken = True
+            finally:
+                view.release()
+        
+        del data[:]
+        return size
+    
+    def attach_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Write through an asyncio event loop instead of blocking.
+        
+        For a non-blocking output shared with other work on the loop, e.g.
+        a socket: output the other end isn't ready for is kept and written
+        when the loop finds the output writable, so a slow reader never
+        stalls the loop.
+        """
+        if self._fd is not None:
+            self._loop = loop
+    
+    def detach_loop(self) -> None:
+        """
+        Go back to blocking writes, dropping output not yet written.
+        
+        Call ``drain()`` first to give the output a chance to take it.
+        """
+        if self._loop is None:
+            return
+        if self._backlog:
+            self._loop.remove_writer(self._fd)  # type: ignore
+            self._backlog = bytearray()
+        self._backlog_done()
+        self._loop = None
+    
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the event loop to write the backlog, without blocking it.
+        
+        Args:
+            timeout: Seconds to wait at most; None waits until written
+        
+        Returns:
+            True if everything was written
+        """
+        if self._loop is None or not self._backlog:
+            return True
+        self._drained = self._loop.create_future()
+        try:
+            await asyncio.wait_for(self._drained, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._drained = None
+        return not self._backlog and not self._broken
+    
+    def _backlog_done(self) -> None:
+        if self._drained is not None and not self._drained.done():
+            self._drained.set_result(None)
+    
+    def _write_later(self, data: bytearray) -> None:
+        """Write what the output takes now and leave the rest to the loop."""
+        if self._backlog:
+            # Keep the order of writes
+            self._backlog += data
+            if self.max_backlog is not None and len(self._backlog) > self.max_backlog:
+                # The reader is stuck
+                self._loop.remove_writer(self._fd)  # type: ignore
+                self._backlog = bytearray()
+                self._broken = True
+                self._backlog_done()
+            return
+        try:
+            written = os.write(self._fd, data)  # type: ignore
+        except BlockingIOError:
+            written = 0
+        except OSError:
+            self._broken = True
+            return
+        if written < len(data):
+            self._backlog += data[written:]
+            self._loop.add_writer(self._fd, self._write_backlog)  # type: ignore
+    
+    def _write_backlog(self) -> None:
+        backlog = self._backlog
+        try:
+            written = os.write(self._fd, backlog)  # type: ignore
+        except BlockingIOError:
+            return
+        except OSError:
+            self._broken = True
+            written = len(backlog)
+        del backlog[:written]
+        if not backlog:
+            self._loop.remove_writer(self._fd)  # type: ignore
+            self._backlog_done()
+    
+    def _fit(self, view: View) -> List[str]:
+        """
+        Split the view into lines that each take exactly one row on screen.
+        
+        Lines wider than the terminal are truncated rather than left to
+        soft wrap, which would throw off the count of rows to move back up
+        over, and only the last screenful of lines is kept.
+        """
+        lines = view.split("\n") if isinstance(view, str) else list(view)
+        if self.height > 0 and len(lines) > self.height:
+            lines = lines[len(lines) - self.height:]
+        if self.width > 0:
+            width = self.width
+            lines = [truncate(line, width) for line in lines]
+        return lines
+    
+    def repaint(self) -> None:
+        """Force the next render to rewrite every line."""
+        self._last_render = ""
+        self._last_lines = []
+    
+    def resize(self, width: int, height: int) -> None:
+        """Record the terminal size and repaint on the next render."""
+        self.width = width
+        self.height = height
+        self.repaint()
+    
+    def _visible_lines(self) -> int:
+        """Return the number of lines rendered on the active screen."""
+        if self._alt_screen:
+            return self._alt_lines_rendered
+        return self._lines_rendered
     
     def clear(self) -> None:
         """Clear the screen."""
-        self.output.write("\x1b[2J\x1b[H")
-        self.output.flush()
+        self._queue(CLEAR_SCREEN + CURSOR_HOME)
         self._lines_rendered = 0
-        self._last_render = ""
+        self._alt_lines_rendered = 0
+        self.repaint()
     
     def enter_alt_screen(self) -> None:
         """Enter the alternate screen buffer."""
         if not self._alt_screen:
-            self.output.write("\x1b[?1049h")
-            self.output.flush()
+            self._queue(ALT_SCREEN_ON)
             self._alt_screen = True
-            self._lines_rendered = 0
-            self._last_render = ""
+            self._alt_lines_rendered = 0
+            self.repaint()
     
     def exit_alt_screen(self) -> None:
         """Exit the alternate screen buffer."""
         if self._alt_screen:
-            self.output.write("\x1b[?1049l")
-            self.output.flush()
+            self._queue(ALT_SCREEN_OFF)
             self._alt_screen = False
+            self.repaint()
     
     def hide_cursor(self) -> None:
         """Hide the terminal cursor."""
         if not self._cursor_hidden:
-            self.output.write("\x1b[?25l")
-            self.output.flush()
+            self._queue(CURSOR_HIDE)
             self._cursor_hidden = True
     
     def show_cursor(self) -> None:
         """Show the terminal cursor."""
         if self._cursor_hidden:
-            self.output.write("\x1b[?25h")
-            self.output.flush()
+            self._queue(CURSOR_SHOW)
             self._cursor_hidden = False
     
     def enable_mouse(self, all_motion: bool = False) -> None:
         """Enable mouse tracking."""
         if all_motion:
-            self.output.write("\x1b[?1003h")  # All motion
+            self._queue(MOUSE_ALL_MOTION)
         else:
-            self.output.write("\x1b[?1002h")  # Cell motion
-        self.output.write("\x1b[?1006h")  # SGR extended mode
-        self.output.flush()
+            self._queue(MOUSE_CELL_MOTION)
+        self._queue(MOUSE_SGR)  # SGR extended mode
     
     def disable_mouse(self) -> None:
         """Disable mouse tracking."""
-        self.output.write("\x1b[?1000l")
-        self.output.write("\x1b[?1002l")
-        self.output.write("\x1b[?1003l")
-        self.output.write("\x1b[?1006l")
-        self.output.flush()
+        self._queue(MOUSE_DISABLE + MOUSE_CELL_MOTION_OFF + MOUSE_ALL_MOTION_OFF + MOUSE_SGR_OFF)
+    
+    def enable_bracketed_paste(self) -> None:
+        """Enable bracketed paste mode."""
+        self._queue(BRACKETED_PASTE_ON)
+    
+    def disable_bracketed_paste(self) -> None:
+        """Disable bracketed paste mode."""
+        self._queue(BRACKETED_PASTE_OFF)
     
     def set_window_title(self, title: str) -> None:
         """Set the terminal window title."""
-        self.output.write(f"\x1b]0;{title}\x07")
-        self.output.flush()
+        self._queue(f"\x1b]0;{title}\x07")
+    
+    def write(self, text: str) -> None:
+        """Write text that isn't part of a frame, after any pending output."""
+        self._queue(text)
+        self.flush()
     
     def close(self) -> None:
         """Clean up the renderer."""
         self.show_cursor()
         self.exit_alt_screen()
         self.disable_mouse()
+        self.flush()
+
+
+# Cells pack a code point and a style id into one 64-bit integer
+_CP_BITS = 21
+_CP_MASK = (1 << _CP_BITS) - 1
+
+# Code point marking the right half of a wide character
+_WIDE_CONT = 0
+
+# A blank cell in the default style
+_BLANK = ord(" ")
+
+# SGR attribute codes and the bit each one sets in a style
+_SGR_ATTRS = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 7: 5, 8: 6, 9: 7}
+
+# SGR codes that switch attributes off, and the bits they clear
+_SGR_ATTRS_OFF = {
+    22: (1 << 0) | (1 << 1),
+    23: 1 << 2,
+    24: 1 << 3,
+    25: 1 << 4,
+    27: 1 << 5,
+    28: 1 << 6,
+    29: 1 << 7,
+}
+
+# A style: (attribute bits, foreground params, background params)
+Style = Tuple[int, str, str]
+_DEFAULT_STYLE: Style = (0, "", "")
+
+# Interned styles kept before the table is cleared and the screen redrawn,
+# so views full of one-off true colors don't grow it forever
+MAX_STYLES = 4096
+
+
+def _apply_sgr(style: Style, params: str) -> Style:
+    """Return ``style`` updated by the SGR parameters ``params``."""
+    attrs, fg, bg = style
+    codes = params.split(";") if params else ["0"]
+    i = 0
+    while i < len(codes):
+        try:
+            code = int(codes[i] or 0)
+        except ValueError:
+            # Colon sub-parameters and the like
+            i += 1
+            continue
+        
+        if code == 0:
+            attrs, fg, bg = _DEFAULT_STYLE
+        elif code in _SGR_ATTRS:
+            attrs |= 1 << _SGR_ATTRS[code]
+        elif code in _SGR_ATTRS_OFF:
+            attrs &= ~_SGR_ATTRS_OFF[code]
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            fg = str(code)
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            bg = str(code)
+        elif code == 39:
+            fg = ""
+        elif code == 49:
+            bg = ""
+        elif code in (38, 48):
+            # Extended color: 5;n (256 colors) or 2;r;g;b (true color)
+            size = 3 if i + 1 < len(codes) and codes[i + 1] == "5" else 5
+            color = ";".join(codes[i:i + size])
+            if code == 38:
+                fg = color
+            else:
+                bg = color
+            i += size - 1
+        i += 1
+    return attrs, fg, bg
+
+
+class _Row:
+    """One row of the cell grid."""
+    
+    __slots__ = ("cells", "extras", "length", "source", "end_style")
+    
+    def __init__(
+        self,
+        cells: "array[int]",
+        extras: Optional[Dict[int, str]],
+        length: int,
+        source: Tuple[str, int],
+        end_style: int,
+    ):
+        self.cells = cells  # Packed code point and style per cell
+        self.extras = extras  # Full graphemes for cells with combining marks
+        self.length = length  # Cells before the blank padding
+        self.source = source  # The line and starting style it was parsed from
+        self.end_style = end_style  # Style in effect at the end of the line
+
+
+def _first_diff(a: "array[int]", b: "array[int]") -> int:
+    """Return the first index where two equal-length arrays differ."""
+    lo, hi = 0, len(a)
+    # Invariant: a[:lo] == b[:lo] and a[:hi] != b[:hi]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _last_diff(a: "array[int]", b: "array[int]") -> int:
+    """Return the last index where two equal-length arrays differ."""
+    lo, hi = 0, len(a)
+    # Invariant: a[hi:] == b[hi:] and a[lo:] != b[lo:]
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[mid:] == b[mid:]:
+            hi = mid
+        else:
+            lo = mid
+    return lo
+
+
+class CellRenderer(Renderer):
+    """
+    A renderer that tracks damage per cell, for full-screen programs.
+    
+    In the alternate screen each view is parsed into a grid of cells, each
+    holding a grapheme and an SGR style. Rows are packed into arrays of
+    64-bit integers (code point and interned style id), so comparing
+    against the previous grid happens in C: unchanged rows are skipped by
+    comparing their source lines, and for changed rows the damaged span is
+    found by bisecting array slices. Only damaged spans are written, with a
+    cursor move and the style changes they need.
+    
+    Outside the alternate screen it renders line by line like Renderer.
+    """
+    
+    def __init__(
+        self,
+        output: TextIO = sys.stdout,
+        fps: int = 60,
+        synchronized_output: bool = False,
+    ):
+        super().__init__(output, fps, synchronized_output)
+        self._grid: List[_Row] = []
+        self._clear_screen = False
+        
+        self._reset_styles()
+    
+    def _reset_styles(self) -> None:
+        """Forget all interned styles; cells parsed before are invalid."""
+        # Interned styles; id 0 is the default style
+        self._style_ids: Dict[Style, int] = {_DEFAULT_STYLE: 0}
+        self._styles: List[Style] = [_DEFAULT_STYLE]
+        self._style_sgr: List[str] = ["\x1b[0m"]
+        # The style an SGR sequence turns a style into, by (id, params)
+        self._sgr_cache: Dict[Tuple[int, str], int] = {}
+    
+    def repaint(self) -> None:
+        """Force the next render to rewrite every cell."""
+        super().repaint()
+        self._grid = []
+    
+    def resize(self, width: int, height: int) -> None:
+        """Record the terminal size; the next frame is drawn from scratch."""
+        super().resize(width, height)
+        self._clear_screen = True
+    
+    def render(self, view: View) -> int:
+        """
+        Render the view to the terminal.
+        
+        Returns:
+            The number of bytes written
+        """
+        if not self._alt_screen:
+            return super().render(view)
+        if view == self._last_render:
+            return self.flush()
+        
+        lines = view.split("\n") if isinstance(view, str) else list(view)
+        if self.height > 0 and len(lines) > self.height:
+            lines = lines[len(lines) - self.height:]
+        
+        width = self.width
+        if width <= 0:
+            # Unknown terminal width, size the grid to the content
+            width = max((string_width(line) for line in lines), default=0)
+        
+        prev = self._grid
+        grid: List[_Row] = []
+        buf: List[str] = []
+        if len(self._sgr_cache) > MAX_STYLES or len(self._styles) > MAX_STYLES:
+            # Old rows hold ids from the old table; redraw all of them
+            self._reset_styles()
+            self._clear_screen = True
+        if self._clear_screen:
+            buf.append(CLEAR_SCREEN)
+            prev = []
+            self._clear_screen = False
+        
+        style_id = 0
+        current = -1  # Style last emitted in this frame, -1 if none
+        for r, line in enumerate(lines):
+            source = (line, style_id)
+            old = prev[r] if r < len(prev) else None
+            if old is not None and old.source == source and len(old.cells) == width:
+                # Same input, same cells
+                row = old
+            else:
+                row = self._parse_line(line, style_id, width)
+                current = self._draw_damage(buf, r, row, old, current)
+            grid.append(row)
+            style_id = row.end_style
+        
+        # Clear rows left over from a taller previous frame
+        for r in range(len(grid), len(prev)):
+            if current != 0:
+                buf.append(self._style_sgr[0])
+                current = 0
+            buf.append(move_cursor(r + 1, 1))
+            buf.append(CLEAR_LINE)
+        
+        if current > 0:
+            buf.append(self._style_sgr[0])
+        
+        self._grid = grid
+        self._last_render = view
+        if not buf:
+            return self.flush()
+        return self._write_frame(buf)
+    
+    def _intern_style(self, style: Style) -> int:
+        """Return the id of a style, assigning one if it is new."""
+        style_id = self._style_ids.get(style)
+        if style_id is None:
+            style_id = len(self._styles)
+            self._style_ids[style] = style_id
+            self._styles.append(style)
+            attrs, fg, bg = style
+            params = ["0"]
+            params.extend(str(code) for code, bit in _SGR_ATTRS.items() if attrs & (1 << bit))
+            if fg:
+                params.append(fg)
+            if bg:
+                params.append(bg)
+            self._style_sgr.append(f"\x1b[{';'.join(params)}m")
+        return style_id
+    
+    def _apply(self, style_id: int, params: str) -> int:
+        """Return the id of the style SGR ``params`` turn a style into."""
+        key = (style_id, params)
+        result = self._sgr_cache.get(key)
+        if result is None:
+            result = self._intern_style(_apply_sgr(self._styles[style_id], params))
+            self._sgr_cache[key] = result
+        return result
+    
+    def _end_style(self, line: str, style_id: int, start: int = 0) -> int:
+        """Return the style in effect at the end of ``line[start:]``."""
+        i = line.find("\x1b[", start)
+        while i != -1:
+            j = i + 2
+            while j < len(line) and "0" <= line[j] <= "?":
+                j += 1
+            if j < len(line) and line[j] == "m":
+                style_id = self._apply(style_id, line[i + 2:j])
+            i = line.find("\x1b[", j)
+        return style_id
+    
+    def _parse_line(self, line: str, style_id: int, width: int) -> _Row:
+        """Parse a line of the view into a row of ``width`` cells."""
+        cells = array("Q")
+        extras: Optional[Dict[int, str]] = None
+        source = (line, style_id)
+        shifted = style_id << _CP_BITS
+        base = -1  # Index of the last cell that holds a character
+        joined = False  # The previous character was a zero width joiner
+        regional = False  # An unpaired regional indicator (half a flag) precedes
+        n = len(line)
+        i = 0
+        while i < n and len(cells) < width:
+            ch = line[i]
+            code = ord(ch)
+            
+            if code == 0x1B:
+                if i + 1 < n and line[i + 1] == "[":
+                    # CSI sequence; only SGR affects the cells
+                    j = i + 2
+                    while j < n and "0" <= line[j] <= "?":
+                        j += 1
+                    while j < n and " " <= line[j] <= "/":
+                        j += 1
+                    if j < n and line[j] == "m":
+                        style_id = self._apply(style_id, line[i + 2:j])
+                        shifted = style_id << _CP_BITS
+                    i = j + 1
+                elif i + 1 < n and line[i + 1] == "]":
+                    # OSC sequence, terminated by BEL or ST
+                    bel = line.find("\x07", i)
+                    st = line.find("\x1b\\", i)
+                    ends = [e + 1 for e in (bel,) if e != -1] + [e + 2 for e in (st,) if e != -1]
+                    i = min(ends) if ends else n
+                else:
+                    i += 2
+                continue
+            
+            # Graphemes are measured as width._widths does, so rows agree
+            # with string_width and truncate
+            if 0x20 <= code < 0x7F:
+                joined = regional = False
+                # A run of plain ASCII up to the next escape, in one go
+                j = line.find("\x1b", i)
+                if j == -1:
+                    j = n
+                j = min(j, i + width - len(cells))
+                run = line[i:j]
+                if run.isascii() and run.isprintable():
+                    cells.extend([c | shifted for c in run.encode("ascii")])
+                    base = len(cells) - 1
+                    i = j
+                    continue
+                w = 1
+            elif code < 0x20 or 0x7F <= code < 0xA0:
+                i += 1
+                continue
+            elif ch == ZWJ:
+                joined = True
+                w = 0
+            elif joined:
+                # Part of the preceding emoji sequence
+                joined = False
+                w = 0
+            elif 0x1F1E6 <= code <= 0x1F1FF:
+                # Two regional indicators form one flag
+                regional = not regional
+                w = 2 if regional else 0
+            else:
+                regional = False
+                w = char_width(ch)
+            
+            if w == 0:
+                # Combining mark or the rest of an emoji sequence or flag,
+                # part of the previous grapheme
+                if base >= 0:
+                    if extras is None:
+                        extras = {}
+                    extras[base] = extras.get(base, chr(cells[base] & _CP_MASK)) + ch
+                i += 1
+                continue
+            if len(cells) + w > width:
+                break
+            
+            base = len(cells)
+            cells.append(code | shifted)
+            if w == 2:
+                cells.append(_WIDE_CONT | shifted)
+            i += 1
+        
+        length = len(cells)
+        if length < width:
+            cells.extend([_BLANK] * (width - length))
+        if i < n:
+            # Styles set past the last cell still carry over to the next line
+            style_id = self._end_style(line, style_id, i)
+        return _Row(cells, extras, length, source, style_id)
+    
+    def _draw_damage(
+        self, buf: List[str], r: int, row: _Row, old: Optional[_Row], current: int
+    ) -> int:
+        """
+        Write the damaged span of a row.
+        
+        Returns:
+            The style in effect after writing
+        """
+        cells = row.cells
+        if old is not None and len(old.cells) == len(cells):
+            if old.cells == cells and old.extras == row.extras:
+                return current
+            if old.cells == cells:
+                start, end = 0, len(cells) - 1
+            else:
+                start = _first_diff(cells, old.cells)
+                end = _last_diff(cells, old.cells)
+            if old.extras != row.extras:
+                before = old.extras or {}
+                after = row.extras or {}
+                changed = [c for c in set(before) | set(after) if before.get(c) != after.get(c)]
+                if changed:
+                    start = min(start, min(changed))
+                    end = max(end, max(changed))
+        else:
+            start, end = 0, len(cells) - 1
+        
+        # Don't split wide characters
+        if start > 0 and cells[start] & _CP_MASK == _WIDE_CONT:
+            start -= 1
+        if end + 1 < len(cells) and cells[end + 1] & _CP_MASK == _WIDE_CONT:
+            end += 1
+        
+        buf.append(move_cursor(r + 1, start + 1))
+        
+        # Blank padding at the end of the row is erased instead of written
+        erase = end >= row.length
+        if erase:
+            end = row.length - 1
+        
+        extras = row.extras
+        style_sgr = self._style_sgr
+        for c in range(start, end + 1):
+            value = cells[c]
+            code = value & _CP_MASK
+            if code == _WIDE_CONT:
+                continue
+            style_id = value >> _CP_BITS
+            if style_id != current:
+                buf.append(style_sgr[style_id])
+                current = style_id
+            if extras is not None and c in extras:
+                buf.append(extras[c])
+            else:
+                buf.append(chr(code))
+        
+        if erase:
+            if current != 0:
+                buf.append(style_sgr[0])
+                current = 0
+            buf.append(CLEAR_LINE_RIGHT)
+        return current
 
 
 class NullRenderer(Renderer):
     """A renderer that does nothing (for testing)."""
     
-    def render(self, view: str) -> None:
+    def render(self, view: View) -> int:
+        return 0
+    
+    def repaint(self) -> None:
+        pass
+    
+    def resize(self, width: int, height: int) -> None:
         pass
     
     def clear(self) -> None:
@@ -140,6 +900,18 @@ class NullRenderer(Renderer):
     def disable_mouse(self) -> None:
         pass
     
+    def enable_bracketed_paste(self) -> None:
+        pass
+    
+    def disable_bracketed_paste(self) -> None:
+        pass
+    
+    def flush(self) -> int:
+        return 0
+    
+    def attach_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        pass
+    
     def set_window_title(self, title: str) -> None:
         pass
     
@@ -27,6 +27,7 @@ CLEAR_SCREEN = f"{CSI}2J"
 CLEAR_LINE = f"{CSI}2K"
 CLEAR_LINE_RIGHT = f"{CSI}K"
 CLEAR_LINE_LEFT = f"{CSI}1K"
+CLEAR_SCREEN_BELOW = f"{CSI}J"
 
 # Mouse modes
 MOUSE_ENABLE = f"{CSI}?1000h"  # Basic mouse reporting
@@ -46,6 +47,11 @@ FOCUS_DISABLE = f"{CSI}?1004l"
 BRACKETED_PASTE_ON = f"{CSI}?2004h"
 BRACKETED_PASTE_OFF = f"{CSI}?2004l"
 
+# Synchronized output (DEC mode 2026): the terminal holds off drawing until
+# the update is complete
+SYNC_OUTPUT_ON = f"{CSI}?2026h"
+SYNC_OUTPUT_OFF = f"{CSI}?2026l"
+
 
 # Message types for screen commands
 @dataclass
@@ -0,0 +1,317 @@
+"""Hosting many Bubble Tea programs in one process."""
+
+import asyncio
+import fcntl
+import logging
+import os
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import termios
+import tty
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from .executor import CommandExecutor
+from .messages import WindowSizeMsg
+from .model import Model
+from .tea import Program
+
+# Asks a terminal to report its size as ESC [ 8 ; rows ; columns t
+SIZE_QUERY = b"\x1b[18t"
+
+# Seconds an exiting session waits for its client to take the last of its
+# output before the rest is dropped
+WRITE_TIMEOUT = 5.0
+
+# Bytes of output a session keeps for a client that isn't reading before
+# it stops writing to it
+MAX_BACKLOG = 16 << 20
+
+logger = logging.getLogger("bubbletea.server")
+
+
+def _set_window_size(fd: int, width: int, height: int) -> None:
+    """Set the size of a pty."""
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", height, width, 0, 0))
+
+
+class Session:
+    """
+    A client of a ProgramServer.
+
+    Each session runs its own Program, and so has its own model, message
+    queue, timers, input parser, renderer and window size. Only the event
+    loop and the command executor are shared with other sessions.
+    """
+
+    def __init__(
+        self,
+        session_id: int,
+        program: Program,
+        fd: int,
+        files: List[TextIO],
+        pty_master: Optional[int] = None,
+    ):
+        self.id = session_id
+        self.program = program
+        self.task: Optional["asyncio.Task[Model]"] = None
+        # The pty's other end, for the caller to connect; None for sockets
+        self.pty_master = pty_master
+        self._fd = fd
+        self._files = files
+
+    @property
+    def model(self) -> Model:
+        """The session's current model."""
+        return self.program.model
+
+    def resize(self, width: int, height: int) -> None:
+        """Change the size of the session's window."""
+        if self.pty_master is not None:
+            _set_window_size(self._fd, width, height)
+        self.program.send(WindowSizeMsg(width, height))
+
+    def close(self) -> None:
+        """Quit the session's program."""
+        self.program.quit()
+
+    async def wait(self) -> Model:
+        """Wait for the session to end and return its final model."""
+        assert self.task is not None
+        return await self.task
+
+    def _release(self) -> None:
+        for f in self._files:
+            try:
+                f.close()
+            except OSError:
+                pass
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+
+class ProgramServer:
+    """
+    Hosts many programs in one process, one per connected client.
+
+    Every session is a Program running with ``run_async()`` on the same
+    asyncio event loop, reading from and writing to its own non-blocking
+    socket or pty. Input is read with ``loop.add_reader``, and output a
+    slow client can't take yet waits for the loop to find its socket
+    writable, so no session holds up the others. A program yields to the
+    loop after every ``ASYNC_YIELD_EVERY`` messages, so sessions busy with
+    a flood of messages take turns with the rest.
+
+    All sessions run their commands on one fair CommandExecutor. Each
+    session's queued commands wait in a queue of its own and the workers
+    take turns between sessions, so a session that starts a thousand
+    commands can't make the others wait for all of them.
+
+    Clients connect to ``serve_unix()`` with any raw terminal bridge, such
+    as ``socat UNIX-CONNECT:path STDIO,raw,echo=0``, or with ``connect()``
+    (``python -m bubbletea.server path``), which also reports resizes.
+    Window sizes arrive in band, as the ``ESC [ 8 ; rows ; columns t``
+    report that terminals send in reply to ``ESC [ 18 t``. ``open_pty()``
+    hosts a session on a pty instead, for callers that bridge the pty to
+    something else themselves.
+
+    Example:
+        server = ProgramServer(MyModel, alt_screen=True)
+        asyncio.run(server.serve_unix("/tmp/app.sock"))
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Model],
+        *,
+        max_workers: Optional[int] = None,
+        io_workers: Optional[int] = None,
+        **options: Any,
+    ):
+        """
+        Args:
+            model_factory: Returns the initial model for a new session
+            max_workers: Size of the shared general worker pool
+            io_workers: Size of a shared pool for blocking commands
+            **options: Passed on to every Program, e.g. ``alt_screen=True``
+        """
+        self.model_factory = model_factory
+        self.executor = CommandExecutor(max_workers, io_workers, fair=True)
+        # An exiting session does not hold up the loop waiting for its
+        # cancelled commands
+        self.options: Dict[str, Any] = {"shutdown_timeout": 0.0, **options}
+        self.sessions: Dict[int, Session] = {}
+        self._ids = count(1)
+
+    def open(
+        self,
+        fd: int,
+        *,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        pty_master: Optional[int] = None,
+    ) -> Session:
+        """
+        Start a session on a connected file descriptor.
+
+        The session owns the descriptor from now on and closes it when it
+        ends. Must be called from the event loop.
+
+        Args:
+            fd: A connected socket or a tty, used for input and output
+            width: Initial window width, if known
+            height: Initial window height, if known
+            pty_master: The other end of the pty, if ``fd`` is one
+
+        Returns:
+            The new session
+        """
+        loop = asyncio.get_running_loop()
+        os.set_blocking(fd, False)
+        input_tty = open(fd, "r", closefd=False)
+        output = open(fd, "w", encoding="utf-8", closefd=False)
+        program = Program(
+            self.model_factory(),
+            input_tty=input_tty,
+            output=output,
+            executor=self.executor,
+            handle_signals=False,
+            quit_on_eof=True,
+            **self.options,
+        )
+        program._renderer.write_timeout = WRITE_TIMEOUT
+        program._renderer.max_backlog = MAX_BACKLOG
+
+        session = Session(next(self._ids), program, fd, [input_tty, output], pty_master)
+        if width and height:
+            session.resize(width, height)
+        self.sessions[session.id] = session
+        session.task = loop.create_task(self._run(session))
+        return session
+
+    def open_pty(self, width: int = 80, height: int = 24) -> Session:
+        """
+        Start a session on a new pty.
+
+        The caller connects ``session.pty_master`` to the client and closes
+        it when done. Must be called from the event loop.
+        """
+        master, slave = os.openpty()
+        _set_window_size(slave, width, height)
+        return self.open(slave, width=width, height=height, pty_master=master)
+
+    async def serve_unix(self, path: str) -> None:
+        """
+        Accept clients on a Unix socket, a session each, until cancelled.
+
+        A stale socket file left at ``path`` is replaced.
+        """
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+        loop = asyncio.get_running_loop()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listener.bind(path)
+            listener.listen()
+            listener.setblocking(False)
+            while True:
+                conn, _ = await loop.sock_accept(listener)
+                conn.setblocking(False)
+                try:
+                    conn.send(SIZE_QUERY)
+                except OSError:
+                    conn.close()
+                    continue
+                self.open(conn.detach())
+        finally:
+            listener.close()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    async def close(self) -> None:
+        """End all sessions and shut down the executor."""
+        sessions = list(self.sessions.values())
+        for session in sessions:
+            session.close()
+        await asyncio.gather(*(s.task for s in sessions if s.task), return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    async def _run(self, session: Session) -> Model:
+        try:
+            return await session.program.run_async()
+        except OSError:
+            # The client went away while the program was exiting
+            return session.program.model
+        except Exception:
+            # One session failing must not take the others down
+            logger.exception("session %d failed", session.id)
+            return session.program.model
+        finally:
+            del self.sessions[session.id]
+            session._release()
+
+
+def connect(path: str, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout) -> None:
+    """
+    Attach the current terminal to a session of a ProgramServer.
+
+    Puts the terminal in raw mode, forwards input and output until either
+    side closes, and reports the window size whenever it changes.
+
+    Args:
+        path: The server's Unix socket
+        stdin: Terminal to read input from
+        stdout: Terminal to write output to
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    in_fd, out_fd = stdin.fileno(), stdout.fileno()
+
+    def report_size(*_: Any) -> None:
+        try:
+            size = os.get_terminal_size(out_fd)
+        except OSError:
+            return
+        sock.sendall(b"\x1b[8;%d;%dt" % (size.lines, size.columns))
+
+    saved = termios.tcgetattr(in_fd) if os.isatty(in_fd) else None
+    previous = signal.signal(signal.SIGWINCH, report_size)
+    try:
+        if saved is not None:
+            tty.setraw(in_fd)
+        report_size()
+        while True:
+            readable, _, _ = select.select([in_fd, sock], [], [])
+            if sock in readable:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(out_fd, view):]
+            if in_fd in readable:
+                data = os.read(in_fd, 65536)
+                if not data:
+                    break
+                sock.sendall(data)
+    finally:
+        signal.signal(signal.SIGWINCH, previous)
+        if saved is not None:
+            termios.tcsetattr(in_fd, termios.TCSADRAIN, saved)
+        sock.close()
+
+
+if __name__ == "__main__":
+    connect(sys.argv[1])
@@ -0,0 +1,239 @@
+"""Hot-path instrumentation for Bubble Tea programs."""
+
+import json
+import logging
+import time
+from bisect import bisect_left
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Sequence, TextIO
+
+from .messages import Msg
+
+
+def _exponential_bounds(start: float, count: int) -> List[float]:
+    """Return ``count`` bucket upper bounds doubling from ``start``."""
+    return [start * 2 ** i for i in range(count)]
+
+
+# 1 µs up to ~34 s
+DURATION_BOUNDS = _exponential_bounds(1e-6, 26)
+
+# 1 up to 32768
+COUNT_BOUNDS = _exponential_bounds(1, 16)
+
+# 64 B up to 4 MiB
+SIZE_BOUNDS = _exponential_bounds(64, 17)
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram.
+
+    Recording a value is a bisect over a short list of bucket bounds plus a
+    few additions, so it is cheap enough for per-message use. Percentiles
+    are estimated from bucket upper bounds.
+    """
+
+    def __init__(self, bounds: Sequence[float] = DURATION_BOUNDS):
+        self.bounds = list(bounds)
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all recorded values."""
+        with self._lock:
+            self.buckets = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = float("inf")
+            self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """Add a value."""
+        with self._lock:
+            self.buckets[bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    @property
+    def mean(self) -> float:
+        """The mean of the recorded values."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Estimate the ``q`` quantile (0-1) as the upper bound of its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return a summary of the recorded values."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class TimedMsg(Msg):
+    """Carries a message through the queue along with the time it was sent."""
+
+    __slots__ = ("msg", "posted")
+
+    def __init__(self, msg: Msg, posted: float):
+        self.msg = msg
+        self.posted = posted
+
+
+class ProgramStats:
+    """
+    Per-phase timings for a running Program.
+
+    Pass an instance as ``Program(stats=...)`` to have the program record:
+
+    - ``queue_wait``: time messages spend queued before being handled
+    - ``update``: time spent in ``model.update``
+    - ``view``: time spent in ``model.view``
+    - ``render``: time the renderer spends diffing and writing a frame
+    - ``frame_bytes``: bytes written per rendered frame
+    - ``command``: how long commands take to run
+    - ``in_flight``: commands running or queued, sampled at each dispatch
+
+    Durations are in seconds. When a program has no stats object none of
+    this is measured.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.queue_wait = Histogram(DURATION_BOUNDS)
+        self.update = Histogram(DURATION_BOUNDS)
+        self.view = Histogram(DURATION_BOUNDS)
+        self.render = Histogram(DURATION_BOUNDS)
+        self.frame_bytes = Histogram(SIZE_BOUNDS)
+        self.command = Histogram(DURATION_BOUNDS)
+        self.in_flight = Histogram(COUNT_BOUNDS)
+        self.bytes_written = 0
+
+    def histograms(self) -> Dict[str, Histogram]:
+        """Return the histograms by name."""
+        return {
+            "queue_wait": self.queue_wait,
+            "update": self.update,
+            "view": self.view,
+            "render": self.render,
+            "frame_bytes": self.frame_bytes,
+            "command": self.command,
+            "in_flight": self.in_flight,
+        }
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        for histogram in self.histograms().values():
+            histogram.reset()
+        self.bytes_written = 0
+        self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all statistics as a JSON-serializable dict."""
+        snapshot: Dict[str, Any] = {
+            "time": time.time(),
+            "uptime": time.time() - self.started,
+            "bytes_written": self.bytes_written,
+        }
+        for name, histogram in self.histograms().items():
+            snapshot[name] = histogram.snapshot()
+        return snapshot
+
+
+class StatsExporter:
+    """
+    Periodically writes a ProgramStats snapshot as a JSON line.
+
+    Snapshots go to ``output`` (a path or an open text file), or are logged
+    at INFO level on ``logger`` if no output is given. Call ``start()`` to
+    begin exporting and ``stop()`` to write a final snapshot and finish.
+    """
+
+    def __init__(
+        self,
+        stats: ProgramStats,
+        output: Optional[Any] = None,
+        *,
+        interval: float = 10.0,
+        logger: Optional[logging.Logger] = None,
+        reset: bool = False,
+    ):
+        """
+        Args:
+            stats: The statistics to export
+            output: File path or text file to append JSON lines to
+            interval: Seconds between snapshots
+            logger: Logger to use when no output is given
+            reset: Reset the statistics after each snapshot, so each line
+                covers one interval
+        """
+        self.stats = stats
+        self.interval = interval
+        self._reset = reset
+        self._output = output
+        self._file: Optional[TextIO] = None
+        self._logger = logger or logging.getLogger("bubbletea.stats")
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> "StatsExporter":
+        """Start exporting in a background thread."""
+        if isinstance(self._output, str):
+            self._file = open(self._output, "a", encoding="utf-8")
+        elif self._output is not None:
+            self._file = self._output
+
+        self._thread = Thread(target=self._run, name="bubbletea-stats", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Write a final snapshot and stop exporting."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.export()
+        if isinstance(self._output, str) and self._file is not None:
+            self._file.close()
+        self._file = None
+
+    def export(self) -> None:
+        """Write one snapshot now."""
+        line = json.dumps(self.stats.snapshot())
+        if self._reset:
+            self.stats.reset()
+        if self._file is not None:
+            self._file.write(line + "\n")
+            self._file.flush()
+        else:
+            self._logger.info(line)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def __enter__(self) -> "StatsExporter":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
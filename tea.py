@@ -1,36 +1,61 @@
 """Core Program class for Bubble Tea."""
 
+import asyncio
+import inspect
 import os
 import sys
 import select
 import signal
 import termios
+import time
 import tty
-from typing import Optional, TextIO, Callable, Any
-from queue import Queue, Empty
-from threading import Thread, Event
+from typing import (
+    Optional, TextIO, Callable, Any, Dict, Iterable, Iterator, List, Sequence, Set, Union,
+)
+from queue import Empty
+from threading import Thread, Event, get_ident
 
 from .model import Model
+from .dispatch import Dispatcher, MAX_DRAIN
 from .messages import (
-    Msg, KeyMsg, MouseMsg, WindowSizeMsg, 
+    Msg, WindowSizeMsg, 
     QuitMsg, FocusMsg, BlurMsg
 )
-from .keys import parse_key
-from .mouse import parse_mouse_event
-from .renderer import Renderer, NullRenderer
-from .commands import Cmd
+from .tokenizer import InputTokenizer, ESC_TIMEOUT, MAX_PASTE_SIZE
+from .coalescer import MotionCoalescer, PendingMotion
+from .stats import ProgramStats, TimedMsg
+from .recorder import SessionRecorder
+from .renderer import Renderer, CellRenderer, NullRenderer
+from .commands import (
+    Cmd, TickCmd, CancellableCmd, BatchCmd, SequenceCmd, WindowTitleMsg, ClearScreenMsg,
+    quit_cmd,
+)
+from .cancel import CancelToken, _current_token
+from .executor import CommandExecutor, ExecutorShare
+from .timers import TimerScheduler
+from .lanes import Mailbox, BLOCK, LANE_INPUT
 from .screen import (
     EnterAltScreenMsg, ExitAltScreenMsg,
     EnableMouseCellMotionMsg, EnableMouseAllMotionMsg, DisableMouseMsg,
     ShowCursorMsg, HideCursorMsg,
 )
 
+# Bytes of input read at once; large enough that a paste arrives in few
+# reads
+READ_SIZE = 64 * 1024
+
+# Messages handled between yields to the asyncio event loop
+ASYNC_YIELD_EVERY = 64
 
-class Program:
+
+class Program(Dispatcher):
     """
     A Bubble Tea program.
     
-    Creates a new TUI application with the given model.
+    Creates a new TUI application with the given model. Run it with
+    ``run()``, which uses threads for input and commands, or from asyncio
+    with ``await run_async()``, which drives the program from the running
+    event loop and lets commands be coroutines.
     """
     
     def __init__(
@@ -43,7 +68,23 @@ class Program:
         mouse_cell_motion: bool = False,
         mouse_all_motion: bool = False,
         bracketed_paste: bool = False,
+        max_paste: int = MAX_PASTE_SIZE,
         fps: int = 60,
+        max_workers: Optional[int] = None,
+        io_workers: Optional[int] = None,
+        coalesce_mouse_motion: bool = False,
+        without_renderer: bool = False,
+        cell_renderer: bool = False,
+        synchronized_output: bool = False,
+        stats: Optional[ProgramStats] = None,
+        shutdown_timeout: float = 0.5,
+        background_limit: Optional[int] = None,
+        overflow: str = BLOCK,
+        message_lanes: Optional[Dict[type, int]] = None,
+        recorder: Optional[SessionRecorder] = None,
+        executor: Optional[CommandExecutor] = None,
+        handle_signals: bool = True,
+        quit_on_eof: bool = False,
     ):
         """
         Initialize a new Program.
@@ -55,10 +96,46 @@ class Program:
             alt_screen: Whether to use alternate screen buffer
             mouse_cell_motion: Enable mouse cell motion tracking
             mouse_all_motion: Enable mouse all motion tracking
-            bracketed_paste: Enable bracketed paste mode
-            fps: Frames per second for rendering
+            bracketed_paste: Enable bracketed paste mode, delivering pasted
+                text as PasteMsg rather than keys
+            max_paste: Bytes of a single paste to keep; the rest is dropped
+            fps: Maximum frames per second for rendering (1-120)
+            max_workers: Maximum number of threads running commands
+            io_workers: Size of a separate pool for commands marked with
+                ``blocking()``; if None they share the general pool
+            coalesce_mouse_motion: Collapse runs of mouse motion events that
+                haven't been processed yet into the latest one
+            without_renderer: Disable rendering, e.g. for daemons or
+                benchmarks; views are still computed but not written
+            cell_renderer: Track changes per cell rather than per line in
+                the alternate screen, so small changes to wide views
+                redraw only the cells that changed
+            synchronized_output: Bracket each frame in DEC mode 2026 so
+                terminals that support it draw frames atomically
+            stats: Record per-phase timings (queue wait, update, view,
+                render, commands) into this ProgramStats
+            shutdown_timeout: How long to wait on exit for cancelled
+                commands to finish before abandoning them
+            background_limit: Bound the queue of background messages
+                (command results, ``send()``); input and resizes are
+                always handled first, and neither they nor control
+                messages are ever bounded
+            overflow: When the background queue is full, ``"block"`` the
+                sender until there is room or ``"drop_oldest"``
+            message_lanes: Route message types to lanes (see lanes.py),
+                e.g. ``{ProgressMsg: LANE_RESIZE}`` to handle it ahead of
+                command results
+            recorder: Record raw input, frames and window sizes (and
+                optionally messages) into this SessionRecorder
+            executor: Run commands on this executor, shared with other
+                programs, instead of pools of the program's own;
+                ``max_workers`` and ``io_workers`` are then ignored
+            handle_signals: Install a SIGWINCH handler to follow the size
+                of the process's terminal; turn off for programs whose
+                terminal is not the process's own
+            quit_on_eof: Quit when the input reaches end of file, e.g.
+                when the client of a socket disconnects
         """
-        self.model = model
         self.input_tty = input_tty or sys.stdin
         self.output = output or sys.stdout
         self._use_alt_screen = alt_screen
@@ -66,12 +143,62 @@ class Program:
         self._mouse_all_motion = mouse_all_motion
         self._bracketed_paste = bracketed_paste
         
-        self._renderer = Renderer(self.output, fps)
-        self._msg_queue: Queue[Msg] = Queue()
+        if without_renderer:
+            self._renderer: Renderer = NullRenderer(self.output, fps)
+        elif cell_renderer:
+            self._renderer = CellRenderer(self.output, fps, synchronized_output)
+        else:
+            self._renderer = Renderer(self.output, fps, synchronized_output)
+        if executor is not None:
+            self.executor: Union[CommandExecutor, ExecutorShare] = executor.share(self)
+        else:
+            self.executor = CommandExecutor(max_workers=max_workers, io_workers=io_workers)
+        self._handle_signals = handle_signals
+        self._quit_on_eof = quit_on_eof
+        
+        # Session recording; frames are tapped from the renderer's output
+        self.recorder = recorder
+        self._record_msg: Optional[Callable[[Msg], None]] = None
+        if recorder is not None:
+            self._renderer.tap = recorder.output
+            if recorder.messages:
+                self._record_msg = recorder.message
+        self.timers = TimerScheduler()
+        super().__init__(model, stats)
+        self.shutdown_timeout = shutdown_timeout
+        
+        # Cancelled on exit; commands see it through current_token()
+        self._cancel = CancelToken()
+        self._mailbox = Mailbox(background_limit, overflow)
+        for msg_type, lane in (message_lanes or {}).items():
+            self._mailbox.set_lane(msg_type, lane)
+        self._loop_thread: Optional[int] = None
         self._quit = Event()
         self._running = False
         self._old_termios: Optional[list] = None
         self._input_thread: Optional[Thread] = None
+        
+        # Self-pipe used to wake the input reader thread on shutdown
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+        
+        # Set while running under asyncio (see run_async)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._input_fd: Optional[int] = None
+        self._tokenizer = InputTokenizer(max_paste=max_paste)
+        self._esc_timer: Optional[asyncio.TimerHandle] = None
+        
+        # Collapses mouse motion floods; coalescer.merged counts the events
+        # folded away
+        self.coalescer: Optional[MotionCoalescer] = None
+        if coalesce_mouse_motion:
+            self.coalescer = MotionCoalescer()
+        
+        # Frame scheduling: the view is only rendered when the model has
+        # changed, and at most once per frame interval
+        self._next_frame = 0.0
     
     def run(self) -> Model:
         """
@@ -81,10 +208,12 @@ class Program:
             The final model state
         """
         self._running = True
+        self._mailbox.set_consumer()
         
         try:
             self._setup_terminal()
-            self._setup_signals()
+            if self._handle_signals:
+                self._setup_signals()
             
             # Initialize model
             cmd = self.model.init()
@@ -105,98 +234,518 @@ class Program:
         
         return self.model
     
+    async def run_async(self) -> Model:
+        """
+        Run the program on the running asyncio event loop until it exits.
+        
+        Input is read with ``loop.add_reader`` and window resizes arrive
+        through ``loop.add_signal_handler``, so no threads are needed for
+        either. Commands may be coroutine functions, or return a coroutine,
+        in which case they run as tasks on the loop; plain commands still
+        run on the worker pool.
+        
+        Returns:
+            The final model state
+        """
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._loop_thread = get_ident()
+        self._mailbox.set_consumer()
+        
+        try:
+            self._setup_terminal()
+            if self._handle_signals:
+                self._setup_async_signals()
+            if self._renderer._fd is not None and not os.get_blocking(self._renderer._fd):
+                # Don't let a slow terminal stall the loop
+                self._renderer.attach_loop(self._loop)
+            
+            # Initialize model
+            cmd = self.model.init()
+            if cmd is not None:
+                self._execute_cmd(cmd)
+            
+            # Initial render
+            self._render()
+            
+            # Watch the input for readability
+            self._start_async_input_reader()
+            
+            # Main event loop
+            await self._async_event_loop()
+            
+        finally:
+            self._stop_async()
+            if self._tasks:
+                # Give cancelled coroutine commands a chance to clean up
+                await asyncio.wait(list(self._tasks), timeout=self.shutdown_timeout)
+            self._cleanup()
+            try:
+                # Let a slow terminal take the last of the output while the
+                # loop runs other work, rather than blocking on it
+                await self._renderer.drain(self._renderer.write_timeout)
+            finally:
+                self._renderer.detach_loop()
+        
+        return self.model
+    
     def quit(self) -> None:
         """Signal the program to quit."""
         self._quit.set()
-        self._msg_queue.put(QuitMsg())
+        self._post(QuitMsg())
     
     def send(self, msg: Msg) -> None:
         """Send a message to the program."""
-        self._msg_queue.put(msg)
+        self._post(msg)
+    
+    def send_many(self, msgs: Iterable[Msg]) -> None:
+        """
+        Send several messages to the program at once.
+        
+        The messages are queued together, with no other sender's messages
+        in between, and the event loop is woken once. They are handled in
+        a single loop iteration where possible, and passed to the model's
+        ``update_batch`` in one call if it has one.
+        """
+        if self._cancel.cancelled:
+            return
+        
+        mailbox = self._mailbox
+        if self.stats is None:
+            batch = [(msg, mailbox.lane(msg)) for msg in msgs]
+        else:
+            now = time.perf_counter()
+            batch = [(TimedMsg(msg, now), mailbox.lane(msg)) for msg in msgs]
+        mailbox.put_many(batch)
+        self._wake_loop()
+    
+    def _post(self, msg: Msg, lane: Optional[int] = None) -> None:
+        """Deliver a message to the event loop from any thread."""
+        if self._cancel.cancelled:
+            # The program has exited
+            return
+        
+        if lane is None:
+            lane = self._mailbox.lane(msg)
+        if self.stats is not None:
+            msg = TimedMsg(msg, time.perf_counter())
+        self._mailbox.put(msg, lane)
+        self._wake_loop()
+    
+    def _wake_loop(self) -> None:
+        """Wake the asyncio event loop, if running under one, for new messages."""
+        wakeup = self._wakeup
+        if wakeup is not None and not wakeup.is_set():
+            if get_ident() == self._loop_thread:
+                wakeup.set()
+            else:
+                try:
+                    self._loop.call_soon_threadsafe(wakeup.set)  # type: ignore
+                except RuntimeError:
+                    # The event loop has already been closed
+                    pass
     
     def _event_loop(self) -> None:
         """Main event loop."""
         while not self._quit.is_set():
+            if not self._fire_timers():
+                break
             try:
-                # Wait for a message
-                msg = self._msg_queue.get(timeout=0.1)
+                # Wait for messages, or until the next frame or timer is due
+                msgs = self._mailbox.get_many(MAX_DRAIN, self._wait_timeout())
             except Empty:
+                self._flush_frame()
                 continue
             
-            # Handle special messages
-            if isinstance(msg, QuitMsg):
+            if not self._handle_msgs(msgs):
                 break
-            
-            # Handle screen control messages
-            if isinstance(msg, EnterAltScreenMsg):
-                self._renderer.enter_alt_screen()
-                continue
-            elif isinstance(msg, ExitAltScreenMsg):
-                self._renderer.exit_alt_screen()
-                continue
-            elif isinstance(msg, EnableMouseCellMotionMsg):
-                self._renderer.enable_mouse(all_motion=False)
-                continue
-            elif isinstance(msg, EnableMouseAllMotionMsg):
-                self._renderer.enable_mouse(all_motion=True)
-                continue
-            elif isinstance(msg, DisableMouseMsg):
-                self._renderer.disable_mouse()
-                continue
-            elif isinstance(msg, ShowCursorMsg):
-                self._renderer.show_cursor()
-                continue
-            elif isinstance(msg, HideCursorMsg):
-                self._renderer.hide_cursor()
+        
+        # Make sure the final state is on screen
+        if self._dirty:
+            self._render()
+    
+    async def _async_event_loop(self) -> None:
+        """Main event loop when running under asyncio."""
+        mailbox = self._mailbox
+        wakeup = self._wakeup
+        assert wakeup is not None
+        
+        handled = 0
+        while not self._quit.is_set():
+            if not self._fire_timers():
+                break
+            wakeup.clear()
+            try:
+                msgs = mailbox.get_many(ASYNC_YIELD_EVERY, 0)
+            except Empty:
+                try:
+                    # Wait for a message, or until the next frame or timer is due
+                    await asyncio.wait_for(wakeup.wait(), self._wait_timeout())
+                except asyncio.TimeoutError:
+                    self._flush_frame()
                 continue
             
-            # Update model
-            self.model, cmd = self.model.update(msg)
+            if not self._handle_msgs(msgs):
+                break
             
-            # Execute command if any
-            if cmd is not None:
-                self._execute_cmd(cmd)
+            handled += len(msgs)
+            if handled >= ASYNC_YIELD_EVERY:
+                # Let the loop run its callbacks, including the input reader,
+                # while a backlog of messages is drained
+                handled = 0
+                await asyncio.sleep(0)
+        
+        # Make sure the final state is on screen
+        if self._dirty:
+            self._render()
+    
+    def _handle_msg(self, msg: Msg) -> bool:
+        """
+        Process a single message.
+        
+        Returns:
+            False if the program should quit, True otherwise
+        """
+        return self._handle_msgs((msg,))
+    
+    def _handle_msgs(self, msgs: Sequence[Msg]) -> bool:
+        """
+        Process messages taken from the queue together.
+        
+        Runs of messages for the model go to its ``update_batch`` if it
+        has one (see Dispatcher). Either way the view is rendered at most
+        once.
+        
+        Returns:
+            False if the program should quit, True otherwise
+        """
+        received: Iterable[Msg] = msgs
+        if self.stats is not None or self.coalescer is not None or self._record_msg is not None:
+            received = self._receive(msgs)
+        if not self._deliver(received):
+            return False
+        
+        # Render if a frame is due; bursts of updates between frames
+        # are collapsed into a single render
+        self._flush_frame()
+        return True
+    
+    def _receive(self, msgs: Sequence[Msg]) -> Iterator[Msg]:
+        """Unwrap queued messages, recording their time in the queue."""
+        stats = self.stats
+        record = self._record_msg
+        for msg in msgs:
+            if stats is not None and type(msg) is TimedMsg:
+                stats.queue_wait.record(time.perf_counter() - msg.posted)
+                msg = msg.msg
+            
+            # Unwrap coalesced mouse motion
+            if type(msg) is PendingMotion:
+                msg = self.coalescer.take(msg)  # type: ignore
             
-            # Render
+            if record is not None:
+                record(msg)
+            yield msg
+    
+    def _screen_effects(self) -> Dict[type, Callable[[], None]]:
+        """The renderer sends screen changes out with the next frame."""
+        renderer = self._renderer
+        return {
+            EnterAltScreenMsg: renderer.enter_alt_screen,
+            ExitAltScreenMsg: renderer.exit_alt_screen,
+            EnableMouseCellMotionMsg: lambda: renderer.enable_mouse(all_motion=False),
+            EnableMouseAllMotionMsg: lambda: renderer.enable_mouse(all_motion=True),
+            DisableMouseMsg: renderer.disable_mouse,
+            ShowCursorMsg: renderer.show_cursor,
+            HideCursorMsg: renderer.hide_cursor,
+            ClearScreenMsg: renderer.clear,
+        }
+    
+    def _handle_window_size(self, msg: WindowSizeMsg) -> None:
+        # The model gets the message too
+        self._renderer.resize(msg.width, msg.height)
+        if self.recorder is not None:
+            self.recorder.size(msg.width, msg.height)
+        return None
+    
+    def _handle_window_title(self, msg: WindowTitleMsg) -> bool:
+        self._renderer.set_window_title(msg.title)
+        self._dirty = True
+        return True
+    
+    def _wait_timeout(self) -> Optional[float]:
+        """
+        Return how long the event loop may block waiting for a message.
+        
+        The loop wakes up for the next frame if there is something to
+        render, and for the next timer. Otherwise it blocks until a message
+        arrives; quitting, resizes and input all post one, so an idle
+        program never wakes up.
+        """
+        deadline = self.timers.next_deadline()
+        if self._dirty and (deadline is None or self._next_frame < deadline):
+            deadline = self._next_frame
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+    
+    def _fire_timers(self) -> bool:
+        """
+        Handle the messages of timers that are due.
+        
+        Returns:
+            False if one of them quit the program, True otherwise
+        """
+        for msg in self.timers.pop_due():
+            if not self._handle_msg(msg):
+                return False
+        return True
+    
+    def _flush_frame(self) -> None:
+        """Render the view if the model is dirty and a frame is due."""
+        if self._dirty and time.monotonic() >= self._next_frame:
             self._render()
     
     def _render(self) -> None:
         """Render the current view."""
-        view = self.model.view()
-        self._renderer.render(view)
+        stats = self.stats
+        if stats is None:
+            self._renderer.render(self._view())
+        else:
+            start = time.perf_counter()
+            view = self._view()
+            rendered = time.perf_counter()
+            written = self._renderer.render(view)
+            done = time.perf_counter()
+            stats.view.record(rendered - start)
+            stats.render.record(done - rendered)
+            if written:
+                stats.frame_bytes.record(written)
+                stats.bytes_written += written
+        self._dirty = False
+        self._next_frame = time.monotonic() + self._renderer.frame_interval
     
     def _execute_cmd(self, cmd: Cmd) -> None:
         """Execute a command."""
-        # Handle batch commands
-        if hasattr(cmd, '_batch_cmds'):
-            for c in cmd._batch_cmds:  # type: ignore
-                self._execute_cmd_async(c)
+        kind = type(cmd)
+        
+        # Batches are flattened when built, fan their commands out
+        if kind is BatchCmd:
+            for c in cmd.cmds:  # type: ignore
+                self._execute_cmd(c)
             return
         
-        # Handle sequence commands
-        if hasattr(cmd, '_sequence_cmds'):
-            for c in cmd._sequence_cmds:  # type: ignore
-                result = c()
-                if result is not None:
-                    self._msg_queue.put(result)
+        # Sequences wait on each step, so they run on a worker rather than
+        # blocking the event loop
+        if kind is SequenceCmd:
+            self.executor.submit(self._run_sequence, cmd, blocking=True)
+            return
+        
+        # Quitting needs no worker, and must not wait behind queued command
+        # results; only a sequence orders it after other steps
+        if cmd is quit_cmd:
+            self._post(QuitMsg(), LANE_INPUT)
             return
         
         # Single command - execute in thread to not block
         self._execute_cmd_async(cmd)
     
     def _execute_cmd_async(self, cmd: Cmd) -> None:
-        """Execute a command asynchronously."""
-        def run():
+        """Execute a command asynchronously on the worker pool."""
+        if self.stats is not None:
+            self.stats.in_flight.record(
+                self.executor.in_flight + self.executor.queue_depth + len(self._tasks)
+            )
+        
+        if isinstance(cmd, TickCmd):
+            # Timers fire from the event loop, not a worker
+            self.timers.schedule(cmd)
+            return
+        
+        token = self._acquire_token(cmd)
+        if token is None:
+            return
+        
+        if self._loop is not None and inspect.iscoroutinefunction(cmd):
+            self._start_task(cmd(), token)
+            return
+        
+        self.executor.submit(
+            self._run_cmd, cmd, token, blocking=getattr(cmd, '_blocking', False)
+        )
+    
+    def _run_sequence(self, cmd: SequenceCmd) -> None:
+        """Run the steps of a sequence in order on this worker."""
+        for step in cmd.cmds:
+            if self._cancel.cancelled:
+                return
+            self._run_step(step)
+    
+    def _run_step(self, cmd: Cmd) -> None:
+        """Run a command on this worker, returning once its message was posted."""
+        if self._cancel.cancelled:
+            return
+        
+        kind = type(cmd)
+        if kind is SequenceCmd:
+            self._run_sequence(cmd)  # type: ignore
+            return
+        
+        if kind is BatchCmd:
+            # Run the batch concurrently and wait for all of it
+            cmds = cmd.cmds  # type: ignore
+            submit = self.executor.submit
+            futures = [
+                (c, submit(self._run_step, c, blocking=getattr(c, '_blocking', False)))
+                for c in cmds[1:]
+            ]
+            self._run_step(cmds[0])
+            for c, future in futures:
+                if future.cancel():
+                    # No worker has picked it up yet, run it here rather
+                    # than wait for one
+                    self._run_step(c)
+                else:
+                    future.result()
+            return
+        
+        if kind is TickCmd:
+            # Wait here; the next step must not start before the tick
+            if self._cancel.wait(cmd.delay(time.time())) or cmd.cancelled:  # type: ignore
+                return
             try:
+                msg = cmd.fn()  # type: ignore
+            except Exception:
+                # Like a failing command, deliver nothing and go on
+                return
+            if msg is not None:
+                self._post(msg)
+            return
+        
+        token = self._acquire_token(cmd)
+        if token is not None:
+            self._run_cmd(cmd, token, wait=True)
+    
+    def _acquire_token(self, cmd: Cmd) -> Optional[CancelToken]:
+        """
+        Return the token a command runs under.
+        
+        Cancellable commands run under their own token, other commands
+        under a new one, so the callbacks a command registers are dropped
+        with its token when it finishes. Quitting cancels them all.
+        
+        Returns:
+            The token, or None if the command was already cancelled
+        """
+        if isinstance(cmd, CancellableCmd):
+            if cmd.cancelled:
+                return None
+            token = cmd.token
+        else:
+            token = CancelToken()
+        self._cancel.add_callback(token.cancel)
+        return token
+    
+    def _release_token(self, token: CancelToken) -> None:
+        """Unlink a finished command's token from the program's."""
+        self._cancel.remove_callback(token.cancel)
+    
+    def _run_cmd(self, cmd: Cmd, token: CancelToken, wait: bool = False) -> None:
+        """
+        Run a command on a worker and deliver its result.
+        
+        Args:
+            cmd: The command
+            token: The token it runs under
+            wait: Set for a step of a sequence: a coroutine the command
+                returns is awaited before returning, and a QuitMsg keeps
+                its place behind earlier results rather than going first
+        """
+        if token.cancelled:
+            self._release_token(token)
+            return
+        
+        reset = _current_token.set(token)
+        handed_off = False
+        done: Optional[Event] = None
+        try:
+            if self.stats is None:
+                result: Any = cmd()
+            else:
+                start = time.perf_counter()
                 result = cmd()
-                if result is not None:
-                    self._msg_queue.put(result)
-            except Exception as e:
-                # Log or handle error
-                pass
+                self.stats.command.record(time.perf_counter() - start)
+            if inspect.iscoroutine(result):
+                if self._loop is not None:
+                    # Hand the coroutine over to the program's event loop
+                    finished = Event()
+                    self._loop.call_soon_threadsafe(
+                        self._start_task, result, token, finished.set if wait else None
+                    )
+                    handed_off = True
+                    if wait:
+                        done = finished
+                    result = None
+                else:
+                    result = asyncio.run(result)
+            if result is not None and not token.cancelled:
+                if type(result) is QuitMsg and not wait:
+                    # Not a sequence step, so nothing has to be handled first
+                    self._post(result, LANE_INPUT)
+                else:
+                    self._post(result)
+        except Exception:
+            # Log or handle error
+            pass
+        finally:
+            _current_token.reset(reset)
+            if not handed_off:
+                self._release_token(token)
+        
+        if done is not None:
+            done.wait()
+    
+    def _start_task(
+        self, coro: Any, token: CancelToken, on_done: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Run a coroutine command as a task on the program's event loop."""
+        loop = self._loop
+        assert loop is not None
+        task = loop.create_task(self._run_async_cmd(coro, token))
+        
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._tasks.add(task)
+        
+        # Cancelling the token cancels the task, from any thread
+        def cancel_task() -> None:
+            loop.call_soon_threadsafe(task.cancel)
         
-        thread = Thread(target=run, daemon=True)
-        thread.start()
+        def done(task: "asyncio.Task[None]") -> None:
+            self._tasks.discard(task)
+            token.remove_callback(cancel_task)
+            self._release_token(token)
+            if on_done is not None:
+                on_done()
+        
+        task.add_done_callback(done)
+        token.add_callback(cancel_task)
+    
+    async def _run_async_cmd(self, coro: Any, token: CancelToken) -> None:
+        """Await a coroutine command and deliver its result."""
+        _current_token.set(token)
+        try:
+            start = time.perf_counter()
+            result = await coro
+            if self.stats is not None:
+                self.stats.command.record(time.perf_counter() - start)
+            if result is not None and not token.cancelled:
+                self._post(result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Log or handle error
+            pass
     
     def _setup_terminal(self) -> None:
         """Set up the terminal for raw mode."""
@@ -206,6 +755,14 @@ class Program:
             self._old_termios = termios.tcgetattr(fd)
             tty.setraw(fd)
         
+        # Let the renderer know the size of the screen
+        if self.output.isatty():
+            try:
+                size = os.get_terminal_size(self.output.fileno())
+                self._renderer.resize(size.columns, size.lines)
+            except (OSError, ValueError):
+                pass
+        
         # Enter alt screen if requested
         if self._use_alt_screen:
             self._renderer.enter_alt_screen()
@@ -221,16 +778,25 @@ class Program:
         
         # Bracketed paste
         if self._bracketed_paste:
-            self.output.write("\x1b[?2004h")
-            self.output.flush()
+            self._renderer.enable_bracketed_paste()
     
     def _cleanup(self) -> None:
         """Clean up terminal state."""
         self._quit.set()
         
-        # Wait for input thread
+        # Tell running commands to stop and drop their results
+        self._cancel.cancel()
+        self._mailbox.close()
+        
+        # Wake the input thread and wait for it
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"\0")
+            except OSError:
+                pass
         if self._input_thread and self._input_thread.is_alive():
             self._input_thread.join(timeout=0.5)
+        self._close_wake_pipe()
         
         # Restore terminal
         if self._old_termios is not None and self.input_tty.isatty():
@@ -239,69 +805,182 @@ class Program:
         
         # Disable bracketed paste
         if self._bracketed_paste:
-            self.output.write("\x1b[?2004l")
-            self.output.flush()
+            self._renderer.disable_bracketed_paste()
+        
+        # Drop commands that haven't started yet and give the running ones
+        # a moment to notice they were cancelled
+        self.executor.shutdown(wait=True, timeout=self.shutdown_timeout)
+        self.timers.clear()
         
         # Clean up renderer
         self._renderer.close()
         
         # Print newline for clean exit
-        self.output.write("\n")
-        self.output.flush()
+        if self._renderer._loop is not None:
+            # Behind whatever the terminal hasn't taken yet
+            self._renderer.write("\n")
+        else:
+            self.output.write("\n")
+            self.output.flush()
     
     def _setup_signals(self) -> None:
         """Set up signal handlers."""
         def handle_resize(signum, frame):
-            try:
-                size = os.get_terminal_size()
-                self._msg_queue.put(WindowSizeMsg(size.columns, size.lines))
-            except OSError:
-                pass
+            self._on_resize()
         
         signal.signal(signal.SIGWINCH, handle_resize)
     
+    def _setup_async_signals(self) -> None:
+        """Set up signal handlers on the asyncio event loop."""
+        assert self._loop is not None
+        try:
+            self._loop.add_signal_handler(signal.SIGWINCH, self._on_resize)
+        except (ValueError, RuntimeError, NotImplementedError):
+            # Not the main thread, or the platform has no SIGWINCH
+            pass
+    
+    def _on_resize(self) -> None:
+        """Report the new terminal size."""
+        try:
+            size = os.get_terminal_size()
+            self._post(WindowSizeMsg(size.columns, size.lines))
+        except OSError:
+            pass
+    
+    def _handle_input(self, data: bytes) -> None:
+        """Turn a chunk of raw input into messages, one per sequence."""
+        if self.recorder is not None:
+            self.recorder.input(data)
+        self._post_input(self._tokenizer.feed(data))
+    
+    def _flush_input(self) -> None:
+        """Deliver input left pending by an incomplete sequence."""
+        self._esc_timer = None
+        self._post_input(self._tokenizer.flush())
+    
+    def _post_input(self, msgs: List[Msg]) -> None:
+        """Deliver input messages, coalescing mouse motion if enabled."""
+        coalescer = self.coalescer
+        for msg in msgs:
+            if coalescer is not None:
+                pushed = coalescer.push(msg)
+                if pushed is None:
+                    continue
+                msg = pushed
+            self._post(msg, LANE_INPUT)
+    
     def _start_input_reader(self) -> None:
         """Start the input reader thread."""
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_w, False)
+        wake_r = self._wake_r
+        
         def read_input():
             fd = self.input_tty.fileno()
             
             while not self._quit.is_set():
-                # Use select to avoid blocking
+                # Block until there is input or we're woken up to quit; if a
+                # sequence is incomplete only wait briefly for the rest of it
                 if sys.platform != 'win32':
-                    readable, _, _ = select.select([fd], [], [], 0.1)
+                    pending = self._tokenizer.pending
+                    timeout = ESC_TIMEOUT if pending else None
+                    readable, _, _ = select.select([fd, wake_r], [], [], timeout)
+                    if wake_r in readable:
+                        break
                     if not readable:
+                        if pending:
+                            self._flush_input()
                         continue
                 
                 try:
                     # Read available input
-                    data = os.read(fd, 256)
+                    data = os.read(fd, READ_SIZE)
                     if not data:
-                        continue
+                        # End of input
+                        self._on_eof()
+                        break
                     
-                    # Try to parse as mouse event first
-                    mouse_event = parse_mouse_event(data)
-                    if mouse_event:
-                        self._msg_queue.put(MouseMsg(
-                            x=mouse_event.x,
-                            y=mouse_event.y,
-                            button=mouse_event.button.value,
-                            action=mouse_event.action.name.lower(),
-                            alt=mouse_event.alt,
-                            ctrl=mouse_event.ctrl,
-                            shift=mouse_event.shift,
-                        ))
-                        continue
-                    
-                    # Parse as key
-                    key = parse_key(data)
-                    if key:
-                        self._msg_queue.put(KeyMsg(key=key))
+                    self._handle_input(data)
                 
                 except OSError:
+                    self._on_eof()
                     break
         
         self._input_thread = Thread(target=read_input, daemon=True)
         self._input_thread.start()
+    
+    def _on_eof(self) -> None:
+        """Handle the end of the input."""
+        if self._quit_on_eof and not self._quit.is_set():
+            self.quit()
+    
+    def _close_wake_pipe(self) -> None:
+        """Close the input reader's self-pipe."""
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._wake_r = self._wake_w = None
+    
+    def _start_async_input_reader(self) -> None:
+        """Read input from the asyncio event loop."""
+        assert self._loop is not None
+        try:
+            fd = self.input_tty.fileno()
+        except (AttributeError, OSError, ValueError):
+            # Input has no file descriptor to watch
+            return
+        
+        def on_readable() -> None:
+            try:
+                data = os.read(fd, READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                self._loop.remove_reader(fd)  # type: ignore
+                self._on_eof()
+                return
+            if not data:
+                # End of input
+                self._loop.remove_reader(fd)  # type: ignore
+                self._on_eof()
+                return
+            
+            if self._esc_timer is not None:
+                self._esc_timer.cancel()
+                self._esc_timer = None
+            self._handle_input(data)
+            
+            # Give an incomplete sequence a moment to complete
+            if self._tokenizer.pending:
+                self._esc_timer = self._loop.call_later(  # type: ignore
+                    ESC_TIMEOUT, self._flush_input
+                )
+        
+        self._loop.add_reader(fd, on_readable)
+        self._input_fd = fd
+    
+    def _stop_async(self) -> None:
+        """Detach from the asyncio event loop."""
+        assert self._loop is not None
+        if self._input_fd is not None:
+            self._loop.remove_reader(self._input_fd)
+            self._input_fd = None
+        if self._esc_timer is not None:
+            self._esc_timer.cancel()
+            self._esc_timer = None
+        if self._handle_signals:
+            try:
+                self._loop.remove_signal_handler(signal.SIGWINCH)
+            except (ValueError, RuntimeError, NotImplementedError):
+                pass
+        
+        # Coroutine commands die with the program
+        self._cancel.cancel()
+        for task in list(self._tasks):
+            task.cancel()
 
 
 # Convenience functions for creating programs with options
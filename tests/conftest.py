@@ -0,0 +1,16 @@
+"""Make the package importable as ``bubbletea`` from a source checkout."""
+
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "bubbletea" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "bubbletea", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["bubbletea"] = module
+    spec.loader.exec_module(module)
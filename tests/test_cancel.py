@@ -0,0 +1,62 @@
+"""Tests for command cancellation tokens."""
+
+import io
+import os
+
+import bubbletea as tea
+from bubbletea.cancel import current_token
+
+
+def test_fallback_token_cannot_be_cancelled():
+    token = current_token()
+    called = []
+    token.add_callback(lambda: called.append(True))
+    token.cancel()
+    assert not token.cancelled
+    assert not current_token().cancelled
+    assert not called
+    assert not current_token().wait(0)
+
+
+class Watcher(tea.Model):
+    """Runs commands that leave a callback on their token, then checks the program's."""
+
+    def __init__(self) -> None:
+        self.program = None
+        self.left = None
+
+    def init(self):
+        def work():
+            current_token().add_callback(lambda: None)
+            return None
+
+        return tea.sequence(tea.batch(*[work] * 50), lambda: "check")
+
+    def update(self, msg):
+        if msg == "check":
+            self.left = len(self.program._cancel._callbacks)
+            return self, tea.quit_cmd
+        return self, None
+
+    def view(self) -> str:
+        return ""
+
+
+def test_finished_commands_leave_no_callbacks():
+    read_fd, write_fd = os.pipe()
+    try:
+        with os.fdopen(read_fd) as input_tty:
+            model = Watcher()
+            program = tea.Program(model, input_tty=input_tty, output=io.StringIO())
+            model.program = program
+            program.run()
+    finally:
+        os.close(write_fd)
+    assert model.left == 0
+
+
+def test_finished_commands_leave_no_callbacks_headless():
+    model = Watcher()
+    model.program = tea.HeadlessProgram(model)
+    model.program.run()
+    assert model.left == 0
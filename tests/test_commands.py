@@ -0,0 +1,127 @@
+"""Tests for batch and sequence ordering, on a Program and the headless driver."""
+
+import io
+import os
+from dataclasses import dataclass
+
+import pytest
+
+import bubbletea as tea
+
+
+@dataclass(frozen=True)
+class Got(tea.Msg):
+    name: str
+
+
+def got(name: str):
+    return lambda: Got(name)
+
+
+class Recorder(tea.Model):
+    def __init__(self, cmd) -> None:
+        self.cmd = cmd
+        self.got = []
+
+    def init(self):
+        return self.cmd
+
+    def update(self, msg):
+        if isinstance(msg, Got):
+            self.got.append(msg.name)
+        return self, None
+
+    def view(self) -> str:
+        return ""
+
+
+def run_program(cmd):
+    read_fd, write_fd = os.pipe()
+    try:
+        with os.fdopen(read_fd) as input_tty:
+            return tea.Program(Recorder(cmd), input_tty=input_tty, output=io.StringIO()).run()
+    finally:
+        os.close(write_fd)
+
+
+def run_headless(cmd):
+    driver = tea.HeadlessProgram(Recorder(cmd))
+    return driver.run()
+
+
+DRIVERS = [run_program, run_headless]
+
+
+@pytest.mark.parametrize("run", DRIVERS)
+def test_sequence_waits_for_ticks_in_batch(run):
+    cmd = tea.sequence(
+        tea.batch(tea.tick(0.2, got("A")), got("B")), got("C"), tea.quit_cmd
+    )
+    assert run(cmd).got == ["B", "A", "C"]
+
+
+@pytest.mark.parametrize("run", DRIVERS)
+def test_sequence_steps_in_order(run):
+    cmd = tea.sequence(
+        got("a"),
+        tea.tick(0.05, got("tick")),
+        tea.sequence(got("s1"), got("s2")),
+        got("z"),
+        tea.quit_cmd,
+    )
+    assert run(cmd).got == ["a", "tick", "s1", "s2", "z"]
+
+
+@pytest.mark.parametrize("run", DRIVERS)
+def test_batch_of_ticks_fires_by_deadline(run):
+    cmd = tea.sequence(
+        tea.batch(tea.tick(0.1, got("slow")), tea.tick(0.02, got("fast"))), tea.quit_cmd
+    )
+    assert run(cmd).got == ["fast", "slow"]
+
+
+@pytest.mark.parametrize("run", DRIVERS)
+def test_nested_sequence_in_batch(run):
+    cmd = tea.sequence(
+        tea.batch(tea.sequence(tea.tick(0.05, got("x1")), got("x2")), tea.tick(0.02, got("y"))),
+        got("end"),
+        tea.quit_cmd,
+    )
+    assert run(cmd).got == ["y", "x1", "x2", "end"]
+
+
+@pytest.mark.parametrize("run", DRIVERS)
+def test_sequence_of_batches_with_ticks(run):
+    cmd = tea.sequence(
+        tea.batch(tea.tick(0.05, got("a1")), got("a2")),
+        tea.batch(tea.tick(0.02, got("b1")), tea.batch(tea.tick(0.01, got("b2")))),
+        tea.tick(0.01, got("c")),
+        tea.quit_cmd,
+    )
+    assert run(cmd).got == ["a2", "a1", "b2", "b1", "c"]
+
+
+def boom():
+    raise RuntimeError("boom")
+
+
+@pytest.mark.parametrize("in_sequence", [False, True])
+def test_failing_tick_does_not_stop_program(in_sequence):
+    if in_sequence:
+        cmd = tea.batch(
+            tea.sequence(tea.tick(0.01, boom), got("after"), tea.quit_cmd),
+            # Don't hang if the sequence stops
+            tea.tick(2, lambda: tea.QuitMsg()),
+        )
+    else:
+        cmd = tea.batch(
+            tea.tick(0.01, boom),
+            tea.tick(0.05, got("after")),
+            tea.tick(0.1, lambda: tea.QuitMsg()),
+        )
+    assert run_program(cmd).got == ["after"]
+
+
+def test_failing_tick_fails_headless_run():
+    with pytest.raises(RuntimeError, match="boom"):
+        run_headless(tea.batch(tea.tick(0.01, boom), tea.tick(0.05, lambda: tea.QuitMsg())))
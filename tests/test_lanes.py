@@ -0,0 +1,121 @@
+"""Tests for the prioritized message queue."""
+
+import asyncio
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+import bubbletea as tea
+from bubbletea.lanes import DROP_OLDEST, Mailbox
+
+
+@dataclass(frozen=True)
+class Saved(tea.Msg):
+    n: int
+
+
+def test_control_keeps_order_with_background():
+    mailbox = Mailbox()
+    mailbox.put(Saved(1))
+    mailbox.put(tea.QuitMsg())
+    mailbox.put(Saved(2))
+    mailbox.put(tea.KeyMsg("a"))
+    assert mailbox.get_many(10) == [tea.KeyMsg("a"), Saved(1), tea.QuitMsg(), Saved(2)]
+
+
+def test_control_keeps_order_one_at_a_time():
+    mailbox = Mailbox()
+    mailbox.put(Saved(1))
+    mailbox.put(tea.QuitMsg())
+    mailbox.put(tea.WindowSizeMsg(80, 24))
+    assert mailbox.get_many(1) == [tea.WindowSizeMsg(80, 24)]
+    assert mailbox.get_many(1) == [Saved(1)]
+    assert mailbox.get_many(1) == [tea.QuitMsg()]
+
+
+def test_control_is_never_dropped():
+    mailbox = Mailbox(background_limit=1, overflow=DROP_OLDEST)
+    mailbox.put(tea.QuitMsg())
+    mailbox.put(Saved(1))
+    mailbox.put(Saved(2))
+    assert mailbox.get_many(10) == [tea.QuitMsg(), Saved(2)]
+    assert mailbox.dropped == 1
+
+
+class SaveThenQuit(tea.Model):
+    def __init__(self) -> None:
+        self.saved = []
+
+    def init(self):
+        return tea.sequence(lambda: Saved(len(self.saved)), tea.quit_cmd)
+
+    def update(self, msg):
+        if isinstance(msg, Saved):
+            self.saved.append(msg.n)
+        return self, None
+
+    def view(self) -> str:
+        return ""
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_sequence_delivers_before_quit(run_async):
+    for _ in range(20):
+        read_fd, write_fd = os.pipe()
+        try:
+            with os.fdopen(read_fd) as input_tty:
+                program = tea.Program(SaveThenQuit(), input_tty=input_tty, output=io.StringIO())
+                model = asyncio.run(program.run_async()) if run_async else program.run()
+        finally:
+            os.close(write_fd)
+        assert model.saved == [0]
+
+
+class Flood(tea.Msg):
+    pass
+
+
+class QuitOnKey(tea.Model):
+    def __init__(self) -> None:
+        self.floods = 0
+
+    def init(self):
+        return None
+
+    def update(self, msg):
+        if isinstance(msg, Flood):
+            self.floods += 1
+            time.sleep(0.0002)
+        elif isinstance(msg, tea.KeyMsg) and msg.key == "q":
+            return self, tea.quit_cmd
+        return self, None
+
+    def view(self) -> str:
+        return ""
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_quit_cmd_skips_background_flood(run_async):
+    read_fd, write_fd = os.pipe()
+    try:
+        with os.fdopen(read_fd) as input_tty:
+            program = tea.Program(QuitOnKey(), input_tty=input_tty, output=io.StringIO())
+
+            def flood_then_quit() -> None:
+                time.sleep(0.1)
+                program.send_many([Flood()] * 40000)
+                os.write(write_fd, b"q")
+
+            threading.Thread(target=flood_then_quit).start()
+            start = time.monotonic()
+            model = asyncio.run(program.run_async()) if run_async else program.run()
+            elapsed = time.monotonic() - start
+    finally:
+        os.close(write_fd)
+    # Handling the whole flood would take about 8 seconds
+    assert model.floods < 40000
+    assert elapsed < 2.0
@@ -0,0 +1,68 @@
+"""Tests for session recording and replay."""
+
+import io
+import os
+import pty
+import time
+
+import bubbletea as tea
+from bubbletea.recorder import INPUT, SIZE, RecordedEvent
+
+
+class Sizes(tea.Model):
+    def __init__(self) -> None:
+        self.sizes = []
+
+    def init(self):
+        return tea.sequence(lambda: tea.WindowSizeMsg(90, 30), tea.quit_cmd)
+
+    def update(self, msg):
+        if isinstance(msg, tea.WindowSizeMsg):
+            self.sizes.append((msg.width, msg.height))
+        return self, None
+
+    def view(self) -> str:
+        return ""
+
+
+def test_sizes_recorded_as_delivered():
+    master, slave = pty.openpty()
+    read_fd, write_fd = os.pipe()
+    recording = io.StringIO()
+    try:
+        with os.fdopen(read_fd) as input_tty, os.fdopen(slave, "w") as output:
+            with tea.SessionRecorder(recording) as recorder:
+                model = tea.Program(
+                    Sizes(), input_tty=input_tty, output=output, recorder=recorder
+                ).run()
+    finally:
+        os.close(write_fd)
+        os.close(master)
+    recording.seek(0)
+    sizes = [e.data for e in tea.load_recording(recording) if e.kind == SIZE]
+    assert sizes == model.sizes == [(90, 30)]
+
+
+class Quitter(tea.Model):
+    def init(self):
+        return None
+
+    def update(self, msg):
+        if isinstance(msg, tea.KeyMsg) and msg.key == "q":
+            return self, tea.quit_cmd
+        return self, None
+
+    def view(self) -> str:
+        return ""
+
+
+def test_realtime_replay_closes_its_input():
+    replayer = tea.Replayer([RecordedEvent(0.0, INPUT, b"q")])
+    before = len(os.listdir("/proc/self/fd"))
+    for _ in range(5):
+        replayer.run_realtime(Quitter(), output=io.StringIO())
+    # The feeder thread closes the write end once it has quit the program
+    deadline = time.monotonic() + 2.0
+    while len(os.listdir("/proc/self/fd")) > before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(os.listdir("/proc/self/fd")) <= before
@@ -0,0 +1,202 @@
+"""Tests for the line and cell renderers."""
+
+import io
+import random
+import re
+import unicodedata
+
+from bubbletea import renderer as renderer_module
+from bubbletea.renderer import CellRenderer, Renderer
+from bubbletea.width import string_width
+
+CONTROL_RE = re.compile(r"\x1b\[([0-9;?]*)([A-Za-z])|\r|\n")
+
+
+class Terminal:
+    """Just enough of a VT100 to follow the renderers, with the SGR of every cell."""
+
+    def __init__(self, width: int = 40, height: int = 10):
+        self.width = width
+        self.height = height
+        self.rows = [self._blank() for _ in range(height)]
+        self.row = 0
+        self.col = 0
+        self.sgr = ""
+
+    def feed(self, data: str) -> None:
+        pos = 0
+        for m in CONTROL_RE.finditer(data):
+            self._text(data[pos:m.start()])
+            pos = m.end()
+            text = m.group(0)
+            if text == "\r":
+                self.col = 0
+            elif text == "\n":
+                self._down(1)
+            else:
+                self._csi(m.group(1), m.group(2))
+        self._text(data[pos:])
+
+    def lines(self) -> list:
+        return ["".join(ch for ch, _ in row).rstrip() for row in self.rows]
+
+    def cells(self) -> list:
+        return [list(row) for row in self.rows]
+
+    def _blank(self, n: int = 0) -> list:
+        return [(" ", "")] * (n or self.width)
+
+    def _text(self, text: str) -> None:
+        for ch in text:
+            if unicodedata.combining(ch):
+                # Joins the character before the cursor
+                if self.col:
+                    prev, sgr = self.rows[self.row][self.col - 1]
+                    self.rows[self.row][self.col - 1] = (prev + ch, sgr)
+                continue
+            wide = unicodedata.east_asian_width(ch) in "WF"
+            if self.col + wide < self.width:
+                self.rows[self.row][self.col] = (ch, self.sgr)
+                self.col += 1
+                if wide:
+                    self.rows[self.row][self.col] = ("", self.sgr)
+                    self.col += 1
+
+    def _down(self, n: int) -> None:
+        for _ in range(n):
+            if self.row == self.height - 1:
+                self.rows.pop(0)
+                self.rows.append(self._blank())
+            else:
+                self.row += 1
+
+    def _csi(self, params: str, final: str) -> None:
+        if params.startswith("?"):
+            return
+        n = int(params or 1) if final in "AB" else 0
+        if final == "A":
+            self.row = max(0, self.row - n)
+        elif final == "B":
+            self.row = min(self.height - 1, self.row + n)
+        elif final == "H":
+            row, _, col = params.partition(";")
+            self.row = int(row or 1) - 1
+            self.col = int(col or 1) - 1
+        elif final == "m":
+            self.sgr = "" if params in ("", "0") else params
+        elif final == "K":
+            if params == "2":
+                self.rows[self.row] = self._blank()
+            else:
+                self.rows[self.row][self.col:] = self._blank(self.width - self.col)
+        elif final == "J":
+            if params == "2":
+                self.rows = [self._blank() for _ in range(self.height)]
+                return
+            self.rows[self.row][self.col:] = self._blank(self.width - self.col)
+            for r in range(self.row + 1, self.height):
+                self.rows[r] = self._blank()
+
+
+def render_all(frames: list) -> Terminal:
+    output = io.StringIO()
+    renderer = Renderer(output)
+    term = Terminal()
+    term.feed("history\r\n")
+    for frame in frames:
+        renderer.render(frame)
+        term.feed(output.getvalue())
+        output.seek(0)
+        output.truncate()
+        rows = frame.split("\n")
+        assert term.lines()[1:1 + len(rows)] == rows
+        assert term.row == len(rows)
+    return term
+
+
+def test_middle_line_changed():
+    frames = ["1\n2\n3\n4\n5", "1\nTWO\n3\n4\n5", "1\n2\n3\n4\n5", "1\n2\nX\n4\n5"]
+    term = render_all(frames)
+    assert term.lines()[0] == "history"
+
+
+def test_only_top_line_changed():
+    term = render_all(["a\nb\nc\nd\ne\nf", "A\nb\nc\nd\ne\nf", "x\nb\nc\nd\ne\nf"])
+    assert term.lines()[0] == "history"
+
+
+def test_unchanged_bottom_after_shrink():
+    term = render_all(["a\nb\nc\nd", "A\nb\nc", "a\nb\nc"])
+    assert term.lines()[:5] == ["history", "a", "b", "c", ""]
+
+
+def cell_frames(rng: random.Random, count: int, colors: int = 8) -> list:
+    """Styled frames with small edits, styles left open across lines and long lines."""
+    words = ["ab", "wide\u754c", "x", "e\u0301", "   ", "longer text"]
+    lines = []
+    frames = []
+    for _ in range(count):
+        while len(lines) < 8:
+            parts = []
+            for _ in range(rng.randint(0, 6)):
+                if rng.random() < 0.5:
+                    parts.append(f"\x1b[3{rng.randrange(colors) % 8};{rng.choice('1234')}m")
+                    if colors > 8:
+                        parts.append(f"\x1b[38;2;{rng.randrange(colors)};0;0m")
+                if rng.random() < 0.2:
+                    parts.append("\x1b[0m")
+                parts.append(rng.choice(words))
+            lines.append("".join(parts))
+        r = rng.randrange(len(lines))
+        if rng.random() < 0.3:
+            del lines[r]
+        else:
+            lines[r] = lines[r][:-1] + rng.choice("XYZ")
+        frames.append(list(lines))
+    return frames
+
+
+def draw(frames: list) -> list:
+    """Render frames with one CellRenderer; return the screen after each."""
+    output = io.StringIO()
+    renderer = CellRenderer(output)
+    renderer.resize(30, 10)
+    renderer.enter_alt_screen()
+    term = Terminal(30, 10)
+    screens = []
+    for frame in frames:
+        renderer.render(frame)
+        term.feed(output.getvalue())
+        output.seek(0)
+        output.truncate()
+        screens.append(term.cells())
+    return screens
+
+
+def test_cell_renderer_matches_fresh_render():
+    frames = cell_frames(random.Random(1), 200)
+    screens = draw(frames)
+    for frame, screen in zip(frames, screens):
+        assert screen == draw([frame])[0]
+
+
+def test_cell_renderer_resets_style_table(monkeypatch):
+    monkeypatch.setattr(renderer_module, "MAX_STYLES", 16)
+    frames = cell_frames(random.Random(2), 100, colors=256)
+    screens = draw(frames)
+    for frame, screen in zip(frames, screens):
+        assert screen == draw([frame])[0]
+
+
+def test_cell_rows_measure_graphemes_like_string_width():
+    renderer = CellRenderer(io.StringIO())
+    lines = [
+        "flag \U0001F1EF\U0001F1F5 end",
+        "\U0001F1EF\U0001F1F5\U0001F1FA\U0001F1F8\U0001F1EB x",
+        "family \U0001F468\u200d\U0001F469\u200d\U0001F467 end",
+        "\x1b[31m\U0001F469\u200d\x1b[1m\U0001F4BB\x1b[0m done",
+        "cafe\u0301 \u754c\u754c",
+    ]
+    for line in lines:
+        row = renderer._parse_line(line, 0, 40)
+        assert row.length == string_width(line)
@@ -0,0 +1,123 @@
+"""Tests for hosting many programs in one process."""
+
+import asyncio
+import socket
+import time
+
+import bubbletea as tea
+from bubbletea import server as server_module
+
+
+class Counter(tea.Model):
+    def __init__(self, lines: int = 1) -> None:
+        self.lines = lines
+        self.keys = 0
+
+    def init(self):
+        return None
+
+    def update(self, msg):
+        if isinstance(msg, tea.KeyMsg):
+            self.keys += 1
+        return self, None
+
+    def view(self) -> str:
+        return "\n".join(f"{self.keys} " * 500 for _ in range(self.lines))
+
+
+class Slow(tea.Model):
+    """Takes half a millisecond over every message."""
+
+    def __init__(self) -> None:
+        self.seen = 0
+
+    def init(self):
+        return None
+
+    def update(self, msg):
+        # Busy, so the time taken doesn't depend on how long sleeps oversleep
+        end = time.perf_counter() + 0.0005
+        while time.perf_counter() < end:
+            pass
+        self.seen += 1
+        return self, None
+
+    def view(self) -> str:
+        return str(self.seen)
+
+
+def test_message_flood_takes_turns_with_other_sessions():
+    gaps = []
+
+    async def ticker() -> None:
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(0.005)
+            now = time.monotonic()
+            gaps.append(now - last)
+            last = now
+
+    async def main() -> None:
+        server = tea.ProgramServer(Slow)
+        end, client = socket.socketpair()
+        session = server.open(end.detach())
+        await asyncio.sleep(0.1)
+        watch = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        session.program.send_many(tea.KeyMsg("a") for _ in range(1200))
+        deadline = time.monotonic() + 5
+        while session.model.seen < 1200 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert session.model.seen >= 1200
+        watch.cancel()
+        await server.close()
+        client.close()
+
+    asyncio.run(main())
+    # Draining them all at once would hold the loop for over half a second
+    assert gaps and max(gaps) < 0.3
+
+
+def test_slow_client_does_not_stall_other_sessions(monkeypatch):
+    monkeypatch.setattr(server_module, "WRITE_TIMEOUT", 1.0)
+    gaps = []
+
+    async def ticker() -> None:
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.monotonic()
+            gaps.append(now - last)
+            last = now
+
+    async def main() -> None:
+        models = iter([Counter(lines=2000), Counter()])
+        server = tea.ProgramServer(lambda: next(models))
+        slow_end, slow_client = socket.socketpair()
+        fast_end, fast_client = socket.socketpair()
+        slow = server.open(slow_end.detach())
+        fast = server.open(fast_end.detach())
+        await asyncio.sleep(0.2)
+        # The slow client never reads, so its first frame is mostly waiting
+        assert slow.program._renderer._backlog
+
+        watch = asyncio.create_task(ticker())
+        slow.close()
+        await asyncio.sleep(0.1)
+        fast_client.send(b"b")
+        deadline = time.monotonic() + 0.5
+        while fast.model.keys == 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert fast.model.keys == 1
+        # Still waiting for its client to read
+        assert not slow.task.done()
+
+        await slow.wait()
+        assert slow.id not in server.sessions
+        await server.close()
+        watch.cancel()
+        slow_client.close()
+        fast_client.close()
+
+    asyncio.run(main())
+    assert gaps and max(gaps) < 0.25
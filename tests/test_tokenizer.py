@@ -0,0 +1,156 @@
+"""Tests for the input tokenizer."""
+
+import asyncio
+import io
+import os
+import threading
+import time
+
+import pytest
+
+import bubbletea as tea
+from bubbletea.tokenizer import ESC_TIMEOUT, InputTokenizer
+
+ESCAPE = tea.KeyMsg("escape")
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (b"\x1b[<0;10;5M", tea.MouseMsg),
+        (b"\x1b[97u", tea.KeyMsg("a")),
+        (b"\x1b[200~hi\x1b[201~", tea.PasteMsg("hi")),
+        (b"\x1b[8;24;80t", tea.WindowSizeMsg(80, 24)),
+    ],
+)
+def test_escape_before_sequence(data, expected):
+    tokenizer = InputTokenizer()
+    msgs = tokenizer.feed(b"\x1b" + data)
+    assert msgs[0] == ESCAPE
+    assert len(msgs) == 2
+    if isinstance(expected, type):
+        assert isinstance(msgs[1], expected)
+    else:
+        assert msgs[1] == expected
+    assert not tokenizer.pending
+
+
+def test_escape_before_known_sequence_is_alt():
+    assert InputTokenizer().feed(b"\x1b\x1b[A") == [tea.KeyMsg("alt+up")]
+
+
+def test_double_escape():
+    tokenizer = InputTokenizer()
+    assert tokenizer.feed(b"\x1b\x1b") == []
+    assert tokenizer.flush() == [ESCAPE, ESCAPE]
+
+
+# Keys, UTF-8 text, mouse, kitty, paste and modified keys, one after another
+STREAM = (
+    "a\x1b[A\u00e9\x1b[<0;10;5M\x1b[97u\x1b[200~hi \u754c\x1b[201~\x1b[1;5C\u754cz"
+).encode()
+
+
+def test_read_split_anywhere():
+    expected = InputTokenizer().feed(STREAM)
+    assert len(expected) == 9
+    for k in range(1, len(STREAM)):
+        tokenizer = InputTokenizer()
+        assert tokenizer.feed(STREAM[:k]) + tokenizer.feed(STREAM[k:]) == expected, k
+        assert not tokenizer.pending
+
+
+def test_read_byte_by_byte():
+    tokenizer = InputTokenizer()
+    msgs = []
+    for byte in STREAM:
+        msgs += tokenizer.feed(bytes([byte]))
+    assert msgs == InputTokenizer().feed(STREAM)
+
+
+def test_flush_lone_escape():
+    tokenizer = InputTokenizer()
+    assert tokenizer.feed(b"\x1b") == []
+    assert tokenizer.pending
+    assert tokenizer.flush() == [ESCAPE]
+    assert not tokenizer.pending
+    assert tokenizer.flush() == []
+
+
+def test_flush_incomplete_sequence():
+    tokenizer = InputTokenizer()
+    assert tokenizer.feed(b"\x1b[") == []
+    assert tokenizer.flush() == [tea.KeyMsg("alt+[")]
+    assert not tokenizer.pending
+
+
+def test_flush_leaves_paste_open():
+    tokenizer = InputTokenizer()
+    assert tokenizer.feed(b"\x1b[200~ab") == []
+    assert not tokenizer.pending
+    assert tokenizer.flush() == []
+    assert tokenizer.feed(b"c\x1b[201~") == [tea.PasteMsg("abc")]
+
+
+def test_paste_delivered_in_chunks():
+    tokenizer = InputTokenizer(paste_chunk=4)
+    text = "abcdef\u754c\u754cgh"
+    data = b"\x1b[200~" + text.encode() + b"\x1b[201~x"
+    msgs = []
+    for k in range(0, len(data), 3):
+        msgs += tokenizer.feed(data[k:k + 3])
+    pastes = msgs[:-1]
+    assert len(pastes) > 1
+    assert "".join(msg.text for msg in pastes) == text
+    assert [msg.final for msg in pastes] == [False] * (len(pastes) - 1) + [True]
+    assert not any(msg.truncated for msg in pastes)
+    assert msgs[-1] == tea.KeyMsg("x")
+
+
+def test_paste_truncated():
+    tokenizer = InputTokenizer(paste_chunk=4, max_paste=10)
+    msgs = tokenizer.feed(b"\x1b[200~abcdef")
+    msgs += tokenizer.feed(b"ghijklmn\x1b[20")
+    msgs += tokenizer.feed(b"1~x")
+    pastes = msgs[:-1]
+    assert "".join(msg.text for msg in pastes) == "abcdefghij"
+    assert pastes[-1].final and pastes[-1].truncated
+    assert msgs[-1] == tea.KeyMsg("x")
+
+
+class QuitOnKey(tea.Model):
+    def __init__(self) -> None:
+        self.keys = []
+
+    def init(self):
+        return None
+
+    def update(self, msg):
+        if isinstance(msg, tea.KeyMsg):
+            self.keys.append(msg.key)
+            return self, tea.quit_cmd
+        return self, None
+
+    def view(self) -> str:
+        return ""
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_program_times_out_lone_escape(run_async):
+    read_fd, write_fd = os.pipe()
+    # Sent late, so a program that never times the ESC out reads alt+q
+    fallback = threading.Timer(2.0, os.write, (write_fd, b"q"))
+    try:
+        with os.fdopen(read_fd) as input_tty:
+            program = tea.Program(QuitOnKey(), input_tty=input_tty, output=io.StringIO())
+            os.write(write_fd, b"\x1b")
+            fallback.start()
+            start = time.monotonic()
+            model = asyncio.run(program.run_async()) if run_async else program.run()
+            elapsed = time.monotonic() - start
+    finally:
+        fallback.cancel()
+        fallback.join()
+        os.close(write_fd)
+    assert model.keys == ["escape"]
+    assert elapsed < ESC_TIMEOUT + 1.0
@@ -0,0 +1,112 @@
+"""Timer scheduling for Bubble Tea."""
+
+import heapq
+import time
+from itertools import count
+from threading import Lock
+from typing import Callable, List, Optional, Tuple
+
+from .commands import TickCmd
+from .messages import Msg
+
+
+class TimerScheduler:
+    """
+    Fires tick commands from a program's event loop.
+    
+    Pending timers are kept in a binary heap ordered by deadline. The
+    event loop asks for ``next_deadline()`` to know how long it may block
+    and calls ``pop_due()`` when it wakes up, so timers need no threads.
+    Cancelled timers are dropped lazily when they reach the top of the
+    heap.
+    """
+    
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        catch_errors: bool = True,
+    ):
+        """
+        Args:
+            clock: Monotonic clock deadlines are measured against
+            wall_clock: Clock that aligned timers are aligned to
+            catch_errors: Swallow exceptions raised by a timer's function,
+                as a program does for commands, rather than raising them
+                from ``pop_due()``
+        """
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.catch_errors = catch_errors
+        self._heap: List[Tuple[float, int, TickCmd]] = []
+        self._seq = count()
+        self._lock = Lock()
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def schedule(self, cmd: TickCmd) -> None:
+        """Start a timer for a tick command."""
+        if cmd.cancelled:
+            return
+        deadline = self.clock() + cmd.delay(self.wall_clock())
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, next(self._seq), cmd))
+    
+    def next_deadline(self) -> Optional[float]:
+        """Return when the earliest live timer is due, or None if none are."""
+        heap = self._heap
+        if not heap:
+            return None
+        with self._lock:
+            while heap and heap[0][2].cancelled:
+                heapq.heappop(heap)
+            return heap[0][0] if heap else None
+    
+    def pop_due(self) -> List[Msg]:
+        """
+        Fire all timers that are due.
+        
+        Repeating timers are scheduled again for their next interval; if
+        the loop fell behind by more than one interval the missed ticks
+        are skipped rather than delivered in a burst. A timer whose
+        function raises delivers nothing, and the others still fire.
+        
+        Returns:
+            The messages of the timers that fired, in deadline order
+        """
+        heap = self._heap
+        if not heap:
+            return []
+        
+        now = self.clock()
+        due: List[TickCmd] = []
+        with self._lock:
+            while heap and heap[0][0] <= now:
+                deadline, _, cmd = heapq.heappop(heap)
+                if cmd.cancelled:
+                    continue
+                due.append(cmd)
+                if cmd.repeat:
+                    # Stay on the original grid of deadlines so repeating
+                    # timers don't drift
+                    missed = (now - deadline) // cmd.duration
+                    deadline += (missed + 1) * cmd.duration
+                    heapq.heappush(heap, (deadline, next(self._seq), cmd))
+        
+        msgs: List[Msg] = []
+        for cmd in due:
+            try:
+                msg = cmd.fn()
+            except Exception:
+                if not self.catch_errors:
+                    raise
+                continue
+            if msg is not None:
+                msgs.append(msg)
+        return msgs
+    
+    def clear(self) -> None:
+        """Drop all pending timers."""
+        with self._lock:
+            self._heap.clear()
@@ -0,0 +1,291 @@
+"""Streaming input tokenizer for Bubble Tea."""
+
+import codecs
+import re
+from typing import List, Optional, Tuple
+
+from .keys import CTRL_KEYS, parse_key, parse_kitty_key, _match_sequence
+from .messages import Msg, KeyMsg, PasteMsg, WindowSizeMsg, key_msg
+from .mouse import parse_mouse_msg
+
+
+# How long to wait for the rest of an escape sequence before treating a
+# lone ESC as the escape key, in seconds
+ESC_TIMEOUT = 0.05
+
+ESC = 0x1B
+
+# A complete CSI sequence: ESC [ <parameters 0x30-0x3F> <intermediates
+# 0x20-0x2F> <final byte 0x40-0x7E>
+CSI_RE = re.compile(rb"\x1b\[[0-?]*[ -/]*[@-~]")
+
+# Bracketed paste markers (the end marker follows the pasted text)
+PASTE_START = b"\x1b[200~"
+PASTE_END = b"\x1b[201~"
+
+# A paste larger than this many bytes is delivered in several messages
+PASTE_CHUNK_SIZE = 1 << 20
+
+# Pasted bytes beyond this are dropped
+MAX_PASTE_SIZE = 16 << 20
+
+# Key messages for single ASCII bytes, so plain typing needs no decoding
+# and reuses the same objects
+_ASCII_KEYS: List[Optional[KeyMsg]] = [None] * 128
+for _code in range(128):
+    if _code in CTRL_KEYS:
+        _ASCII_KEYS[_code] = key_msg(CTRL_KEYS[_code])
+    elif chr(_code).isprintable():
+        _ASCII_KEYS[_code] = key_msg(chr(_code))
+del _code
+
+
+def _utf8_length(lead: int) -> int:
+    """Return the length of the UTF-8 sequence starting with ``lead``."""
+    if lead < 0x80:
+        return 1
+    if 0xC2 <= lead <= 0xDF:
+        return 2
+    if 0xE0 <= lead <= 0xEF:
+        return 3
+    if 0xF0 <= lead <= 0xF4:
+        return 4
+    # Continuation byte or invalid lead byte
+    return 0
+
+
+class InputTokenizer:
+    """
+    Splits a stream of raw terminal input into messages.
+
+    Bytes are fed in as they are read; every complete key or mouse sequence
+    in a read becomes its own message, in a single pass over the buffer. An
+    escape sequence or UTF-8 character cut off at the end of a read is kept
+    and completed by the next one. A lone trailing ESC is ambiguous (it may
+    be the escape key or the start of a sequence), so it stays pending until
+    more input arrives or the reader calls ``flush()`` after ``ESC_TIMEOUT``.
+
+    Text between bracketed paste markers is not parsed as keys. It is
+    copied out with a search for the end marker and delivered as a single
+    PasteMsg, or as a series of them once it grows past ``paste_chunk``.
+    """
+
+    def __init__(
+        self, *, paste_chunk: int = PASTE_CHUNK_SIZE, max_paste: int = MAX_PASTE_SIZE
+    ) -> None:
+        """
+        Args:
+            paste_chunk: Bytes of pasted text after which a partial PasteMsg
+                is delivered
+            max_paste: Bytes of a single paste to keep; the rest is
+                dropped and the final PasteMsg marked as truncated
+        """
+        self._buf = bytearray()
+        self.paste_chunk = paste_chunk
+        self.max_paste = max_paste
+        # Pasted bytes not yet delivered; None outside of a paste
+        self._paste: Optional[bytearray] = None
+        self._paste_size = 0
+        self._paste_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    @property
+    def pending(self) -> bool:
+        """Whether an incomplete sequence is waiting for more input."""
+        # Within a paste only a partial end marker can be left over, and a
+        # timeout never completes it
+        return bool(self._buf) and self._paste is None
+
+    def feed(self, data: bytes) -> List[Msg]:
+        """Add raw input and return the messages for all complete sequences."""
+        self._buf += data
+        return self._drain(final=False)
+
+    def flush(self) -> List[Msg]:
+        """Treat pending input as complete and return its messages."""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> List[Msg]:
+        buf = self._buf
+        n = len(buf)
+        msgs: List[Msg] = []
+        i = 0
+        while i < n:
+            if self._paste is not None:
+                i = self._next_paste(buf, i, n, msgs)
+                if self._paste is not None:
+                    break
+                continue
+            width, msg = self._next(buf, i, n, final)
+            if width == 0:
+                # Wait for the rest of the sequence
+                break
+            if msg is not None:
+                msgs.append(msg)
+            i += width
+        del buf[:i]
+        return msgs
+
+    def _next_paste(self, buf: bytearray, i: int, n: int, msgs: List[Msg]) -> int:
+        """
+        Collect pasted text starting at ``buf[i]``.
+
+        Returns:
+            The index after the text consumed, which is past the end
+            marker if the paste is complete
+        """
+        end = buf.find(PASTE_END, i)
+        if end < 0:
+            # Keep what could be the start of the end marker for later
+            stop = n
+            for k in range(min(len(PASTE_END) - 1, n - i), 0, -1):
+                if PASTE_END.startswith(buf[n - k:n]):
+                    stop = n - k
+                    break
+            self._add_paste(buf, i, stop)
+            if len(self._paste) >= self.paste_chunk:  # type: ignore
+                msgs.append(self._take_paste(final=False))
+            return stop
+
+        self._add_paste(buf, i, end)
+        msgs.append(self._take_paste(final=True))
+        return end + len(PASTE_END)
+
+    def _add_paste(self, buf: bytearray, start: int, end: int) -> None:
+        """Add pasted bytes, up to the size cap."""
+        paste = self._paste
+        assert paste is not None
+        room = self.max_paste - self._paste_size
+        take = min(end - start, max(room, 0))
+        paste += buf[start:start + take]
+        self._paste_size += end - start
+
+    def _take_paste(self, final: bool) -> PasteMsg:
+        """Decode the collected paste into a message, ending the paste if final."""
+        paste = self._paste
+        assert paste is not None
+        text = self._paste_decoder.decode(bytes(paste), final=final)
+        del paste[:]
+        truncated = self._paste_size > self.max_paste
+        if final:
+            self._paste = None
+            self._paste_size = 0
+            self._paste_decoder.reset()
+        return PasteMsg(text=text, final=final, truncated=truncated)
+
+    def _next(self, buf: bytearray, i: int, n: int, final: bool) -> Tuple[int, Optional[Msg]]:
+        """
+        Detect the sequence starting at ``buf[i]``.
+
+        Returns:
+            The number of bytes consumed (0 if the sequence is incomplete)
+            and its message, if any
+        """
+        b = buf[i]
+
+        if b == ESC:
+            return self._next_escape(buf, i, n, final)
+
+        if b < 0x80:
+            return 1, _ASCII_KEYS[b]
+
+        # Multi-byte UTF-8 character
+        length = _utf8_length(b)
+        if length == 0:
+            return 1, None
+        if i + length > n:
+            return (0, None) if not final else (n - i, None)
+        text = bytes(buf[i:i + length]).decode('utf-8', errors='ignore')
+        return length, (key_msg(text) if text else None)
+
+    def _next_escape(
+        self, buf: bytearray, i: int, n: int, final: bool
+    ) -> Tuple[int, Optional[Msg]]:
+        if i + 2 < n and buf[i + 1] == 0x5B and buf[i + 2] == 0x3C:
+            # ESC [ <, an SGR mouse event; no key sequence starts this way
+            return self._next_csi(buf, i, n, final)
+
+        # Known sequences, longest match first
+        key, width, partial = _match_sequence(buf, i, n)
+        if partial and not final:
+            # A longer sequence may still arrive
+            return 0, None
+        if key is not None:
+            return width, key_msg(key)
+
+        if i + 1 >= n:
+            # Lone ESC
+            return 1, key_msg("escape")
+
+        c = buf[i + 1]
+
+        if c == ord('['):
+            return self._next_csi(buf, i, n, final)
+
+        if c == ord('O'):
+            # Unknown SS3 sequence: ESC O <final>
+            if i + 2 >= n:
+                return (0, None) if not final else (2, key_msg("alt+O"))
+            return 3, None
+
+        if c == ESC:
+            # The escape key, followed by something else
+            return 1, key_msg("escape")
+
+        # Alt + character
+        length = _utf8_length(c)
+        if length == 0:
+            return 2, None
+        if i + 1 + length > n:
+            return (0, None) if not final else (n - i, None)
+        return 1 + length, self._key(buf, i, i + 1 + length)
+
+    def _next_csi(
+        self, buf: bytearray, i: int, n: int, final: bool
+    ) -> Tuple[int, Optional[Msg]]:
+        match = CSI_RE.match(buf, i)
+        if match is None:
+            # Incomplete or malformed; find out which
+            j = i + 2
+            while j < n and 0x30 <= buf[j] <= 0x3F:
+                j += 1
+            while j < n and 0x20 <= buf[j] <= 0x2F:
+                j += 1
+            if j >= n and not final:
+                return 0, None
+            # The sequence never completed or is malformed, keep the keys
+            # typed so far
+            return 2, key_msg("alt+[")
+
+        end = match.end()
+        j = end - 1
+        if buf[i + 2] == 0x3C and buf[j] in (0x4D, 0x6D):  # ESC [ < ... M or m
+            return end - i, parse_mouse_msg(buf, i, end)
+
+        if buf[j] == ord('~') and buf[i:end] == PASTE_START:
+            self._paste = bytearray()
+            return end - i, None
+
+        if buf[j] == 0x74 and buf[i + 2] == 0x38:  # ESC [ 8 ; ... t
+            return end - i, self._size_report(buf, i, end)
+
+        if buf[j] == ord('u'):
+            key = parse_kitty_key(bytes(buf[i:end]))
+            return end - i, (key_msg(key) if key else None)
+
+        # Unknown CSI sequence, skip it
+        return end - i, None
+
+    def _size_report(self, buf: bytearray, start: int, end: int) -> Optional[Msg]:
+        # ESC [ 8 ; rows ; columns t, which xterm sends in reply to ESC [ 18 t
+        # and clients of a remote program send when their window changes
+        params = bytes(buf[start + 2:end - 1]).split(b";")
+        if len(params) != 3 or params[0] != b"8":
+            return None
+        try:
+            return WindowSizeMsg(int(params[2]), int(params[1]))
+        except ValueError:
+            return None
+
+    def _key(self, buf: bytearray, start: int, end: int) -> Optional[Msg]:
+        key = parse_key(bytes(buf[start:end]))
+        return key_msg(key) if key else None
@@ -0,0 +1,146 @@
+"""Display width of terminal text for Bubble Tea."""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+
+# Escape sequences that take up no cells: CSI (including SGR), OSC
+# terminated by BEL or ST, and two-byte escapes
+ANSI_RE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+# Zero width joiner, which glues emoji into a single grapheme
+ZWJ = "\u200d"
+
+# Lines measured or truncated per frame repeat from frame to frame, so
+# results are memoized
+CACHE_SIZE = 4096
+
+
+def strip_ansi(s: str) -> str:
+    """Remove escape sequences from a string."""
+    if "\x1b" not in s:
+        return s
+    return ANSI_RE.sub("", s)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def char_width(ch: str) -> int:
+    """
+    Return the number of cells a single character occupies.
+
+    Combining marks, format characters and control characters take no
+    cells; East Asian wide and fullwidth characters take two.
+    """
+    code = ord(ch)
+    if 0x20 <= code < 0x7F:
+        return 1
+    if code < 0x20 or 0x7F <= code < 0xA0:
+        return 0
+    if unicodedata.combining(ch) or unicodedata.category(ch) in ("Mn", "Me", "Cf"):
+        return 0
+    if unicodedata.east_asian_width(ch) in ("W", "F"):
+        return 2
+    return 1
+
+
+def _widths(text: str) -> Iterator[int]:
+    """
+    Yield the width of each character of text without escape sequences.
+
+    Characters that continue a grapheme (combining marks, the parts of an
+    emoji joined by ZWJ, the second half of a flag) are given no width, so
+    the widths of a grapheme add up to the cells it occupies.
+    """
+    joined = False  # The previous character was a zero width joiner
+    regional = False  # An unpaired regional indicator (half a flag) precedes
+    for ch in text:
+        code = ord(ch)
+        if 0x20 <= code < 0x7F:
+            joined = regional = False
+            yield 1
+        elif ch == ZWJ:
+            joined = True
+            yield 0
+        elif joined:
+            # Part of the preceding emoji sequence
+            joined = False
+            yield 0
+        elif 0x1F1E6 <= code <= 0x1F1FF:
+            # Two regional indicators form one flag
+            regional = not regional
+            yield 2 if regional else 0
+        else:
+            regional = False
+            yield char_width(ch)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def string_width(s: str) -> int:
+    """
+    Return the number of cells a line occupies on screen.
+
+    Escape sequences are ignored and wide characters, combining marks and
+    emoji sequences are measured as the terminal draws them.
+    """
+    if s.isascii() and "\x1b" not in s:
+        return len(s)
+    return sum(_widths(strip_ansi(s)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def truncate(s: str, width: int, tail: str = "") -> str:
+    """
+    Cut a line down to at most ``width`` cells.
+
+    Escape sequences are kept, including those after the cut, so styles
+    are still reset. If the line is cut, ``tail`` is appended within the
+    width.
+
+    Args:
+        s: The line to truncate
+        width: Maximum number of cells
+        tail: String to end a truncated line with, e.g. "…"
+
+    Returns:
+        The truncated line
+    """
+    if string_width(s) <= width:
+        return s
+
+    limit = width - string_width(tail)
+    if limit < 0:
+        return ""
+
+    out: List[str] = []
+    used = 0
+    cut = False
+    pos = 0
+    for match in ANSI_RE.finditer(s) if "\x1b" in s else ():
+        if not cut:
+            used, cut = _take(s[pos:match.start()], limit, used, out)
+            if cut:
+                out.append(tail)
+        out.append(match.group())
+        pos = match.end()
+    if not cut:
+        used, cut = _take(s[pos:], limit, used, out)
+        if cut:
+            out.append(tail)
+    return "".join(out)
+
+
+def _take(text: str, limit: int, used: int, out: List[str]) -> Tuple[int, bool]:
+    """
+    Append the graphemes of ``text`` that fit within ``limit`` cells.
+
+    Returns:
+        The cells used so far and whether the text was cut
+    """
+    for i, w in enumerate(_widths(text)):
+        if w and used + w > limit:
+            out.append(text[:i])
+            return used, True
+        used += w
+    out.append(text)
+    return used, False